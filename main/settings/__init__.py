@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/2.0/ref/settings/
 from pathlib import Path
 
 from main.jsonenv import env
+from main.settings.cache import *
 from main.settings.core import *
 from main.settings.db import *
 from main.settings.logging import *
@@ -59,6 +60,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "utils.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -0,0 +1,20 @@
+from main.jsonenv import env
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Shared between the workers in production (e.g. RedisCache/PyMemcacheCache)
+    "sales": {
+        "BACKEND": env.get(
+            "sales_cache_backend", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": env.get("sales_cache_location", "sales"),
+        "TIMEOUT": env.get("sales_cache_timeout", 300),
+    },
+}
+
+SALES_CACHE_ALIAS = "sales"
+
+# Number of articles kept in each revenue leaderboard (see sales.cache.Leaderboard)
+SALES_LEADERBOARD_SIZE = env.get("sales_leaderboard_size", 50)
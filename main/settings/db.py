@@ -11,3 +11,30 @@ DATABASES = {
         "PORT": "5431",
     }
 }
+
+# Read replicas of the default (primary) database, as connection settings
+# overriding the primary ones, e.g. [{"host": "replica-1", "port": "5432"}].
+# See utils/routers.py: read-only API views read from a replica, unless the user
+# wrote in the last DATABASE_REPLICA_STICKINESS seconds (replication lag).
+DATABASE_REPLICAS = []
+for number, replica in enumerate(env.get("db_replicas", []), start=1):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        **{key.upper(): value for key, value in replica.items()},
+    }
+    # Tests use a distinct database per replica, to tell the reads apart
+    DATABASES[alias]["TEST"] = {"NAME": f"test_{DATABASES[alias]['NAME']}_{alias}"}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["utils.routers.PrimaryReplicaRouter"]
+DATABASE_REPLICA_STICKINESS = env.get("db_replica_stickiness", 5)
+# Shared between the workers, to pin a user to the primary in all of them
+DATABASE_REPLICA_STICKINESS_CACHE_ALIAS = "sales"
+
+# Range partitioning of the sales table by date, per "month" or "year"
+# (PostgreSQL, converted with `manage.py partition_sales --convert`). The
+# partitions of the next SALES_PARTITIONS_AHEAD intervals are created by the
+# same command (to run daily) and after each migrate.
+SALES_PARTITION_INTERVAL = env.get("sales_partition_interval", "month")
+SALES_PARTITIONS_AHEAD = env.get("sales_partitions_ahead", 3)
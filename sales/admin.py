@@ -1,24 +1,44 @@
-from tabnanny import verbose
 from django.contrib import admin
 
 from sales.models import ArticleCategory, Article, Sale
+from utils.admin import AutocompleteFilter, LargeTableAdminMixin
+
 
 # Register your models here.
 @admin.register(ArticleCategory)
 class ArticleCategoryAdmin(admin.ModelAdmin):
     list_display = ("display_name",)
     list_filter = ("display_name",)
-
-@admin.register(Article)
-class ArticleAdmin(admin.ModelAdmin):
-    list_display = ("name", "code", "category","manufacturing_cost")
-    list_filter = ("name", "category",)
-
-@admin.register(Sale)
-class SaleAdmin(admin.ModelAdmin):
-    list_display = ("date", "author", "article", "quantity", "unit_selling_price",)
-    list_filter = ("date", "author", "article")
+    search_fields = ("display_name",)
 
 
+@admin.register(Article)
+class ArticleAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("name", "code", "category", "manufacturing_cost")
+    list_filter = (("category", AutocompleteFilter),)
+    list_select_related = ("category",)
+    search_fields = ("code", "name")
+    autocomplete_fields = ("category",)
+    # Served by the unique index of code
+    ordering = ("code",)
 
 
+@admin.register(Sale)
+class SaleAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = (
+        "date",
+        "author",
+        "article",
+        "quantity",
+        "unit_selling_price",
+    )
+    list_filter = (
+        "date",
+        ("author", AutocompleteFilter),
+        ("article", AutocompleteFilter),
+    )
+    list_select_related = ("author", "article")
+    autocomplete_fields = ("author", "article")
+    date_hierarchy = "date"
+    # Served by sales_sale_date_idx
+    ordering = ("-date", "-id")
@@ -1,8 +1,11 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.db.models import Avg, F, Sum
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import OpenApiTypes, extend_schema
 from django_filters.rest_framework import DjangoFilterBackend
 
 # from drf_spectacular.utils import extend_schema, inline_serializer
@@ -22,27 +25,69 @@ from rest_framework import generics
 
 
 from sales.serializers import (
+    ArticleImportDeserializer,
+    ArticleImportQueryDeserializer,
+    ArticleImportResultSerializer,
+    ArticleLeaderboardQueryDeserializer,
+    ArticleLeaderboardSerializer,
     ArticleListAgregatedSerializer,
+    ArticleSearchQueryDeserializer,
     ArticleSerializer,
     CategoryArticleSerializer,
     UpdateSaleDeserializer,
     UpdateSaleSerializer,
     SaleListAgregatedSerializer,
+    SaleBulkCreateDeserializer,
     SaleCreateDeserializer,
     SaleCreateSerializer,
+    SaleAnalyticsQueryDeserializer,
+    SaleAnalyticsSerializer,
+    SaleColumnarExportQueryDeserializer,
+    SaleExportQueryDeserializer,
     SaleSerializer,
 )
-
-from sales.models import Article, ArticleCategory, Sale
-from sales.pagination import SalesPagination
+from sales.columnar import (
+    COLUMNAR_EXTENSIONS,
+    COLUMNAR_FORMATS,
+    export_articles,
+    export_sales,
+    sales_since,
+)
+from sales.exports import EXPORT_FORMATS, export_chunks
+from sales.filters import SaleFilterSet
+
+from sales.cache import (
+    CachedListMixin,
+    aggregates_cache,
+    leaderboard,
+    reference_data,
+)
+from sales.models import (
+    Article,
+    ArticleCategory,
+    ArticleRevenue,
+    DailyArticleRevenue,
+    Sale,
+)
+from sales.pagination import SaleListPagination, SalesPagination
+from utils.routers import get_read_database
+from utils.views import (
+    AsyncAPIViewMixin,
+    AsyncListModelMixin,
+    AsyncRetrieveModelMixin,
+    CompiledListMixin,
+    ConditionalGetMixin,
+    ReplicaReadMixin,
+)
 
 ###################################
 # CATEGORY ARTICLE #
 ###################################
 
 
-class CategoryArticleListCreateView(generics.ListCreateAPIView):
-
+class CategoryArticleListCreateView(
+    ConditionalGetMixin, ReplicaReadMixin, generics.ListCreateAPIView
+):
     """
     GET List of ALL Category article
     """
@@ -50,6 +95,8 @@ class CategoryArticleListCreateView(generics.ListCreateAPIView):
     permissions_classes = (permissions.IsAuthenticated,)
     queryset = ArticleCategory.objects.all()
     serializer_class = CategoryArticleSerializer
+    query_budgets = {"GET": 1, "POST": 1}
+    etag_stamps = (reference_data,)
 
     """
     CREATE a new Category article
@@ -78,7 +125,9 @@ class CategoryArticleListCreateView(generics.ListCreateAPIView):
 ###################################
 
 
-class ArticleListCreateView(generics.ListCreateAPIView):
+class ArticleListCreateView(
+    ConditionalGetMixin, ReplicaReadMixin, CompiledListMixin, generics.ListCreateAPIView
+):
     """
     GET List of all Articles
     """
@@ -86,10 +135,33 @@ class ArticleListCreateView(generics.ListCreateAPIView):
     permissions_classes = (permissions.IsAuthenticated,)
     serializer_class = ArticleSerializer
     queryset = Article.objects.all().order_by("category")
+    # Including a reload of the reference data (2 queries)
+    query_budgets = {"GET": 2, "POST": 6}
+    etag_stamps = (reference_data,)
     # DOES NOT WORK: WHY ?
     # filter_backends = [filters.OrderingFilter]
     ordering_fields = ["category"]
 
+    def list(self, request, *args, **kwargs):
+        if "ordering" in request.query_params:
+            return super().list(request, *args, **kwargs)
+        return response.Response(self.get_cached_articles())
+
+    def get_cached_articles(self):
+        # Same order as the queryset, served from the reference data cache
+        return reference_data.get_serialized(
+            "articles",
+            lambda reference: list(
+                ArticleSerializer(
+                    sorted(
+                        reference.articles.values(),
+                        key=lambda article: (article.category_id, article.pk),
+                    ),
+                    many=True,
+                ).data
+            ),
+        )
+
     """
     CREATE a new Article
     """
@@ -108,7 +180,127 @@ class ArticleListCreateView(generics.ListCreateAPIView):
         return response.Response(data=serializer.data, status=status.HTTP_201_CREATED)
 
 
-class ArticleListAgregatedView(generics.ListAPIView):
+class ArticleSearchView(
+    ConditionalGetMixin, ReplicaReadMixin, CompiledListMixin, generics.ListAPIView
+):
+    """
+    GET the Articles whose code starts with `search`, or whose name or category
+    name contains it (see ArticleQuerySet.search), paginated
+    """
+
+    permissions_classes = (permissions.IsAuthenticated,)
+    serializer_class = ArticleSerializer
+    pagination_class = SalesPagination
+    filter_backends = []
+    # The matching categories, the count and the page
+    query_budgets = {"GET": 3}
+    etag_stamps = (reference_data,)
+
+    @extend_schema(parameters=[ArticleSearchQueryDeserializer])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        deserializer = ArticleSearchQueryDeserializer(data=self.request.query_params)
+        deserializer.is_valid(raise_exception=True)
+        return Article.objects.search(
+            deserializer.validated_data["search"],
+            fuzzy=deserializer.validated_data["fuzzy"],
+        )
+
+
+class ArticleBulkImportView(ReplicaReadMixin, generics.GenericAPIView):
+    """
+    CREATE many Articles at once (or, with `?update=true`, create or update them
+    by code):
+     - the codes and categories of the batch are checked in a few queries,
+     - the errors are reported per item, keyed by the index of the invalid ones,
+     - the articles are inserted in batches, in a single transaction.
+    """
+
+    permissions_classes = (permissions.IsAuthenticated,)
+    serializer_class = ArticleImportDeserializer
+    # Including a reload of the reference data (2 queries)
+    query_budgets = {"POST": 6}
+
+    @extend_schema(
+        parameters=[ArticleImportQueryDeserializer],
+        request=ArticleImportDeserializer(many=True),
+        responses={201: ArticleImportResultSerializer},
+    )
+    def post(self, request, *args, **kwargs):
+        query_deserializer = ArticleImportQueryDeserializer(data=request.query_params)
+        query_deserializer.is_valid(raise_exception=True)
+        update = query_deserializer.validated_data["update"]
+
+        deserializer = ArticleImportDeserializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=settings.SALES_ARTICLE_IMPORT_MAX_ITEMS,
+            context={"update": update},
+        )
+        deserializer.is_valid(raise_exception=True)
+        articles = Article.objects.bulk_import(
+            [
+                Article(**validated_data)
+                for validated_data in deserializer.validated_data
+            ],
+            update=update,
+            batch_size=settings.SALES_BULK_CREATE_BATCH_SIZE,
+        )
+        updated = sum(
+            article.code in deserializer.existing_codes for article in articles
+        )
+        serializer = ArticleImportResultSerializer(
+            instance={"created": len(articles) - updated, "updated": updated}
+        )
+        return response.Response(data=serializer.data, status=status.HTTP_201_CREATED)
+
+
+class ArticleLeaderboardView(ReplicaReadMixin, generics.GenericAPIView):
+    """
+    GET the `size` articles (of the `category` if given) with the highest
+    business revenue, from the leaderboard maintained on each sale write: no
+    aggregation of the sales, whatever their number.
+    """
+
+    permissions_classes = (permissions.IsAuthenticated,)
+    serializer_class = ArticleLeaderboardSerializer
+    # Including a reload of the reference data (2 queries) and of the board
+    query_budgets = {"GET": 3}
+
+    @extend_schema(
+        parameters=[ArticleLeaderboardQueryDeserializer],
+        responses={200: ArticleLeaderboardSerializer(many=True)},
+    )
+    def get(self, request, *args, **kwargs):
+        deserializer = ArticleLeaderboardQueryDeserializer(data=request.query_params)
+        deserializer.is_valid(raise_exception=True)
+        entries = leaderboard.get(
+            deserializer.validated_data["size"],
+            category_id=deserializer.validated_data.get("category"),
+        )
+        articles = reference_data.get_data().articles
+        ranking = []
+        for rank, (article_id, business_revenue) in enumerate(entries, start=1):
+            article = articles.get(article_id)
+            # Deleted meanwhile
+            if article is not None:
+                ranking.append(
+                    {
+                        "rank": rank,
+                        "article": article,
+                        "business_revenue": business_revenue,
+                    }
+                )
+        serializer = self.get_serializer(ranking, many=True)
+        return response.Response(serializer.data)
+
+
+class ArticleListAgregatedView(
+    ConditionalGetMixin, ReplicaReadMixin, CachedListMixin, generics.ListAPIView
+):
     """
     GET List of all Sales sorted in the following manner:
     -> 'liste agrégée des ventes (paginée par 25 éléments également) par article avec catégorie associée,
@@ -119,7 +311,11 @@ class ArticleListAgregatedView(generics.ListAPIView):
     permissions_classes = (permissions.IsAuthenticated,)
     serializer_class = ArticleListAgregatedSerializer
     pagination_class = SalesPagination
-    queryset = Article.objects.select_related("category").with_revenues_subquery()
+    queryset = ArticleRevenue.objects.select_related(
+        "article__category"
+    ).ordered_by_revenue()
+    query_budgets = {"GET": 2}
+    etag_stamps = (aggregates_cache,)
 
 
 ###################################
@@ -127,7 +323,9 @@ class ArticleListAgregatedView(generics.ListAPIView):
 ###################################
 
 
-class SaleListAgregatedView(generics.ListAPIView):
+class SaleListAgregatedView(
+    ConditionalGetMixin, ReplicaReadMixin, CachedListMixin, generics.ListAPIView
+):
     """
     GET List of all Sales sorted in the following manner:
     -> 'liste agrégée des ventes (paginée par 25 éléments également) par article avec catégorie associée,
@@ -138,34 +336,66 @@ class SaleListAgregatedView(generics.ListAPIView):
     permissions_classes = (permissions.IsAuthenticated,)
     serializer_class = SaleListAgregatedSerializer
     pagination_class = SalesPagination
-    queryset = Sale.objects.with_revenues()
+    queryset = ArticleRevenue.objects.ordered_by_revenue()
+    query_budgets = {"GET": 2}
+    etag_stamps = (aggregates_cache,)
 
 
-class SaleListCreateView(generics.ListCreateAPIView):
+class SaleAnalyticsView(
+    ConditionalGetMixin, ReplicaReadMixin, CachedListMixin, generics.ListAPIView
+):
     """
-    GET List of all Sales
+    GET revenue, quantity, sale count and margin of the Sales per day, week or
+    month (`period`), optionally per category or article (`group_by`), between
+    `date_from` and `date_to`. Served from the daily rollup: the cost depends
+    on the number of days in the range, not on the number of sales.
     """
 
     permissions_classes = (permissions.IsAuthenticated,)
-    serializer_class = SaleSerializer
+    serializer_class = SaleAnalyticsSerializer
     pagination_class = SalesPagination
+    cache_query_params = (
+        "page",
+        "page_size",
+        "period",
+        "group_by",
+        "date_from",
+        "date_to",
+    )
+    query_budgets = {"GET": 2}
+    etag_stamps = (aggregates_cache,)
 
-    filter_backends = [DjangoFilterBackend]
-    # filterset_fields = ["author"]
+    @extend_schema(parameters=[SaleAnalyticsQueryDeserializer])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        deserializer = SaleAnalyticsQueryDeserializer(data=self.request.query_params)
+        deserializer.is_valid(raise_exception=True)
+        return DailyArticleRevenue.objects.buckets(**deserializer.validated_data)
 
+
+class SaleListCreateView(
+    ConditionalGetMixin, ReplicaReadMixin, CompiledListMixin, generics.ListCreateAPIView
+):
     """
-    if the string 'author' is passed as query param, then the list of sales is filtered by the 
-    user (author) making the request
+    GET List of all Sales, filtered by authors, articles, categories, date and
+    price ranges (see SaleFilterSet)
     """
-    # TODO: Use Django Filter Backend
+
+    permissions_classes = (permissions.IsAuthenticated,)
+    serializer_class = SaleSerializer
+    pagination_class = SaleListPagination
+    # Including a reload of the reference data (2 queries) for the creation
+    query_budgets = {"GET": 2, "POST": 7}
+    etag_stamps = (aggregates_cache,)
+
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = SaleFilterSet
 
     def get_queryset(self):
-        # django drf query params
-        queryset = Sale.objects.all().order_by("-unit_selling_price")
-        author = self.request.query_params.get("author", None)
-        if author is not None:
-            queryset = queryset.filter(author=author)
-        return queryset
+        # Default ordering, overridden by the `ordering` filter
+        return Sale.objects.all().order_by("-unit_selling_price", "-id")
 
     """
     CREATE a new Sale
@@ -185,7 +415,126 @@ class SaleListCreateView(generics.ListCreateAPIView):
         return response.Response(data=serializer.data, status=status.HTTP_201_CREATED)
 
 
-class RetrieveUpdateDeleteSaleView(generics.RetrieveDestroyAPIView):
+class SaleBulkCreateView(ReplicaReadMixin, generics.GenericAPIView):
+    """
+    CREATE many Sales at once:
+     - the referenced articles are resolved in a single query,
+     - the errors are reported per item, keyed by the index of the invalid ones,
+     - the sales are inserted in batches, in a single transaction.
+    """
+
+    permissions_classes = (permissions.IsAuthenticated,)
+    serializer_class = SaleBulkCreateDeserializer
+    # Including a reload of the reference data (2 queries)
+    query_budgets = {"POST": 7}
+
+    @extend_schema(
+        request=SaleBulkCreateDeserializer(many=True),
+        responses={201: SaleCreateSerializer(many=True)},
+    )
+    def post(self, request, *args, **kwargs):
+        deserializer = SaleBulkCreateDeserializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=settings.SALES_BULK_CREATE_MAX_ITEMS,
+        )
+        deserializer.is_valid(raise_exception=True)
+        new_sales = Sale.objects.bulk_create_sales(
+            [
+                Sale(**validated_data, author=request.user)
+                for validated_data in deserializer.validated_data
+            ],
+            batch_size=settings.SALES_BULK_CREATE_BATCH_SIZE,
+        )
+        serializer = SaleCreateSerializer(instance=new_sales, many=True)
+        return response.Response(data=serializer.data, status=status.HTTP_201_CREATED)
+
+
+class SaleExportView(ReplicaReadMixin, views.APIView):
+    """
+    GET all the Sales (date, category, article code and name, quantity, unit and
+    total selling prices) as a CSV or NDJSON stream, optionally filtered by date
+    range and author. Rows are read from the database by chunks, so the memory
+    used does not depend on the number of sales.
+    """
+
+    permissions_classes = (permissions.IsAuthenticated,)
+    query_budgets = {"GET": 1}
+
+    @extend_schema(
+        parameters=[SaleExportQueryDeserializer],
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    def get(self, request, *args, **kwargs):
+        deserializer = SaleExportQueryDeserializer(data=request.query_params)
+        deserializer.is_valid(raise_exception=True)
+        params = deserializer.validated_data
+        export_format = params["export_format"]
+
+        # Streamed after the response is finalized: bound to the database now
+        queryset = Sale.objects.using(get_read_database()).in_period(
+            params.get("date_from"), params.get("date_to")
+        )
+        if "author" in params:
+            queryset = queryset.filter(author=params["author"])
+
+        streaming_response = StreamingHttpResponse(
+            export_chunks(queryset, export_format),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        streaming_response["Content-Disposition"] = (
+            f'attachment; filename="sales.{export_format}"'
+        )
+        return streaming_response
+
+
+class SaleColumnarExportView(ReplicaReadMixin, views.APIView):
+    """
+    GET the Sales joined with their article and category (or, with
+    `dataset=articles`, the Articles with their aggregates) as a Parquet file
+    or an Arrow stream, a row group per month of sales (see sales.columnar).
+    Incremental: only the sales above `since_id` are exported, and the
+    X-Sales-Watermark header holds the `since_id` of the next export.
+    """
+
+    permissions_classes = (permissions.IsAuthenticated,)
+    # The watermark, then the rows (streamed)
+    query_budgets = {"GET": 2}
+
+    @extend_schema(
+        parameters=[SaleColumnarExportQueryDeserializer],
+        responses={(200, "application/vnd.apache.parquet"): OpenApiTypes.BINARY},
+    )
+    def get(self, request, *args, **kwargs):
+        deserializer = SaleColumnarExportQueryDeserializer(data=request.query_params)
+        deserializer.is_valid(raise_exception=True)
+        params = deserializer.validated_data
+        export_format = params["export_format"]
+
+        # Streamed after the response is finalized: bound to the database now
+        database = get_read_database()
+        headers = {}
+        if params["dataset"] == "sales":
+            queryset, until_id = sales_since(
+                Sale.objects.using(database), params["since_id"]
+            )
+            chunks = export_sales(queryset, export_format)
+            headers["X-Sales-Watermark"] = str(until_id)
+        else:
+            chunks = export_articles(Article.objects.using(database), export_format)
+
+        streaming_response = StreamingHttpResponse(
+            chunks, content_type=COLUMNAR_FORMATS[export_format], headers=headers
+        )
+        filename = f"{params['dataset']}.{COLUMNAR_EXTENSIONS[export_format]}"
+        streaming_response["Content-Disposition"] = (
+            f'attachment; filename="{filename}"'
+        )
+        return streaming_response
+
+
+class RetrieveUpdateDeleteSaleView(ReplicaReadMixin, generics.RetrieveDestroyAPIView):
     """
     Retrieve (Get) a Sale by sale_id
     """
@@ -193,6 +542,7 @@ class RetrieveUpdateDeleteSaleView(generics.RetrieveDestroyAPIView):
     permissions_classes = (permissions.IsAuthenticated,)
     serializer_class = SaleSerializer
     queryset = Sale.objects.all()
+    query_budgets = {"GET": 1, "PUT": 10, "DELETE": 5}
 
     """
     Update Sale:
@@ -221,3 +571,61 @@ class RetrieveUpdateDeleteSaleView(generics.RetrieveDestroyAPIView):
     #     sale = get_object_or_404(Sale, pk=kwargs["pk"])
     #     sale.delete()
     #     return response.Response("Sale deleted", status=status.HTTP_204_NO_CONTENT)
+
+
+###################################
+# ASYNC READ VIEWS #
+###################################
+# Served instead of the sync views when settings.SALES_ASYNC_VIEWS is set (under
+# ASGI): the GET requests read with the async ORM, the other methods are handled
+# by the sync views in a worker thread.
+
+
+class AsyncCategoryArticleListCreateView(
+    AsyncAPIViewMixin, CategoryArticleListCreateView, AsyncListModelMixin
+):
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+
+class AsyncArticleListCreateView(
+    AsyncAPIViewMixin, ArticleListCreateView, AsyncListModelMixin
+):
+    async def get(self, request, *args, **kwargs):
+        if "ordering" in request.query_params:
+            return await self.alist(request, *args, **kwargs)
+        # The reference data cache may have to be reloaded
+        data = await sync_to_async(self.get_cached_articles)()
+        return response.Response(data)
+
+
+class AsyncArticleListAgregatedView(
+    AsyncAPIViewMixin, ArticleListAgregatedView, AsyncListModelMixin
+):
+    cache_name = "ArticleListAgregatedView"
+
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+
+class AsyncSaleListAgregatedView(
+    AsyncAPIViewMixin, SaleListAgregatedView, AsyncListModelMixin
+):
+    cache_name = "SaleListAgregatedView"
+
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+
+class AsyncSaleListCreateView(
+    AsyncAPIViewMixin, SaleListCreateView, AsyncListModelMixin
+):
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+
+class AsyncRetrieveUpdateDeleteSaleView(
+    AsyncAPIViewMixin, RetrieveUpdateDeleteSaleView, AsyncRetrieveModelMixin
+):
+    async def get(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
@@ -0,0 +1,519 @@
+import asyncio
+import random
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from io import BytesIO
+from statistics import quantiles
+from time import perf_counter
+from types import ModuleType
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.db.models import Max, Min
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import include, path, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from sales.cache import reference_data
+from sales.columnar import pyarrow
+from sales.models import Article, ArticleCategory, ArticleRevenue, Sale
+from sales.seeding import (
+    article_code,
+    populate,
+    seed_articles,
+    seed_categories,
+    seed_users,
+)
+from sales.urls import get_sales_urlpatterns, sales_urlpatterns
+from users.models import User
+
+
+def parse_scale(value):
+    """
+    "10k" -> 10000, "1m" -> 1000000, "2500" -> 2500
+    """
+    value = str(value).strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    if multiplier != 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+def seed_sales(*, sales, seed=0, batch_size=10_000, workers=1):
+    """
+    Seeds a dataset of `sales` sales, with proportional numbers of users,
+    categories and articles. Returns a user to authenticate the requests with.
+    """
+    users = populate(
+        users=max(10, sales // 10_000),
+        categories=max(10, sales // 100_000),
+        articles=min(max(100, sales // 100), 676_000),
+        sales=sales,
+        seed=seed,
+        batch_size=batch_size,
+        workers=workers,
+    )
+    return users[0]
+
+
+def seed_catalog(*, articles, seed=0, batch_size=10_000):
+    """
+    Tops the catalog up to `articles` articles, seeded by chunks of
+    `batch_size` (in proportional numbers of categories, when there is none),
+    without any sale. Returns a user to authenticate the requests with.
+    """
+    user = User.objects.order_by("pk").first() or (
+        seed_users(1, seed=seed, batch_size=batch_size)[0]
+    )
+    categories = list(ArticleCategory.objects.all()) or seed_categories(
+        max(10, articles // 10_000), seed=seed, batch_size=batch_size
+    )
+    existing = Article.objects.count()
+    for start in range(existing, articles, batch_size):
+        seed_articles(
+            min(batch_size, articles - start),
+            categories,
+            seed=seed + start,
+            batch_size=batch_size,
+        )
+    # bulk_create() does not send the signals invalidating the reference data
+    reference_data.invalidate()
+    return user
+
+
+@cache
+def get_sales_urlconf(async_views):
+    """
+    A URLconf serving the sales API (at the same paths as the project one) with
+    the async or the sync read views, whatever settings.SALES_ASYNC_VIEWS.
+    """
+    urlconf = ModuleType(f"sales_{'async' if async_views else 'sync'}_urls")
+    urlconf.urlpatterns = [
+        path(
+            "api/v1/sales/",
+            include((get_sales_urlpatterns(async_views), "sales")),
+        )
+    ]
+    return urlconf
+
+
+def latency_percentiles(timings):
+    if len(timings) == 1:
+        timings = timings * 2
+    cuts = quantiles(timings, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49], 3),
+        "p95_ms": round(cuts[94], 3),
+        "p99_ms": round(cuts[98], 3),
+    }
+
+
+class APIBenchmark:
+    """
+    Requests every route of sales/urls.py through the test client and reports,
+    per endpoint, the latency percentiles (ms), the number of queries and the
+    peak memory allocated (KiB) while handling the request.
+    """
+
+    def __init__(self, user, *, iterations=20, seed=0, cold_cache=False):
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+        self.iterations = iterations
+        self.rng = random.Random(seed)
+        self.cold_cache = cold_cache
+
+    def get_scenarios(self):
+        """
+        (method, path, data) request factories, by route name. Routes missing
+        here are requested with a plain GET, the ones without any factory are
+        skipped (their optional dependency is not installed).
+        """
+        sale_ids = list(Sale.objects.values_list("pk", flat=True)[:1000])
+        article_ids = list(Article.objects.values_list("pk", flat=True)[:100])
+        category_id = ArticleCategory.objects.values_list("pk", flat=True).first()
+
+        def sale_data():
+            return {
+                "article": self.rng.choice(article_ids),
+                "quantity": self.rng.randint(1, 99),
+                "unit_selling_price": "100.00",
+            }
+
+        codes = iter(range(26 * 26 * 1000))
+
+        def article_data():
+            return {
+                "code": article_code(next(codes), marker="Y"),
+                "category": category_id,
+                "name": "Benchmark",
+                "manufacturing_cost": "10.00",
+            }
+
+        def path(name, **kwargs):
+            return reverse(f"sales:{name}", kwargs=kwargs)
+
+        return {
+            "retrieve_update_delete_sales": [
+                lambda: (
+                    "get",
+                    path("retrieve_update_delete_sales", pk=self.rng.choice(sale_ids)),
+                    None,
+                ),
+            ],
+            "sales": [
+                lambda: ("get", path("sales"), {"page": 1}),
+                lambda: ("get", path("sales"), {"page_size": 1000}),
+                lambda: ("get", path("sales"), {"pagination": "cursor"}),
+                lambda: (
+                    "get",
+                    path("sales"),
+                    {"category": category_id, "ordering": "-date"},
+                ),
+                lambda: ("post", path("sales"), sale_data()),
+            ],
+            "sales_bulk": [
+                lambda: ("post", path("sales_bulk"), [sale_data() for _ in range(100)]),
+            ],
+            "sales_export": [
+                lambda: (
+                    "get",
+                    path("sales_export"),
+                    {"date_from": "2021-12-01", "date_to": "2021-12-31"},
+                ),
+            ],
+            "article": [
+                lambda: ("get", path("article"), None),
+                lambda: ("post", path("article"), article_data()),
+            ],
+            "article_bulk": [
+                lambda: (
+                    "post",
+                    path("article_bulk"),
+                    [article_data() for _ in range(100)],
+                ),
+            ],
+            "articles_search": [
+                lambda: ("get", path("articles_search"), {"search": "a"}),
+                lambda: ("get", path("articles_search"), {"search": "AAB0"}),
+            ],
+            "category": [lambda: ("get", path("category"), None)],
+            "sales_export_columnar": (
+                [
+                    lambda: ("get", path("sales_export_columnar"), None),
+                    lambda: (
+                        "get",
+                        path("sales_export_columnar"),
+                        {"dataset": "articles", "export_format": "arrow"},
+                    ),
+                ]
+                if pyarrow is not None
+                else []
+            ),
+            "sales_analytics": [
+                lambda: ("get", path("sales_analytics"), {"period": "month"}),
+                lambda: (
+                    "get",
+                    path("sales_analytics"),
+                    {"period": "week", "group_by": "category"},
+                ),
+                lambda: (
+                    "get",
+                    path("sales_analytics"),
+                    {
+                        "group_by": "article",
+                        "date_from": "2021-12-01",
+                        "date_to": "2021-12-31",
+                    },
+                ),
+            ],
+        }
+
+    def run(self):
+        scenarios = self.get_scenarios()
+        report = {}
+        for pattern in sales_urlpatterns:
+            factories = scenarios.get(pattern.name)
+            if factories is None:
+                factories = [
+                    lambda name=pattern.name: ("get", reverse(f"sales:{name}"), None)
+                ]
+            for factory in factories:
+                method, path, data = factory()
+                key = f"{method.upper()} {path}"
+                if method == "get" and data:
+                    key += "?" + "&".join(f"{k}={v}" for k, v in data.items())
+                report[key] = self.measure(factory)
+        return report
+
+    def measure(self, factory):
+        timings, queries, statuses = [], [], set()
+        for iteration in range(self.iterations + 1):
+            method, path, data = factory()
+            if self.cold_cache:
+                for cache in caches.all():
+                    cache.clear()
+            # The last request is only traced, tracing slows the others down
+            traced = iteration == self.iterations
+            if traced:
+                tracemalloc.start()
+            with CaptureQueriesContext(connection) as context:
+                start = perf_counter()
+                response = getattr(self.client, method)(path, data=data, format="json")
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                elapsed = (perf_counter() - start) * 1000
+            if traced:
+                peak_memory = tracemalloc.get_traced_memory()[1] / 1024
+                tracemalloc.stop()
+            else:
+                timings.append(elapsed)
+                queries.append(len(context.captured_queries))
+            statuses.add(response.status_code)
+        return {
+            "status": sorted(statuses),
+            **latency_percentiles(timings),
+            "queries": max(queries),
+            "peak_memory_kib": round(peak_memory, 1),
+        }
+
+
+class SearchBenchmark(APIBenchmark):
+    """
+    Requests the article search with terms taken from the catalog (code
+    prefixes, name substrings and prefixes, category names, misspelled names)
+    and reports per search, as APIBenchmark, the latency percentiles, query
+    count and peak memory, and the number of matches. On PostgreSQL, also the
+    plan of the search query, which should scan the indexes only.
+    """
+
+    def get_scenarios(self):
+        """
+        Query parameters of the searches, by label
+        """
+        bounds = Article.objects.aggregate(first=Min("pk"), last=Max("pk"))
+        articles = list(
+            Article.objects.filter(
+                pk__in=[
+                    self.rng.randint(bounds["first"], bounds["last"])
+                    for _ in range(self.iterations + 1)
+                ]
+            )
+        )
+        category = ArticleCategory.objects.order_by("pk").first()
+
+        def term(get_term):
+            # Another article for every request
+            articles_iterator = iter(articles * 2)
+            return lambda: get_term(next(articles_iterator))
+
+        def misspell(name):
+            return name[:1] + name[2:] if len(name) > 4 else name
+
+        return {
+            "code_prefix": term(lambda article: {"search": article.code[:4]}),
+            "name_substring": term(lambda article: {"search": article.name[1:5]}),
+            "name_prefix": term(lambda article: {"search": article.name[:2]}),
+            "category": lambda: {"search": category.display_name.split()[0]},
+            "fuzzy": term(
+                lambda article: {"search": misspell(article.name), "fuzzy": True}
+            ),
+            "last_page": term(
+                lambda article: {"search": article.name[:2], "page": "last"}
+            ),
+            "no_match": lambda: {"search": "zzzzzz"},
+        }
+
+    def run(self):
+        path = reverse("sales:articles_search")
+        report = {}
+        for label, get_params in self.get_scenarios().items():
+            report[label] = self.measure(lambda: ("get", path, get_params()))
+            params = get_params()
+            report[label]["count"] = Article.objects.search(
+                params["search"], fuzzy=params.get("fuzzy", False)
+            ).count()
+            if connection.vendor == "postgresql":
+                report[label]["plan"] = (
+                    Article.objects.search(
+                        params["search"], fuzzy=params.get("fuzzy", False)
+                    )
+                    .explain()
+                    .splitlines()
+                )
+        return report
+
+
+class ConcurrencyBenchmark:
+    """
+    Replays the same mixed read load (sales pages, sale details, revenue
+    reports, categories and articles) from `concurrency` simultaneous clients,
+    against the same database, on:
+     - "wsgi": the WSGI handler, with `threads` worker threads,
+     - "asgi_sync": the ASGI handler, with the sync views,
+     - "asgi_async": the ASGI handler, with the async views,
+    and reports per server the throughput (requests/s) and the latency
+    percentiles (ms). The requests are sent to the handlers in-process, with
+    token authentication, and every server starts with empty caches.
+    """
+
+    servers = ("wsgi", "asgi_sync", "asgi_async")
+
+    def __init__(self, user, *, concurrency=16, requests=200, threads=4, seed=0):
+        self.token = Token.objects.get_or_create(user=user)[0].key
+        self.concurrency = concurrency
+        self.requests = requests
+        self.threads = threads
+        self.rng = random.Random(seed)
+
+    def get_requests(self):
+        """
+        (path, query string) of the requests of the load
+        """
+        sale_ids = list(Sale.objects.values_list("pk", flat=True)[:1000])
+        sale_pages = max(1, min(10, Sale.objects.count() // 25))
+        revenue_pages = max(1, ArticleRevenue.objects.count() // 25)
+        scenarios = [
+            lambda: ("sales", {}, {"page": self.rng.randint(1, sale_pages)}),
+            lambda: ("sales", {}, {"pagination": "cursor"}),
+            lambda: (
+                "retrieve_update_delete_sales",
+                {"pk": self.rng.choice(sale_ids)},
+                {},
+            ),
+            lambda: (
+                "sales_revenues",
+                {},
+                {"page": self.rng.randint(1, revenue_pages)},
+            ),
+            lambda: (
+                "articles_revenues",
+                {},
+                {"page": self.rng.randint(1, revenue_pages)},
+            ),
+            lambda: ("category", {}, {}),
+            lambda: ("article", {}, {}),
+        ]
+        requests = []
+        for number in range(self.requests):
+            name, kwargs, params = scenarios[number % len(scenarios)]()
+            requests.append(
+                (reverse(f"sales:{name}", kwargs=kwargs), urlencode(params))
+            )
+        return requests
+
+    def run(self):
+        requests = self.get_requests()
+        report = {}
+        for server in self.servers:
+            urlconf = get_sales_urlconf(async_views=server == "asgi_async")
+            for cache_backend in caches.all():
+                cache_backend.clear()
+            with override_settings(ROOT_URLCONF=urlconf):
+                report[server] = asyncio.run(self.measure(server, requests))
+        return report
+
+    async def measure(self, server, requests):
+        if server == "wsgi":
+            handler = WSGIHandler()
+            executor = ThreadPoolExecutor(max_workers=self.threads)
+            loop = asyncio.get_running_loop()
+
+            def send(path, query):
+                return loop.run_in_executor(
+                    executor, self.wsgi_request, handler, path, query
+                )
+
+        else:
+            handler = ASGIHandler()
+
+            def send(path, query):
+                return self.asgi_request(handler, path, query)
+
+        pending = iter(requests)
+        timings, statuses = [], set()
+
+        async def client():
+            # Every client sends the next pending request once answered
+            for path, query in pending:
+                start = perf_counter()
+                statuses.add(await send(path, query))
+                timings.append((perf_counter() - start) * 1000)
+
+        start = perf_counter()
+        try:
+            await asyncio.gather(*(client() for _ in range(self.concurrency)))
+        finally:
+            if server == "wsgi":
+                executor.shutdown()
+        elapsed = perf_counter() - start
+        return {
+            "status": sorted(statuses),
+            "requests_per_s": round(len(requests) / elapsed, 1),
+            **latency_percentiles(timings),
+        }
+
+    def wsgi_request(self, handler, path, query):
+        statuses = []
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "SCRIPT_NAME": "",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": "testserver",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": "testserver",
+            "HTTP_AUTHORIZATION": f"Token {self.token}",
+            "wsgi.input": BytesIO(),
+            "wsgi.url_scheme": "http",
+        }
+        response = handler(
+            environ,
+            lambda status, headers, exc_info=None: statuses.append(int(status[:3])),
+        )
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return statuses[0]
+
+    async def asgi_request(self, application, path, query):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"authorization", f"Token {self.token}".encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+        statuses = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # The client never disconnects: wait for the handler to stop listening
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        await application(scope, receive, send)
+        return statuses[0]
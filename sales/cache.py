@@ -0,0 +1,317 @@
+import hashlib
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import router, transaction
+from rest_framework import response
+
+from utils.cache import VersionStamp
+from utils.routers import get_read_database
+
+
+class VersionedResponseCache(VersionStamp):
+    """
+    Caches API responses data under a version stamp shared by all the workers
+    (through the cache backend). Bumping the version invalidates every entry at
+    once: the stale ones are never read again and simply expire.
+    """
+
+    def get_key(self, name, request, params):
+        query = "&".join(
+            f"{param}={request.query_params.get(param, '')}" for param in params
+        )
+        digest = hashlib.md5(
+            f"{request.build_absolute_uri(request.path)}?{query}".encode()
+        ).hexdigest()
+        return f"{self.prefix}:{name}:{self.get_version()}:{digest}"
+
+    def get(self, key):
+        data = self.cache.get(key)
+        self._count("hits" if data is not None else "misses")
+        return data
+
+    def set(self, key, data):
+        self.cache.set(key, data)
+
+    def stats(self):
+        counters = self.cache.get_many([f"{self.prefix}:hits", f"{self.prefix}:misses"])
+        hits = counters.get(f"{self.prefix}:hits", 0)
+        misses = counters.get(f"{self.prefix}:misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else None,
+        }
+
+    def _count(self, counter):
+        key = f"{self.prefix}:{counter}"
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            if not self.cache.add(key, 1, timeout=None):
+                self.cache.incr(key)
+
+
+class ReferenceData:
+    """
+    Article categories and articles, by id (and by code for the articles). The
+    articles hold their category, so that reading it makes no query.
+    """
+
+    def __init__(self, categories, articles):
+        self.categories = {category.pk: category for category in categories}
+        self.articles = {}
+        self.articles_by_code = {}
+        for article in articles:
+            article.category = self.categories[article.category_id]
+            self.articles[article.pk] = article
+            self.articles_by_code[article.code] = article
+        self.serialized = {}
+
+
+class ReferenceDataCache(VersionStamp):
+    """
+    In-process copy of the (small and rarely written) article categories and
+    articles tables, loaded at once and kept as long as the shared version
+    stamp does not change: any write of these tables bumps it (see
+    sales.signals), so that every worker reloads them on its next read.
+
+    The cached instances are shared: they must not be modified.
+    """
+
+    def __init__(self, prefix, alias=None):
+        super().__init__(prefix, alias)
+        self._data = None
+        self._data_version = None
+        self._lock = threading.Lock()
+
+    def get_data(self):
+        version = self.get_version()
+        data = self._data
+        if data is None or self._data_version != version:
+            with self._lock:
+                if self._data is None or self._data_version != version:
+                    self._data = self.load()
+                    self._data_version = version
+                data = self._data
+        return data
+
+    def load(self):
+        from sales.models import Article, ArticleCategory
+
+        # From the primary: a replica may lag behind the write which bumped the
+        # version, and its rows would be kept until the next one
+        using = router.db_for_write(Article)
+        return ReferenceData(
+            ArticleCategory.objects.using(using), Article.objects.using(using)
+        )
+
+    def invalidate(self):
+        """
+        Drops the reference data of every worker, now and once the current
+        transaction is committed (a worker may reload it in between).
+        """
+        self._data = None
+        self.bump_version()
+        self.bump_version_on_commit()
+
+    def get_category(self, pk):
+        return self.get_data().categories.get(pk)
+
+    def get_article(self, pk):
+        return self.get_data().articles.get(pk)
+
+    def get_article_by_code(self, code):
+        return self.get_data().articles_by_code.get(code)
+
+    def get_serialized(self, name, serialize):
+        """
+        `serialize(data)`, computed once per version of the reference data
+        """
+        data = self.get_data()
+        if name not in data.serialized:
+            data.serialized[name] = serialize(data)
+        return data.serialized[name]
+
+
+class Leaderboard(VersionStamp):
+    """
+    The settings.SALES_LEADERBOARD_SIZE articles with the highest revenue,
+    overall and per category, kept in the shared cache and updated after each
+    sale write with the new revenues of the articles written (see
+    sales.signals): reading it is a single cache lookup, whatever the number
+    of sales. A missing (or expired) board is rebuilt from the ArticleRevenue
+    rollup.
+
+    Each board is stored with a `floor`: the articles left out have a revenue
+    lower than or equal to it. When the revenue of a listed article falls
+    under the floor it is left out too, and a board shrunk below the requested
+    size is rebuilt.
+
+    The updates and rebuilds of all the boards are serialized by a lock in the
+    shared cache. A write which cannot take it bumps the version instead: the
+    concurrent update or rebuild is then stored under the previous version,
+    and never read.
+    """
+
+    lock_timeout = 10
+
+    @property
+    def lock_key(self):
+        return f"{self.prefix}:lock"
+
+    def get_key(self, category_id, version):
+        scope = "all" if category_id is None else f"category:{category_id}"
+        return f"{self.prefix}:{version}:{scope}"
+
+    def get(self, size, category_id=None):
+        """
+        [(article_id, business_revenue)] of the `size` first articles (at most
+        settings.SALES_LEADERBOARD_SIZE) of the category if given, else overall.
+        """
+        board = self.cache.get(self.get_key(category_id, self.get_version()))
+        if board is None or (len(board["entries"]) < size and board["floor"] > 0):
+            board = self.rebuild(category_id)
+        return board["entries"][:size]
+
+    def get_revenues(self):
+        from sales.models import ArticleRevenue
+
+        # From the primary: a replica may lag behind the sales merged already
+        return ArticleRevenue.objects.db_manager(router.db_for_write(ArticleRevenue))
+
+    def rebuild(self, category_id=None):
+        locked = self.cache.add(self.lock_key, True, timeout=self.lock_timeout)
+        try:
+            # Read once locked, so that a sale written meanwhile bumps it
+            version = self.get_version()
+            board = self.build(
+                self.get_revenues().top(
+                    settings.SALES_LEADERBOARD_SIZE, category_id=category_id
+                )
+            )
+            if locked:
+                self.cache.set(self.get_key(category_id, version), board)
+        finally:
+            if locked:
+                self.cache.delete(self.lock_key)
+        return board
+
+    def build(self, entries):
+        floor = 0
+        if len(entries) >= settings.SALES_LEADERBOARD_SIZE:
+            floor = entries[-1][1]
+        return {"entries": entries, "floor": floor}
+
+    def update(self, article_ids):
+        """
+        Merges the revenues of `article_ids` into the boards (overall and of
+        the articles categories) currently cached. The revenues are read once
+        locked: a revenue read before could be older than the one another
+        update merged meanwhile.
+        """
+        if not self.cache.add(self.lock_key, True, timeout=self.lock_timeout):
+            self.bump_version()
+            return
+        try:
+            version = self.get_version()
+            revenues = dict(
+                self.get_revenues()
+                .filter(article_id__in=article_ids)
+                .values_list("article_id", "business_revenue")
+            )
+            scopes = {None: revenues}
+            articles = reference_data.get_data().articles
+            for article_id, revenue in revenues.items():
+                article = articles.get(article_id)
+                if article is not None:
+                    scopes.setdefault(article.category_id, {})[article_id] = revenue
+            keys = {
+                self.get_key(category_id, version): scope_revenues
+                for category_id, scope_revenues in scopes.items()
+            }
+            boards = self.cache.get_many(keys)
+            self.cache.set_many(
+                {key: self.merge(board, keys[key]) for key, board in boards.items()}
+            )
+        finally:
+            self.cache.delete(self.lock_key)
+
+    def merge(self, board, revenues):
+        floor = board["floor"]
+        entries = [entry for entry in board["entries"] if entry[0] not in revenues]
+        entries.extend(
+            (article_id, revenue)
+            for article_id, revenue in revenues.items()
+            if revenue > floor
+        )
+        entries.sort(key=lambda entry: (-entry[1], entry[0]))
+        size = settings.SALES_LEADERBOARD_SIZE
+        if len(entries) > size:
+            floor = entries[size][1]
+            del entries[size:]
+        return {"entries": entries, "floor": floor}
+
+    def update_on_commit(self, article_ids):
+        """
+        Updates the boards with the revenues of `article_ids` once the current
+        transaction is committed.
+        """
+        transaction.on_commit(lambda: self.update(article_ids))
+
+    def invalidate(self):
+        """
+        Drops all the boards, e.g. when articles change category.
+        """
+        self.bump_version()
+        self.bump_version_on_commit()
+
+
+aggregates_cache = VersionedResponseCache("sales:aggregates")
+reference_data = ReferenceDataCache("sales:reference")
+leaderboard = Leaderboard("sales:leaderboard")
+
+
+class CachedListMixin:
+    """
+    Serves the list responses of a view from `response_cache`, keyed by the
+    view `cache_name` and the `cache_query_params` of the request.
+
+    A response read from a replica less than settings.DATABASE_REPLICA_STICKINESS
+    seconds after a bump of the version may predate it (replication lag): it
+    is not cached.
+    """
+
+    response_cache = aggregates_cache
+    cache_name = None
+    cache_query_params = ("page", "page_size", "ordering")
+
+    def list(self, request, *args, **kwargs):
+        key, data = self.get_cached_data(request)
+        if data is not None:
+            return response.Response(data)
+        list_response = super().list(request, *args, **kwargs)
+        self.set_cached_data(key, list_response.data)
+        return list_response
+
+    async def alist(self, request, *args, **kwargs):
+        # The cache backends are sync (and may be remote)
+        key, data = await sync_to_async(self.get_cached_data)(request)
+        if data is not None:
+            return response.Response(data)
+        list_response = await super().alist(request, *args, **kwargs)
+        await sync_to_async(self.set_cached_data)(key, list_response.data)
+        return list_response
+
+    def get_cached_data(self, request):
+        key = self.response_cache.get_key(
+            self.cache_name or self.__class__.__name__,
+            request,
+            self.cache_query_params,
+        )
+        return key, self.response_cache.get(key)
+
+    def set_cached_data(self, key, data):
+        if get_read_database() is None or not self.response_cache.bumped_recently():
+            self.response_cache.set(key, data)
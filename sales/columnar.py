@@ -0,0 +1,302 @@
+"""
+Columnar exports of the sales (joined with their article and category) and of
+the per-article aggregates, as Parquet files or Arrow IPC streams, for the
+analytics notebooks: the columns are typed (prices as decimals, dates as
+dates), so nothing is parsed again on loading.
+
+The rows are read from the database by chunks and written by batches, a batch
+holding the sales of a single month: every Parquet row group (or Arrow record
+batch) covers one month at most, which the readers can skip on date filters.
+
+The sales are exported incrementally: every export covers the sales added
+since the last exported id (the watermark) up to the last id at the start of
+the export. The ids are assigned on insert, not on commit: a transaction still
+in progress may hold ids below the watermark, which the next export would
+skip. So the export waits for the transactions in progress to end first (see
+sales_since()). Updated or deleted sales are not exported again.
+
+Optional: needs pyarrow.
+"""
+
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Max
+
+from sales.models import Article, Sale
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # Optional: no columnar exports
+    pyarrow = None
+
+COLUMNAR_FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+COLUMNAR_EXTENSIONS = {"parquet": "parquet", "arrow": "arrows"}
+
+# Rows per batch at most (a month of sales may span several)
+COLUMNAR_BATCH_SIZE = 100_000
+
+
+def sale_schema():
+    price = Sale._meta.get_field("unit_selling_price")
+    return pyarrow.schema(
+        [
+            pyarrow.field("id", pyarrow.int64(), nullable=False),
+            pyarrow.field("date", pyarrow.date32(), nullable=False),
+            pyarrow.field("author_id", pyarrow.int64(), nullable=False),
+            pyarrow.field("article_id", pyarrow.int64(), nullable=False),
+            pyarrow.field("article_code", pyarrow.string(), nullable=False),
+            pyarrow.field("article_name", pyarrow.string(), nullable=False),
+            pyarrow.field("category", pyarrow.string(), nullable=False),
+            pyarrow.field("quantity", pyarrow.int64(), nullable=False),
+            pyarrow.field(
+                "unit_selling_price",
+                pyarrow.decimal128(price.max_digits, price.decimal_places),
+                nullable=False,
+            ),
+            pyarrow.field(
+                "total_selling_price",
+                pyarrow.decimal128(20, price.decimal_places),
+                nullable=False,
+            ),
+        ]
+    )
+
+
+def article_schema():
+    cost = Article._meta.get_field("manufacturing_cost")
+    return pyarrow.schema(
+        [
+            pyarrow.field("id", pyarrow.int64(), nullable=False),
+            pyarrow.field("code", pyarrow.string(), nullable=False),
+            pyarrow.field("name", pyarrow.string(), nullable=False),
+            pyarrow.field("category", pyarrow.string(), nullable=False),
+            pyarrow.field(
+                "manufacturing_cost",
+                pyarrow.decimal128(cost.max_digits, cost.decimal_places),
+                nullable=False,
+            ),
+            pyarrow.field(
+                "business_revenue", pyarrow.decimal128(20, 2), nullable=False
+            ),
+            pyarrow.field("total_quantity", pyarrow.int64(), nullable=False),
+            pyarrow.field("sale_count", pyarrow.int64(), nullable=False),
+            pyarrow.field("last_sale_date", pyarrow.date32()),
+        ]
+    )
+
+
+def wait_for_transactions(using, timeout):
+    """
+    Waits for the transactions in progress on the `using` database to end, for
+    `timeout` seconds at most. Returns whether they all ended.
+
+    PostgreSQL only: on a replica, the transactions whose commit is not
+    replayed yet are in progress too. Elsewhere there is nothing to wait for:
+    SQLite runs one write transaction at a time, whose ids are all above the
+    committed ones.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return True
+    deadline = time.monotonic() + timeout
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_snapshot_xip(pg_current_snapshot())::text")
+        xids = [xid for (xid,) in cursor.fetchall()]
+        while xids:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+            cursor.execute(
+                "SELECT xid FROM unnest(%s::text[]) AS xid "
+                "WHERE pg_xact_status(xid::xid8) = 'in progress'",
+                [xids],
+            )
+            xids = [xid for (xid,) in cursor.fetchall()]
+    return True
+
+
+def sales_since(queryset, since_id=0, *, timeout=None):
+    """
+    (the sales of `queryset` with an id above `since_id` and up to the last id
+    at the time of the call, that last id): the watermark of the next export.
+
+    Once the last id read, waits for the transactions then in progress (which
+    may have written lower ids) to end, for settings.SALES_EXPORT_WRITES_TIMEOUT
+    seconds at most (`timeout`). If they do not, no sale is exported and the
+    watermark stays at `since_id`, so that none is skipped.
+    """
+    if timeout is None:
+        timeout = settings.SALES_EXPORT_WRITES_TIMEOUT
+    last_id = queryset.aggregate(last_id=Max("pk"))["last_id"] or 0
+    until_id = max(since_id, last_id)
+    if until_id > since_id and not wait_for_transactions(queryset.db, timeout):
+        until_id = since_id
+    return queryset.filter(pk__gt=since_id, pk__lte=until_id), until_id
+
+
+def sale_rows(queryset, *, chunk_size=COLUMNAR_BATCH_SIZE):
+    """
+    Yields the rows (in sale_schema() order) of the given sales by date then
+    id, read through a server-side cursor (on PostgreSQL) by chunks of
+    `chunk_size`, without instantiating any model.
+    """
+    rows = (
+        queryset.order_by("date", "pk")
+        .values_list(
+            "pk",
+            "date",
+            "author_id",
+            "article_id",
+            "article__code",
+            "article__name",
+            "article__category__display_name",
+            "quantity",
+            "unit_selling_price",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in rows:
+        yield (*row, row[-1] * row[-2])
+
+
+def article_rows(queryset, *, chunk_size=COLUMNAR_BATCH_SIZE):
+    """
+    Yields the rows (in article_schema() order) of the given articles with
+    their revenue rollup (zero for the articles never sold), by id.
+    """
+    rows = (
+        queryset.order_by("pk")
+        .values_list(
+            "pk",
+            "code",
+            "name",
+            "category__display_name",
+            "manufacturing_cost",
+            "revenue__business_revenue",
+            "revenue__total_quantity",
+            "revenue__sale_count",
+            "revenue__last_sale_date",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for *article, revenue, quantity, count, last_sale_date in rows:
+        yield (*article, revenue or 0, quantity or 0, count or 0, last_sale_date)
+
+
+def sale_month(row):
+    return row[1].year, row[1].month
+
+
+def chunk_rows(rows, *, size=COLUMNAR_BATCH_SIZE, key=None):
+    """
+    Yields lists of at most `size` consecutive `rows`, a new list starting
+    whenever `key(row)` changes (e.g. the month of the sales).
+    """
+    chunk, chunk_key = [], None
+    for row in rows:
+        row_key = key(row) if key is not None else None
+        if chunk and (row_key != chunk_key or len(chunk) >= size):
+            yield chunk
+            chunk = []
+        chunk_key = row_key
+        chunk.append(row)
+    if chunk:
+        yield chunk
+
+
+def to_batch(rows, schema):
+    columns = zip(*rows)
+    return pyarrow.RecordBatch.from_arrays(
+        [
+            pyarrow.array(column, type=field.type)
+            for column, field in zip(columns, schema)
+        ],
+        schema=schema,
+    )
+
+
+class ChunkSink:
+    """
+    Write-only file object, handing over what was written since the last
+    pop(): lets the writers stream their output.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def pop(self):
+        content = b"".join(self.chunks)
+        self.chunks.clear()
+        return content
+
+
+def columnar_chunks(chunks, schema, export_format):
+    """
+    Yields the Parquet file or Arrow stream of the row `chunks` by bytes
+    chunks, one per row group (or record batch).
+    """
+    sink = ChunkSink()
+    if export_format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+    try:
+        for rows in chunks:
+            batch = to_batch(rows, schema)
+            if export_format == "parquet":
+                # A row group per chunk: a month of sales at most
+                writer.write_table(
+                    pyarrow.Table.from_batches([batch]), row_group_size=len(rows)
+                )
+            else:
+                writer.write_batch(batch)
+            yield sink.pop()
+    finally:
+        writer.close()
+    yield sink.pop()
+
+
+def export_sales(queryset, export_format, *, batch_size=COLUMNAR_BATCH_SIZE):
+    return columnar_chunks(
+        chunk_rows(
+            sale_rows(queryset, chunk_size=batch_size), size=batch_size, key=sale_month
+        ),
+        sale_schema(),
+        export_format,
+    )
+
+
+def export_articles(queryset, export_format, *, batch_size=COLUMNAR_BATCH_SIZE):
+    return columnar_chunks(
+        chunk_rows(article_rows(queryset, chunk_size=batch_size), size=batch_size),
+        article_schema(),
+        export_format,
+    )
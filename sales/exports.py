@@ -0,0 +1,88 @@
+import csv
+import json
+from io import StringIO
+
+EXPORT_COLUMNS = (
+    "date",
+    "category",
+    "article_code",
+    "article_name",
+    "quantity",
+    "unit_selling_price",
+    "total_selling_price",
+)
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def export_rows(queryset, *, chunk_size=2000):
+    """
+    Yields the export rows of the given sales, read through a server-side
+    cursor (on PostgreSQL) by chunks of `chunk_size`, without instantiating
+    any model. Prices are kept as Decimal.
+    """
+    rows = (
+        queryset.order_by("pk")
+        .values_list(
+            "date",
+            "article__category__display_name",
+            "article__code",
+            "article__name",
+            "quantity",
+            "unit_selling_price",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for date, category, code, name, quantity, unit_selling_price in rows:
+        yield (
+            date.isoformat(),
+            category,
+            code,
+            name,
+            quantity,
+            unit_selling_price,
+            unit_selling_price * quantity,
+        )
+
+
+def csv_chunks(rows, *, chunk_size=2000):
+    """
+    Yields the CSV export (header included) by chunks of `chunk_size` lines.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for index, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if index % chunk_size == 0:
+            yield _flush(buffer)
+    yield _flush(buffer)
+
+
+def ndjson_chunks(rows, *, chunk_size=2000):
+    """
+    Yields the NDJSON export by chunks of `chunk_size` lines. Decimals are
+    written as strings, like in the API responses.
+    """
+    buffer = StringIO()
+    for index, row in enumerate(rows, start=1):
+        buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str))
+        buffer.write("\n")
+        if index % chunk_size == 0:
+            yield _flush(buffer)
+    yield _flush(buffer)
+
+
+def export_chunks(queryset, export_format, *, chunk_size=2000):
+    chunks = csv_chunks if export_format == "csv" else ndjson_chunks
+    return chunks(export_rows(queryset, chunk_size=chunk_size), chunk_size=chunk_size)
+
+
+def _flush(buffer):
+    content = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return content
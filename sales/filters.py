@@ -0,0 +1,62 @@
+from django_filters import rest_framework as filters
+from django_filters.constants import EMPTY_VALUES
+
+from sales.models import Sale
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """
+    Comma separated values, e.g. ?author=1,2 (no query to validate them)
+    """
+
+
+class TiebreakOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter appending the pk, in the direction of the last ordering
+    field: a total order, which the pagination needs and the indexes end with.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        ordering = [self.get_ordering_value(param) for param in value]
+        if not {field.lstrip("-") for field in ordering} & {"id", "pk"}:
+            ordering.append("-id" if ordering[-1].startswith("-") else "id")
+        return qs.order_by(*ordering)
+
+
+class SaleFilterSet(filters.FilterSet):
+    """
+    Filters of the sales list, each served by an index of Sale.Meta.indexes:
+     - author (with the price ordering): sales_sale_author_price_idx,
+     - article and category (joined with its articles):
+       sales_sale_article_date_idx,
+     - date range (with the date ordering): sales_sale_date_idx,
+     - price range (with the price ordering): sales_sale_price_idx.
+    """
+
+    author = NumberInFilter(field_name="author", help_text="Author ids, e.g. 1,2")
+    article = NumberInFilter(field_name="article", help_text="Article ids, e.g. 1,2")
+    category = NumberInFilter(
+        method="filter_category", help_text="Article category ids, e.g. 1,2"
+    )
+    date_from = filters.DateFilter(field_name="date", lookup_expr="gte")
+    date_to = filters.DateFilter(field_name="date", lookup_expr="lte")
+    price_min = filters.NumberFilter(field_name="unit_selling_price", lookup_expr="gte")
+    price_max = filters.NumberFilter(field_name="unit_selling_price", lookup_expr="lte")
+    ordering = TiebreakOrderingFilter(
+        fields=(
+            ("unit_selling_price", "unit_selling_price"),
+            ("date", "date"),
+            ("id", "id"),
+        )
+    )
+
+    class Meta:
+        model = Sale
+        fields = []
+
+    def filter_category(self, queryset, name, value):
+        # Joined with the articles: the article category index finds them, then
+        # the article index serves their sales
+        return queryset.filter(article__category__in=value)
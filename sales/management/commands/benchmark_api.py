@@ -0,0 +1,133 @@
+import json
+import platform
+import subprocess
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from sales.benchmarks import (
+    APIBenchmark,
+    ConcurrencyBenchmark,
+    parse_scale,
+    seed_sales,
+)
+from sales.models import Sale
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every sales API endpoint on a seeded test database, and report "
+        "latency percentiles, query counts and peak memory as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            action="append",
+            dest="scales",
+            help="Number of sales to seed, e.g. 10k, 1m, 10m (can be repeated).",
+        )
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--cold-cache",
+            action="store_true",
+            help="Clear the caches before every request.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            help=(
+                "Also replay a mixed read load from this number of concurrent "
+                "clients on the WSGI and ASGI handlers (sync and async views)."
+            ),
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=4,
+            help="Worker threads of the WSGI handler under concurrent load.",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep (and reuse) the seeded test database between runs.",
+        )
+        parser.add_argument(
+            "--output", help="JSON report file (standard output if unset)."
+        )
+
+    def handle(self, *args, **options):
+        scales = [parse_scale(scale) for scale in options["scales"] or ["10k"]]
+        report = {"metadata": self.get_metadata(options), "scales": {}}
+        if options["concurrency"]:
+            report["concurrency"] = {}
+
+        setup_test_environment()
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=options["keepdb"]
+        )
+        try:
+            for scale in scales:
+                user = self.seed(scale, options["seed"])
+                benchmark = APIBenchmark(
+                    user,
+                    iterations=options["iterations"],
+                    seed=options["seed"],
+                    cold_cache=options["cold_cache"],
+                )
+                report["scales"][str(scale)] = benchmark.run()
+                if options["concurrency"]:
+                    report["concurrency"][str(scale)] = ConcurrencyBenchmark(
+                        user,
+                        concurrency=options["concurrency"],
+                        requests=options["iterations"] * options["concurrency"],
+                        threads=options["threads"],
+                        seed=options["seed"],
+                    ).run()
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+    def seed(self, scale, seed):
+        """
+        Tops the test database up to `scale` sales (a kept database already
+        holding at least that many is reused as is).
+        """
+        existing = Sale.objects.count()
+        if existing < scale:
+            self.stderr.write(f"Seeding {scale - existing} sales...")
+            return seed_sales(sales=scale - existing, seed=seed + existing)
+        return User.objects.order_by("pk").first()
+
+    def get_metadata(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "HEAD"], capture_output=True, text=True
+            ).stdout.strip()
+        except OSError:
+            commit = None
+        return {
+            "commit": commit or None,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "iterations": options["iterations"],
+            "seed": options["seed"],
+            "cold_cache": options["cold_cache"],
+            "concurrency": options["concurrency"],
+            "threads": options["threads"],
+        }
@@ -0,0 +1,84 @@
+import json
+from io import BytesIO
+from time import process_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import compress_string
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from sales.models import Article, Sale
+from sales.serializers import ArticleSerializer, SaleSerializer
+from utils.middleware import CompressionMiddleware, brotli
+from utils.parsers import FastJSONParser
+from utils.renderers import FastJSONRenderer
+from utils.serializers import compile_serializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the bytes and CPU time per page of the DRF and orjson JSON "
+        "renderers and parsers, and of the response compressions (on the current "
+        "database content)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, rows, repeat, **options):
+        pages = {
+            "sales": (
+                SaleSerializer,
+                Sale.objects.order_by("-unit_selling_price", "-id")[:rows],
+            ),
+            "articles": (
+                ArticleSerializer,
+                Article.objects.order_by("category")[:rows],
+            ),
+        }
+        results = {}
+        for name, (serializer_class, queryset) in pages.items():
+            compiled = compile_serializer(serializer_class)
+            results[name] = self.benchmark_page(
+                name,
+                {"results": compiled.convert_many(queryset.values(*compiled.lookups))},
+                repeat,
+            )
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def benchmark_page(self, name, data, repeat):
+        content = JSONRenderer().render(data)
+        if FastJSONRenderer().render(data) != content:
+            raise CommandError(f"The orjson rendering of the {name} page differs.")
+        result = {"rows": len(data["results"]), "bytes": len(content)}
+        for variant, renderer, parser in (
+            ("drf", JSONRenderer(), JSONParser()),
+            ("orjson", FastJSONRenderer(), FastJSONParser()),
+        ):
+            result[variant] = {
+                "render_cpu_ms": self.time(lambda: renderer.render(data), repeat),
+                "parse_cpu_ms": self.time(
+                    lambda: parser.parse(BytesIO(content)), repeat
+                ),
+            }
+        compressions = {"gzip": compress_string}
+        if brotli is not None:
+            compressions["br"] = lambda content: brotli.compress(
+                content, quality=CompressionMiddleware.brotli_quality
+            )
+        for encoding, compress in compressions.items():
+            result[encoding] = {
+                "bytes": len(compress(content)),
+                "cpu_ms": self.time(lambda: compress(content), repeat),
+            }
+        return result
+
+    def time(self, function, repeat):
+        """Best CPU time of `repeat` runs, in milliseconds"""
+        timings = []
+        for _ in range(repeat):
+            start = process_time()
+            function()
+            timings.append(process_time() - start)
+        return round(min(timings) * 1000, 3)
@@ -0,0 +1,74 @@
+import json
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+
+from sales.models import Article
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the grouped aggregation of the article revenue report with the "
+        "correlated subquery version (on the current database content)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=25,
+            help="Size of the first page, also measured.",
+        )
+
+    def handle(self, *args, repeat, page_size, **options):
+        variants = {
+            # Revenue, quantity, sale count, last sale date, margin and category
+            "grouped": Article.objects.with_revenues(),
+            # Revenue only
+            "subquery": Article.objects.with_revenues_subquery().order_by(
+                F("business_revenue").desc(nulls_last=True), "pk"
+            ),
+        }
+        revenues = {
+            name: [
+                (article.pk, article.business_revenue or 0)
+                for article in queryset.all()
+            ]
+            for name, queryset in variants.items()
+        }
+        if revenues["grouped"] != revenues["subquery"]:
+            raise CommandError("The grouped revenues differ from the subquery ones.")
+
+        results = {}
+        for name, queryset in variants.items():
+            results[name] = {
+                "rows": len(revenues[name]),
+                "full_ms": self.time(lambda: list(queryset.all()), repeat),
+                "first_page_ms": self.time(
+                    lambda: list(queryset.all()[:page_size]), repeat
+                ),
+                "queries": self.count_queries(lambda: list(queryset.all())),
+            }
+        results["speedup"] = round(
+            results["subquery"]["full_ms"] / max(results["grouped"]["full_ms"], 1e-6),
+            2,
+        )
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def time(self, function, repeat):
+        """Best time of `repeat` runs, in milliseconds (queries included)"""
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            function()
+            timings.append(perf_counter() - start)
+        return round(min(timings) * 1000, 3)
+
+    def count_queries(self, function):
+        with CaptureQueriesContext(connection) as context:
+            function()
+        return len(context.captured_queries)
@@ -0,0 +1,71 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from sales.benchmarks import SearchBenchmark, parse_scale, seed_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the article search on a test database seeded with catalogs of "
+        "articles, and report latency percentiles, query counts, match counts "
+        "(and query plans on PostgreSQL) as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            action="append",
+            dest="scales",
+            help="Number of articles to seed, e.g. 100k, 1m (can be repeated).",
+        )
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep (and reuse) the seeded test database between runs.",
+        )
+        parser.add_argument(
+            "--output", help="JSON report file (standard output if unset)."
+        )
+
+    def handle(self, *args, **options):
+        scales = [parse_scale(scale) for scale in options["scales"] or ["1m"]]
+        report = {
+            "metadata": {
+                "database": connection.vendor,
+                "iterations": options["iterations"],
+                "seed": options["seed"],
+            },
+            "scales": {},
+        }
+
+        setup_test_environment()
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=options["keepdb"]
+        )
+        try:
+            for scale in sorted(scales):
+                self.stderr.write(f"Seeding up to {scale} articles...")
+                user = seed_catalog(articles=scale, seed=options["seed"])
+                report["scales"][str(scale)] = SearchBenchmark(
+                    user, iterations=options["iterations"], seed=options["seed"]
+                ).run()
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
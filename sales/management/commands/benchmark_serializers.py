@@ -0,0 +1,67 @@
+import json
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from sales.models import Article, Sale
+from sales.serializers import ArticleSerializer, SaleSerializer
+from utils.serializers import compile_serializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the regular and compiled serialization of the sales and articles "
+        "lists (on the current database content)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, rows, repeat, **options):
+        benchmarks = {
+            "sales": (
+                SaleSerializer,
+                Sale.objects.order_by("-unit_selling_price", "-id")[:rows],
+            ),
+            "articles": (
+                ArticleSerializer,
+                Article.objects.order_by("category")[:rows],
+            ),
+        }
+        results = {}
+        for name, (serializer_class, queryset) in benchmarks.items():
+            compiled = compile_serializer(serializer_class)
+
+            def regular():
+                return JSONRenderer().render(
+                    serializer_class(list(queryset.all()), many=True).data
+                )
+
+            def fast():
+                return JSONRenderer().render(
+                    compiled.convert_many(queryset.values(*compiled.lookups))
+                )
+
+            if regular() != fast():
+                raise CommandError(f"The compiled {name} output differs.")
+            results[name] = {
+                "rows": queryset.count(),
+                "regular_ms": self.time(regular, repeat),
+                "compiled_ms": self.time(fast, repeat),
+            }
+            results[name]["speedup"] = round(
+                results[name]["regular_ms"] / max(results[name]["compiled_ms"], 1e-6),
+                2,
+            )
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def time(self, function, repeat):
+        """Best time of `repeat` runs, in milliseconds (queries included)"""
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            function()
+            timings.append(perf_counter() - start)
+        return round(min(timings) * 1000, 3)
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from sales.exports import EXPORT_FORMATS, export_chunks
+from sales.models import Sale
+from utils.routers import read_from_replica
+
+
+class Command(BaseCommand):
+    help = "Export the sales as CSV or NDJSON, streamed from a database cursor."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+        parser.add_argument(
+            "--output", help="File to write the export to (standard output if unset)."
+        )
+        parser.add_argument("--date-from", help="First sale date (YYYY-MM-DD).")
+        parser.add_argument("--date-to", help="Last sale date (YYYY-MM-DD).")
+        parser.add_argument("--author", type=int, help="Id of the sales author.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with read_from_replica():
+            self.export(options)
+
+    def export(self, options):
+        queryset = Sale.objects.in_period(options["date_from"], options["date_to"])
+        if options["author"] is not None:
+            queryset = queryset.filter(author=options["author"])
+
+        chunks = export_chunks(
+            queryset, options["format"], chunk_size=options["chunk_size"]
+        )
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
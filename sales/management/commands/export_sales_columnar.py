@@ -0,0 +1,118 @@
+import json
+import os
+from glob import glob
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.columnar import (
+    COLUMNAR_BATCH_SIZE,
+    COLUMNAR_EXTENSIONS,
+    COLUMNAR_FORMATS,
+    export_articles,
+    export_sales,
+    pyarrow,
+    sales_since,
+)
+from sales.models import Article, Sale
+from utils.routers import read_from_replica
+
+WATERMARK_FILE = "_watermark.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the sales (joined with their article and category) and the "
+        "articles with their aggregates as Parquet or Arrow files into a "
+        "directory: every run adds a file of the sales added since the previous "
+        "one to its sales/ dataset (see the _watermark.json file), and rewrites "
+        "the articles file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", required=True, help="Directory to write the files to."
+        )
+        parser.add_argument(
+            "--format", choices=list(COLUMNAR_FORMATS), default="parquet"
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Export every sale again, replacing the sales files.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=COLUMNAR_BATCH_SIZE,
+            help="Rows read per chunk and written per row group at most.",
+        )
+
+    def handle(self, *args, **options):
+        if pyarrow is None:
+            raise CommandError("Columnar exports need pyarrow, which is not installed.")
+        with read_from_replica():
+            self.export(options)
+
+    def export(self, options):
+        output, export_format = options["output"], options["format"]
+        extension = COLUMNAR_EXTENSIONS[export_format]
+        sales_dir = os.path.join(output, "sales")
+        os.makedirs(sales_dir, exist_ok=True)
+
+        watermark = {"last_sale_id": 0, "format": export_format}
+        if not options["full"]:
+            watermark = self.read_watermark(output) or watermark
+        if watermark["format"] != export_format:
+            raise CommandError(
+                f"The sales files are in {watermark['format']} format: export them "
+                f"again with --full to change it."
+            )
+        since_id = watermark["last_sale_id"]
+        previous_files = glob(os.path.join(sales_dir, f"*.{extension}"))
+
+        queryset, until_id = sales_since(Sale.objects.all(), since_id)
+        sales_file = os.path.join(
+            sales_dir, f"{since_id + 1:012}-{until_id:012}.{extension}"
+        )
+        if until_id > since_id:
+            self.write(
+                sales_file,
+                export_sales(queryset, export_format, batch_size=options["batch_size"]),
+            )
+        if options["full"]:
+            for path in previous_files:
+                if path != sales_file:
+                    os.remove(path)
+        self.write(
+            os.path.join(output, f"articles.{extension}"),
+            export_articles(
+                Article.objects.all(), export_format, batch_size=options["batch_size"]
+            ),
+        )
+        self.write(
+            os.path.join(output, WATERMARK_FILE),
+            [json.dumps({"last_sale_id": until_id, "format": export_format}).encode()],
+        )
+        self.stdout.write(
+            f"Exported the sales {since_id + 1} to {until_id} and the articles "
+            f"to {output}."
+            if until_id > since_id
+            else f"No new sale (or still being written), exported the articles to "
+            f"{output}."
+        )
+
+    def read_watermark(self, output):
+        try:
+            with open(os.path.join(output, WATERMARK_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write(self, path, chunks):
+        # Renamed once complete: a failed run leaves the previous files as is
+        # (and the dataset readers skip the hidden files)
+        directory, name = os.path.split(path)
+        temporary = os.path.join(directory, f".{name}.tmp")
+        with open(temporary, "wb") as f:
+            f.writelines(chunks)
+        os.replace(temporary, path)
@@ -0,0 +1,65 @@
+import csv
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.models import Article
+from sales.serializers import ArticleImportDeserializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Import articles from a CSV file (code, category, name and "
+        "manufacturing_cost columns, the category as a pk): the whole file is "
+        "validated in a few queries, then inserted with bulk_create. Nothing is "
+        "imported if any row is invalid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file, with a header row.")
+        parser.add_argument(
+            "--update",
+            action="store_true",
+            help="Update the articles whose code exists instead of rejecting them.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.SALES_BULK_CREATE_BATCH_SIZE
+        )
+
+    def handle(self, *args, path, update, batch_size, **options):
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        if not rows:
+            raise CommandError(f"No article in {path}.")
+
+        deserializer = ArticleImportDeserializer(
+            data=rows, many=True, context={"update": update}
+        )
+        if not deserializer.is_valid():
+            # Keyed by the index of the invalid rows, after the header line
+            for index, errors in sorted(deserializer.errors.items()):
+                self.stderr.write(f"Line {index + 2}: {self.format_errors(errors)}")
+            raise CommandError(
+                f"{len(deserializer.errors)} invalid articles, nothing imported."
+            )
+
+        articles = Article.objects.bulk_import(
+            [
+                Article(**validated_data)
+                for validated_data in deserializer.validated_data
+            ],
+            update=update,
+            batch_size=batch_size,
+        )
+        updated = sum(
+            article.code in deserializer.existing_codes for article in articles
+        )
+        self.stdout.write(
+            f"{len(articles) - updated} articles created, {updated} updated."
+        )
+
+    def format_errors(self, errors):
+        return "; ".join(
+            f"{field}: {' '.join(str(message) for message in messages)}"
+            for field, messages in errors.items()
+        )
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+
+from sales.models import Sale
+from utils.partitions import (
+    INTERVALS,
+    create_future_partitions,
+    get_partitions,
+    is_partitioned,
+    partition_table,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the next partitions of the sales table (partitioned by date "
+        "range, on PostgreSQL), or convert it into a partitioned table with "
+        "--convert. To run daily, so that the partitions exist ahead of the "
+        "sales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Convert the (unpartitioned) table, locking it while its rows "
+            "are copied.",
+        )
+        parser.add_argument(
+            "--interval", choices=INTERVALS, default=settings.SALES_PARTITION_INTERVAL
+        )
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=settings.SALES_PARTITIONS_AHEAD,
+            help="Number of partitions to create after the current one.",
+        )
+        parser.add_argument(
+            "--list", action="store_true", help="List the partitions and bounds."
+        )
+
+    def handle(self, *args, convert, interval, ahead, list, **options):
+        if connections[router.db_for_write(Sale)].vendor != "postgresql":
+            raise CommandError("Partitioning requires PostgreSQL.")
+        if convert:
+            if is_partitioned(Sale):
+                raise CommandError("The sales table is already partitioned.")
+            partition_table(Sale, "date", interval, ahead=ahead)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Partitioned the sales table in {len(get_partitions(Sale))} "
+                    "partitions."
+                )
+            )
+        elif not is_partitioned(Sale):
+            raise CommandError(
+                "The sales table is not partitioned: run with --convert first."
+            )
+        else:
+            created = create_future_partitions(Sale, "date", interval, ahead)
+            self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partitions."))
+        if list:
+            for name, bounds in get_partitions(Sale):
+                self.stdout.write(f"{name}: {bounds}")
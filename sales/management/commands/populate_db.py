@@ -1,50 +1,53 @@
-from datetime import date
-from decimal import Decimal
-from random import choice
+import random
 
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from faker import Faker
 
-from sales.models import Article, ArticleCategory, Sale
-from users.models import User
-
-fake = Faker()
+from sales.seeding import populate
 
 
 class Command(BaseCommand):
     help = "Populate the database with dummy data."
 
-    @transaction.atomic
-    def handle(self, *args, **options):
-        users = [User.objects.create_user(email=fake.ascii_email()) for _ in range(10)]
-        categories = ArticleCategory.objects.bulk_create(
-            [ArticleCategory(display_name=fake.word()) for _ in range(10)]
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--articles", type=int, default=100)
+        parser.add_argument("--sales", type=int, default=1000)
+        parser.add_argument(
+            "--seed",
+            type=int,
+            help="Seed of the generated dataset (random if unset).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Number of rows generated and loaded at once.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes loading the sales (PostgreSQL only).",
         )
-        articles = Article.objects.bulk_create(
-            [
-                Article(
-                    code=fake.pystr(3, 3).upper() + str(fake.pyint(100, 999)),
-                    category=choice(categories),
-                    name=fake.word(),
-                    manufacturing_cost=fake.pydecimal(
-                        left_digits=3, right_digits=2, positive=True
-                    ),
-                )
-                for _ in range(100)
-            ]
+
+    def handle(self, *args, **options):
+        seed = options["seed"]
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.stdout.write(f"Populating the database with seed {seed}...")
+
+        def progress(loaded):
+            self.stdout.write(f"{loaded}/{options['sales']} sales loaded")
+
+        populate(
+            users=options["users"],
+            categories=options["categories"],
+            articles=options["articles"],
+            sales=options["sales"],
+            seed=seed,
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            progress=progress,
         )
-        sales = []
-        for _ in range(1000):
-            article = choice(articles)
-            sales.append(
-                Sale(
-                    date=fake.date_between_dates(date(2021, 1, 1), date(2021, 12, 31)),
-                    author=choice(users),
-                    article=article,
-                    quantity=fake.pyint(1, 99),
-                    unit_selling_price=Decimal(fake.pyint(120, 150) / 100)
-                    * article.manufacturing_cost,
-                )
-            )
-        Sale.objects.bulk_create(sales)
+        self.stdout.write(self.style.SUCCESS("Database populated."))
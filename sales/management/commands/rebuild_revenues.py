@@ -0,0 +1,104 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from sales.cache import aggregates_cache, leaderboard
+from sales.models import ArticleRevenue, DailyArticleRevenue
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild (or check) the per-article and per-day revenue rollups from "
+        "the sales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report the rollup rows that drifted, without writing.",
+        )
+        parser.add_argument(
+            "--article",
+            action="append",
+            type=int,
+            dest="article_ids",
+            help="Restrict to the given article id (can be repeated).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, check=False, article_ids=None, batch_size=1000, **options):
+        if check:
+            self.check_rollup(article_ids)
+            self.check_daily_rollup(article_ids)
+            return
+        with transaction.atomic():
+            count = ArticleRevenue.objects.rebuild(
+                article_ids=article_ids, batch_size=batch_size
+            )
+            daily_count = DailyArticleRevenue.objects.rebuild(
+                article_ids=article_ids, batch_size=batch_size
+            )
+            leaderboard.invalidate()
+            # The cached /money, /revenue and /analytics responses (and ETags)
+            aggregates_cache.bump_version_on_commit()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} article revenues."))
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {daily_count} daily article revenues.")
+        )
+
+    def check_rollup(self, article_ids):
+        fields = ("business_revenue", "total_quantity", "sale_count", "last_sale_date")
+        stored = ArticleRevenue.objects.all()
+        if article_ids is not None:
+            stored = stored.filter(article_id__in=article_ids)
+        stored = {
+            row["article_id"]: row for row in stored.values("article_id", *fields)
+        }
+        drifted = 0
+        for expected in ArticleRevenue.objects.compute(article_ids=article_ids):
+            current = stored.get(expected.article_id)
+            values = {field: getattr(expected, field) for field in fields}
+            if current is None or any(current[f] != values[f] for f in fields):
+                drifted += 1
+                self.stdout.write(
+                    f"Article {expected.article_id}: {current} != {values}"
+                )
+        if drifted:
+            self.stdout.write(
+                self.style.WARNING(f"{drifted} article revenues drifted.")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("Article revenues are up to date."))
+
+    def check_daily_rollup(self, article_ids):
+        fields = ("business_revenue", "total_quantity", "sale_count")
+        # Rows emptied by deleted sales are kept, with a zero sale count
+        stored = DailyArticleRevenue.objects.filter(sale_count__gt=0)
+        if article_ids is not None:
+            stored = stored.filter(article_id__in=article_ids)
+        stored = {
+            (row["article_id"], row["date"]): row
+            for row in stored.values("article_id", "date", *fields)
+        }
+        drifted = 0
+        for expected in DailyArticleRevenue.objects.compute(article_ids=article_ids):
+            current = stored.pop((expected.article_id, expected.date), None)
+            values = {field: getattr(expected, field) for field in fields}
+            if current is None or any(current[f] != values[f] for f in fields):
+                drifted += 1
+                self.stdout.write(
+                    f"Article {expected.article_id} on {expected.date}: "
+                    f"{current} != {values}"
+                )
+        # Remaining rows have no sale anymore
+        for (article_id, date), current in stored.items():
+            drifted += 1
+            self.stdout.write(f"Article {article_id} on {date}: {current} != None")
+        if drifted:
+            self.stdout.write(
+                self.style.WARNING(f"{drifted} daily article revenues drifted.")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS("Daily article revenues are up to date.")
+            )
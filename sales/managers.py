@@ -1,45 +1,156 @@
-from django.db import models
-from django.db.models import Avg, F, Sum
+from collections import defaultdict
+from decimal import Decimal
+from itertools import islice
+
+from django.db import connections, models, transaction
+from django.db.models import Case, Count, F, Max, Q, Sum, Value, When
 from django.db.models.expressions import (
+    ExpressionWrapper,
+    Func,
     OuterRef,
     Subquery,
 )
+from django.db.models.functions import (
+    Cast,
+    Coalesce,
+    Greatest,
+    NullIf,
+    Trunc,
+    Upper,
+)
+
+# Shortest term matched anywhere in the names, the shorter ones match the
+# start of the names only
+ARTICLE_SEARCH_MIN_SUBSTRING = 3
+
+
+def revenue_aggregates(prefix):
+    """
+    Aggregates of the sales reached through `prefix`, zero when there is none
+    """
+    return {
+        "business_revenue": Coalesce(
+            Sum(F(f"{prefix}unit_selling_price") * F(f"{prefix}quantity")),
+            Value(0),
+            output_field=models.DecimalField(max_digits=20, decimal_places=2),
+        ),
+        "total_quantity": Coalesce(Sum(f"{prefix}quantity"), Value(0)),
+        "sale_count": Count(f"{prefix}id"),
+        "last_sale_date": Max(f"{prefix}date"),
+    }
+
+
+class TrigramMatch(Func):
+    """
+    `lhs % rhs` (PostgreSQL pg_trgm): whether the strings are similar enough,
+    served by a gin_trgm_ops index of `lhs`
+    """
+
+    arg_joiner = " %% "
+    template = "(%(expressions)s)"
+    output_field = models.BooleanField()
+
+
+class TrigramSimilarity(Func):
+    function = "SIMILARITY"
+    output_field = models.FloatField()
+
+
+def margin_percentage(manufacturing_cost):
+    """
+    Margin of the aggregated revenue over the manufacturing cost of the
+    aggregated quantity, in percent (null without cost)
+    """
+    cost = ExpressionWrapper(
+        manufacturing_cost * F("total_quantity"), output_field=models.FloatField()
+    )
+    # Floats: SQLite divides integral decimals as integers
+    return (
+        (Cast("business_revenue", models.FloatField()) - cost)
+        * 100
+        / NullIf(cost, Value(0.0))
+    )
 
 
 class SaleQuerySet(models.QuerySet):
+    def in_period(self, date_from=None, date_to=None):
+        """
+        Sales made between `date_from` and `date_to` (both included, both
+        optional). Plain comparisons of the date: once the table is partitioned
+        by date (see utils.partitions), only the partitions of the period are
+        scanned.
+        """
+        queryset = self
+        if date_from is not None:
+            queryset = queryset.filter(date__gte=date_from)
+        if date_to is not None:
+            queryset = queryset.filter(date__lte=date_to)
+        return queryset
+
+    def bulk_create_sales(self, sales, *, batch_size=None):
+        """
+        bulk_create() in a single transaction, which also notifies the receivers
+        maintaining the data derived from the sales (bulk_create does not send
+        the save signals).
+        """
+        from sales.signals import sales_bulk_created
+
+        with transaction.atomic(using=self.db):
+            sales = self.bulk_create(sales, batch_size=batch_size)
+            sales_bulk_created.send(sender=self.model, sales=sales)
+        return sales
+
+    def delete(self):
+        """
+        delete() in a single transaction, which also notifies the receivers
+        maintaining the data derived from the sales. The sales have no delete
+        signal receivers: the deletes cascading from their article stay fast
+        deletes (its rollups are deleted with it).
+        """
+        from sales.signals import sales_deleted
+
+        with transaction.atomic(using=self.db):
+            sales = list(
+                self.only("article_id", "quantity", "unit_selling_price", "date")
+            )
+            deleted = super().delete()
+            sales_deleted.send(sender=self.model, sales=sales)
+        return deleted
+
     def with_revenues(self):
+        """
+        Sales totals per article (as dicts, only for the articles sold), in a
+        single grouped scan: see ArticleQuerySet.with_revenues().
+        """
         return (
             self.values("article")
             .annotate(
-                business_revenue=Sum(F("unit_selling_price") * F("quantity")),
-                margin_percentage_per_sale=(
-                    F("unit_selling_price") - F("article__manufacturing_cost")
-                )
-                / F("article__manufacturing_cost"),
+                **revenue_aggregates(""),
                 category_name=F("article__category__display_name"),
-                pk=F("id"),
             )
-            .order_by("-business_revenue")
+            .annotate(
+                margin_percentage=margin_percentage(F("article__manufacturing_cost"))
+            )
+            .order_by("-business_revenue", "article")
         )
 
 
 class ArticleQuerySet(models.QuerySet):
     def with_revenues(self):
+        """
+        Sales totals of every article (zero for the articles never sold) in a
+        single grouped scan of the sales, which the (article, date) covering
+        index serves: revenue, quantity, sale count, last sale date, margin
+        percentage (weighted by the quantities) and category name.
+        Ordered by decreasing revenue then pk, a stable order to paginate on.
+        """
         return (
-            self.select_related("sale__category")
-            .values("name")
-            .annotate(
-                business_revenue=Sum(
-                    F("sales__unit_selling_price") * F("sales__quantity")
-                ),
-                margin_percentage_per_sale=Avg(
-                    (F("sales__unit_selling_price") - F("manufacturing_cost"))
-                    / F("manufacturing_cost")
-                ),
+            self.annotate(
+                **revenue_aggregates("sales__"),
                 category_name=F("category__display_name"),
-                pk=F("id"),
             )
-            .order_by("-business_revenue")
+            .annotate(margin_percentage=margin_percentage(F("manufacturing_cost")))
+            .order_by("-business_revenue", "pk")
         )
 
     def with_revenues_subquery(self):
@@ -53,3 +164,436 @@ class ArticleQuerySet(models.QuerySet):
             .values("business_revenue")
         )
         return self.annotate(business_revenue=(sales))
+
+    def search(self, term, *, fuzzy=False):
+        """
+        Articles whose code starts with `term`, whose name contains it (starts
+        with it, if shorter than ARTICLE_SEARCH_MIN_SUBSTRING), or whose
+        category display name contains it, case-insensitively. With `fuzzy`,
+        also the names similar to `term` (PostgreSQL only, ignored elsewhere).
+
+        Every condition is served by an index: the pattern index of the codes,
+        the trigram index of the upper-cased names (see migration 0008), and
+        the category foreign key index, the categories matching being read
+        first (one query on a small table), so that the planner combines the
+        three. Ordered by code prefix matches, then name prefix matches, then
+        similarity when fuzzy, then name and pk.
+        """
+        from sales.models import ArticleCategory
+
+        term = term.strip()
+        category_ids = list(
+            ArticleCategory.objects.using(self.db)
+            .filter(display_name__icontains=term)
+            .values_list("pk", flat=True)
+        )
+        condition = Q(code__startswith=term.upper()) | Q(category_id__in=category_ids)
+        if len(term) >= ARTICLE_SEARCH_MIN_SUBSTRING:
+            condition |= Q(name__icontains=term)
+        else:
+            condition |= Q(name__istartswith=term)
+        ordering = [
+            Case(
+                When(code__startswith=term.upper(), then=Value(0)),
+                When(name__istartswith=term, then=Value(1)),
+                default=Value(2),
+            )
+        ]
+        if fuzzy and connections[self.db].vendor == "postgresql":
+            condition |= Q(TrigramMatch(Upper("name"), Upper(Value(term))))
+            ordering.append(TrigramSimilarity(Upper("name"), Upper(Value(term))).desc())
+        return self.filter(condition).order_by(*ordering, "name", "pk")
+
+    def existing_codes(self, codes, *, batch_size=1000):
+        """
+        The `codes` already used by an article, in one query per `batch_size`
+        codes.
+        """
+        codes = list(codes)
+        existing = set()
+        for start in range(0, len(codes), batch_size):
+            existing.update(
+                self.filter(code__in=codes[start : start + batch_size]).values_list(
+                    "code", flat=True
+                )
+            )
+        return existing
+
+    def bulk_import(self, articles, *, update=False, batch_size=None):
+        """
+        bulk_create() in a single transaction, without the per article queries
+        of Article.full_clean(): the `articles` must have been validated as a
+        batch (see ArticleImportListDeserializer). With `update`, the articles
+        whose code exists are updated instead (category, name and cost).
+        Notifies the receivers maintaining the data derived from the articles
+        (bulk_create does not send the save signals).
+        """
+        from sales.signals import articles_bulk_imported
+
+        options = {}
+        if update:
+            options = {
+                "update_conflicts": True,
+                "unique_fields": ["code"],
+                "update_fields": ["category", "name", "manufacturing_cost"],
+            }
+        with transaction.atomic(using=self.db):
+            articles = self.bulk_create(articles, batch_size=batch_size, **options)
+            # Not every backend returns the pks of upserted rows
+            missing = [article for article in articles if article.pk is None]
+            if missing:
+                pks = dict(
+                    self.filter(
+                        code__in=[article.code for article in missing]
+                    ).values_list("code", "pk")
+                )
+                for article in missing:
+                    article.pk = pks[article.code]
+            articles_bulk_imported.send(sender=self.model, articles=articles)
+        return articles
+
+
+class ArticleRevenueQuerySet(models.QuerySet):
+    def ordered_by_revenue(self):
+        return self.order_by("-business_revenue", "article")
+
+    def top(self, size, category_id=None):
+        """
+        (article_id, business_revenue) of the `size` articles (of the category
+        if given) with the highest revenue, the articles without any revenue
+        excluded: a scan of the ranking index.
+        """
+        queryset = self.filter(business_revenue__gt=0)
+        if category_id is not None:
+            queryset = queryset.filter(article__category_id=category_id)
+        queryset = queryset.ordered_by_revenue().values_list(
+            "article_id", "business_revenue"
+        )
+        return list(queryset[:size])
+
+    def add_sale(self, *, article_id, quantity, unit_selling_price, date):
+        """
+        Adds a single sale to the rollup of its article.
+        """
+        self._add(
+            article_id=article_id,
+            business_revenue=unit_selling_price * quantity,
+            total_quantity=quantity,
+            sale_count=1,
+            last_sale_date=date,
+        )
+
+    def add_sales(self, sales, batch_size=500):
+        """
+        Adds many sales to the rollup, with a single update per `batch_size`
+        articles (no query per article).
+        """
+        totals = defaultdict(
+            lambda: {
+                "business_revenue": 0,
+                "total_quantity": 0,
+                "sale_count": 0,
+                "last_sale_date": None,
+            }
+        )
+        for sale in sales:
+            total = totals[sale.article_id]
+            total["business_revenue"] += sale.unit_selling_price * sale.quantity
+            total["total_quantity"] += sale.quantity
+            total["sale_count"] += 1
+            total["last_sale_date"] = max(
+                sale.date, total["last_sale_date"] or sale.date
+            )
+        article_ids = list(totals)
+        self.bulk_create(
+            [self.model(article_id=article_id) for article_id in article_ids],
+            ignore_conflicts=True,
+        )
+        for start in range(0, len(article_ids), batch_size):
+            batch = article_ids[start : start + batch_size]
+
+            def per_article(name):
+                return Case(
+                    *[
+                        When(
+                            article_id=article_id, then=Value(totals[article_id][name])
+                        )
+                        for article_id in batch
+                    ],
+                    output_field=self.model._meta.get_field(name),
+                )
+
+            last_sale_date = per_article("last_sale_date")
+            self.filter(article_id__in=batch).update(
+                business_revenue=F("business_revenue")
+                + per_article("business_revenue"),
+                total_quantity=F("total_quantity") + per_article("total_quantity"),
+                sale_count=F("sale_count") + per_article("sale_count"),
+                last_sale_date=Greatest(
+                    Coalesce("last_sale_date", last_sale_date), last_sale_date
+                ),
+            )
+
+    def _add(
+        self,
+        *,
+        article_id,
+        business_revenue,
+        total_quantity,
+        sale_count,
+        last_sale_date,
+    ):
+        self.get_or_create(article_id=article_id)
+        self.filter(article_id=article_id).update(
+            business_revenue=F("business_revenue") + business_revenue,
+            total_quantity=F("total_quantity") + total_quantity,
+            sale_count=F("sale_count") + sale_count,
+            last_sale_date=Greatest(
+                Coalesce("last_sale_date", Value(last_sale_date)), Value(last_sale_date)
+            ),
+        )
+
+    def remove_sale(self, *, article_id, quantity, unit_selling_price, date):
+        """
+        Removes a single sale from the rollup of its article. The last sale date
+        is only recomputed (from the remaining sales) when the removed sale was
+        the most recent one.
+        """
+        from sales.models import Sale
+
+        rollup = self.filter(article_id=article_id)
+        rollup.update(
+            business_revenue=F("business_revenue") - unit_selling_price * quantity,
+            total_quantity=F("total_quantity") - quantity,
+            sale_count=F("sale_count") - 1,
+        )
+        rollup.filter(last_sale_date=date).update(
+            last_sale_date=Subquery(
+                Sale.objects.filter(article=OuterRef("article"))
+                .order_by()
+                .values("article")
+                .annotate(last_sale_date=Max("date"))
+                .values("last_sale_date")
+            )
+        )
+
+    def compute(self, *, article_ids=None):
+        """
+        Computes the rollup rows (unsaved) from the Sale table in a single
+        grouped scan. Articles without any sale get an empty rollup.
+        """
+        from sales.models import Article
+
+        articles = Article.objects.all()
+        if article_ids is not None:
+            articles = articles.filter(pk__in=article_ids)
+        aggregates = articles.with_revenues().values_list(
+            "pk", "business_revenue", "total_quantity", "sale_count", "last_sale_date"
+        )
+        return [
+            self.model(
+                article_id=pk,
+                # SQLite sums decimals as floats
+                business_revenue=Decimal(business_revenue).quantize(Decimal("0.01")),
+                total_quantity=total_quantity,
+                sale_count=sale_count,
+                last_sale_date=last_sale_date,
+            )
+            for pk, business_revenue, total_quantity, sale_count, last_sale_date in aggregates
+        ]
+
+    def rebuild(self, *, article_ids=None, batch_size=1000):
+        """
+        Replaces the existing rollup rows by freshly computed ones.
+        Returns the number of rows written.
+        """
+        rows = self.compute(article_ids=article_ids)
+        stale = self.all()
+        if article_ids is not None:
+            stale = stale.filter(article_id__in=article_ids)
+        stale.delete()
+        self.bulk_create(rows, batch_size=batch_size)
+        return len(rows)
+
+
+class DailyArticleRevenueQuerySet(models.QuerySet):
+    # Bucket sizes of the analytics, and the fields they can be grouped by
+    PERIODS = ("day", "week", "month")
+    GROUPS = {
+        "category": {
+            "category": F("article__category"),
+            "category_name": F("article__category__display_name"),
+        },
+        "article": {
+            "article_code": F("article__code"),
+            "article_name": F("article__name"),
+        },
+    }
+
+    def in_period(self, date_from=None, date_to=None):
+        queryset = self
+        if date_from is not None:
+            queryset = queryset.filter(date__gte=date_from)
+        if date_to is not None:
+            queryset = queryset.filter(date__lte=date_to)
+        return queryset
+
+    def buckets(self, *, period="day", group_by=None, date_from=None, date_to=None):
+        """
+        Revenue, quantity, sale count and margin per `period` (and per category
+        or article with `group_by`) between `date_from` and `date_to`, as dicts
+        ordered by period and decreasing revenue.
+        """
+        group_fields = dict(self.GROUPS.get(group_by, {}))
+        keys = list(group_fields)
+        if group_by == "article":
+            keys.insert(0, "article")
+        money = models.DecimalField(max_digits=20, decimal_places=2)
+        ratio = models.FloatField()
+        return (
+            self.in_period(date_from, date_to)
+            .filter(sale_count__gt=0)
+            .annotate(
+                period=Trunc("date", period, output_field=models.DateField()),
+                **group_fields,
+            )
+            .values("period", *keys)
+            .alias(
+                manufacturing_cost=Sum(
+                    F("total_quantity") * F("article__manufacturing_cost"),
+                    output_field=money,
+                )
+            )
+            .annotate(
+                business_revenue=Sum("business_revenue", output_field=money),
+                total_quantity=Sum("total_quantity"),
+                sale_count=Sum("sale_count"),
+                # SQLite divides integral decimals as integers
+                margin_percentage=Cast(
+                    F("business_revenue") - F("manufacturing_cost"), ratio
+                )
+                * 100
+                / Cast(NullIf("manufacturing_cost", Value(0)), ratio),
+            )
+            .order_by("period", "-business_revenue", *keys)
+        )
+
+    def add_sale(self, *, article_id, quantity, unit_selling_price, date):
+        """
+        Adds a single sale to the rollup of its article and day.
+        """
+        self._add(
+            {
+                (article_id, date): {
+                    "business_revenue": unit_selling_price * quantity,
+                    "total_quantity": quantity,
+                    "sale_count": 1,
+                }
+            }
+        )
+
+    def add_sales(self, sales, batch_size=500):
+        """
+        Adds many sales to the rollup, with a single update per `batch_size`
+        (article, day) pairs.
+        """
+        totals = defaultdict(
+            lambda: {"business_revenue": 0, "total_quantity": 0, "sale_count": 0}
+        )
+        for sale in sales:
+            total = totals[sale.article_id, sale.date]
+            total["business_revenue"] += sale.unit_selling_price * sale.quantity
+            total["total_quantity"] += sale.quantity
+            total["sale_count"] += 1
+        self._add(totals, batch_size=batch_size)
+
+    def _add(self, totals, batch_size=500):
+        keys = list(totals)
+        self.bulk_create(
+            [self.model(article_id=article_id, date=date) for article_id, date in keys],
+            ignore_conflicts=True,
+        )
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start : start + batch_size]
+
+            def per_day(name):
+                return Case(
+                    *[
+                        When(
+                            article_id=article_id,
+                            date=date,
+                            then=Value(totals[article_id, date][name]),
+                        )
+                        for article_id, date in batch
+                    ],
+                    output_field=self.model._meta.get_field(name),
+                )
+
+            rows = Q()
+            for article_id, date in batch:
+                rows |= Q(article_id=article_id, date=date)
+            self.filter(rows).update(
+                business_revenue=F("business_revenue") + per_day("business_revenue"),
+                total_quantity=F("total_quantity") + per_day("total_quantity"),
+                sale_count=F("sale_count") + per_day("sale_count"),
+            )
+
+    def remove_sale(self, *, article_id, quantity, unit_selling_price, date):
+        """
+        Removes a single sale from the rollup of its article and day.
+        """
+        self.filter(article_id=article_id, date=date).update(
+            business_revenue=F("business_revenue") - unit_selling_price * quantity,
+            total_quantity=F("total_quantity") - quantity,
+            sale_count=F("sale_count") - 1,
+        )
+
+    def compute(self, *, article_ids=None):
+        """
+        Computes the rollup rows (unsaved) from the Sale table in a single
+        grouped scan, read by chunks.
+        """
+        from sales.models import Sale
+
+        sales = Sale.objects.order_by()
+        if article_ids is not None:
+            sales = sales.filter(article_id__in=article_ids)
+        aggregates = sales.values_list("article", "date").annotate(
+            business_revenue=Sum(
+                F("unit_selling_price") * F("quantity"),
+                output_field=models.DecimalField(max_digits=20, decimal_places=2),
+            ),
+            total_quantity=Sum("quantity"),
+            sale_count=Count("id"),
+        )
+        for (
+            article_id,
+            date,
+            business_revenue,
+            total_quantity,
+            sale_count,
+        ) in aggregates.iterator():
+            yield self.model(
+                article_id=article_id,
+                date=date,
+                # SQLite sums decimals as floats
+                business_revenue=Decimal(business_revenue).quantize(Decimal("0.01")),
+                total_quantity=total_quantity,
+                sale_count=sale_count,
+            )
+
+    def rebuild(self, *, article_ids=None, batch_size=1000):
+        """
+        Replaces the existing rollup rows by freshly computed ones.
+        Returns the number of rows written.
+        """
+        stale = self.all()
+        if article_ids is not None:
+            stale = stale.filter(article_id__in=article_ids)
+        stale.delete()
+        count = 0
+        rows = self.compute(article_ids=article_ids)
+        while batch := list(islice(rows, batch_size)):
+            self.bulk_create(batch)
+            count += len(batch)
+        return count
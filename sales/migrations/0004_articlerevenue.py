@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Sum
+
+
+def populate_article_revenues(apps, schema_editor):
+    Article = apps.get_model("sales", "Article")
+    ArticleRevenue = apps.get_model("sales", "ArticleRevenue")
+    aggregates = Article.objects.order_by().values_list("pk").annotate(
+        business_revenue=Sum(F("sales__unit_selling_price") * F("sales__quantity")),
+        total_quantity=Sum("sales__quantity"),
+        sale_count=Count("sales"),
+        last_sale_date=Max("sales__date"),
+    )
+    ArticleRevenue.objects.bulk_create(
+        [
+            ArticleRevenue(
+                article_id=pk,
+                business_revenue=business_revenue or 0,
+                total_quantity=total_quantity or 0,
+                sale_count=sale_count,
+                last_sale_date=last_sale_date,
+            )
+            for pk, business_revenue, total_quantity, sale_count, last_sale_date in aggregates
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0003_alter_articlecategory_display_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleRevenue',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='revenue', serialize=False, to='sales.article', verbose_name='Article')),
+                ('business_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Business revenue')),
+                ('total_quantity', models.BigIntegerField(default=0, verbose_name='Total quantity')),
+                ('sale_count', models.BigIntegerField(default=0, verbose_name='Sale count')),
+                ('last_sale_date', models.DateField(blank=True, null=True, verbose_name='Last sale date')),
+            ],
+            options={
+                'verbose_name': 'Article Revenue',
+                'verbose_name_plural': 'Article Revenues',
+                'indexes': [models.Index(fields=['-business_revenue', 'article'], name='sales_revenue_ranking_idx')],
+            },
+        ),
+        migrations.RunPython(populate_article_revenues, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_articlerevenue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Create the composite indexes before dropping the FK ones they cover
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['-unit_selling_price', '-id'], name='sales_sale_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['author', '-unit_selling_price', '-id'], name='sales_sale_author_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['article', 'date'], include=('quantity', 'unit_selling_price'), name='sales_sale_article_date_idx'),
+        ),
+        migrations.AlterField(
+            model_name='sale',
+            name='article',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sales', to='sales.article', verbose_name='Article'),
+        ),
+        migrations.AlterField(
+            model_name='sale',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='sales', to=settings.AUTH_USER_MODEL, verbose_name='Author'),
+        ),
+    ]
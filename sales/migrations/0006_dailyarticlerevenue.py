@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def populate_daily_article_revenues(apps, schema_editor):
+    Sale = apps.get_model("sales", "Sale")
+    DailyArticleRevenue = apps.get_model("sales", "DailyArticleRevenue")
+    aggregates = Sale.objects.order_by().values_list("article", "date").annotate(
+        business_revenue=Sum(F("unit_selling_price") * F("quantity")),
+        total_quantity=Sum("quantity"),
+        sale_count=Count("id"),
+    )
+    DailyArticleRevenue.objects.bulk_create(
+        (
+            DailyArticleRevenue(
+                article_id=article_id,
+                date=date,
+                business_revenue=business_revenue,
+                total_quantity=total_quantity,
+                sale_count=sale_count,
+            )
+            for article_id, date, business_revenue, total_quantity, sale_count in aggregates.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_sale_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyArticleRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('business_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Business revenue')),
+                ('total_quantity', models.BigIntegerField(default=0, verbose_name='Total quantity')),
+                ('sale_count', models.BigIntegerField(default=0, verbose_name='Sale count')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenues', to='sales.article', verbose_name='Article')),
+            ],
+            options={
+                'verbose_name': 'Daily Article Revenue',
+                'verbose_name_plural': 'Daily Article Revenues',
+                'constraints': [models.UniqueConstraint(fields=('date', 'article'), name='sales_daily_revenue_unique')],
+            },
+        ),
+        migrations.RunPython(populate_daily_article_revenues, migrations.RunPython.noop),
+    ]
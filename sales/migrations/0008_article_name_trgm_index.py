@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:02
+
+from django.db import migrations
+
+
+def create_name_trgm_index(apps, schema_editor):
+    # pg_trgm index of the upper-cased names, as compared by icontains,
+    # istartswith and the fuzzy search (see ArticleQuerySet.search)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS sales_article_name_trgm_idx '
+        'ON sales_article USING gin (UPPER(name) gin_trgm_ops)'
+    )
+
+
+def drop_name_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS sales_article_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_sale_date_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_name_trgm_index, drop_name_trgm_index),
+    ]
@@ -1,7 +1,12 @@
 from attr import fields
-from django.db import models
+from django.db import models, router, transaction
 
-from sales.managers import ArticleQuerySet, SaleQuerySet
+from sales.managers import (
+    ArticleQuerySet,
+    ArticleRevenueQuerySet,
+    DailyArticleRevenueQuerySet,
+    SaleQuerySet,
+)
 
 ###################################
 # CATEGORY ARTICLE #
@@ -74,6 +79,25 @@ class Sale(models.Model):
     class Meta:
         verbose_name = "Sale"
         verbose_name_plural = "Sales"
+        indexes = [
+            # Sales list, ordered by price (id is the keyset pagination tiebreaker)
+            models.Index(
+                fields=["-unit_selling_price", "-id"], name="sales_sale_price_idx"
+            ),
+            # Sales list filtered by author
+            models.Index(
+                fields=["author", "-unit_selling_price", "-id"],
+                name="sales_sale_author_price_idx",
+            ),
+            # Sales list filtered by date range, or ordered by date
+            models.Index(fields=["-date", "-id"], name="sales_sale_date_idx"),
+            # Per-article aggregates and last sale date (covering on PostgreSQL)
+            models.Index(
+                fields=["article", "date"],
+                include=["quantity", "unit_selling_price"],
+                name="sales_sale_article_date_idx",
+            ),
+        ]
 
     date = models.DateField("Date", auto_now_add=True)
     author = models.ForeignKey(
@@ -81,9 +105,16 @@ class Sale(models.Model):
         verbose_name="Author",
         related_name="sales",
         on_delete=models.PROTECT,
+        # Covered by sales_sale_author_price_idx
+        db_index=False,
     )
     article = models.ForeignKey(
-        Article, verbose_name="Article", related_name="sales", on_delete=models.CASCADE
+        Article,
+        verbose_name="Article",
+        related_name="sales",
+        on_delete=models.CASCADE,
+        # Covered by sales_sale_article_date_idx
+        db_index=False,
     )
     quantity = models.PositiveIntegerField("Quantity")
     unit_selling_price = models.DecimalField(
@@ -95,8 +126,119 @@ class Sale(models.Model):
     def __str__(self):
         return f"{self.date} - {self.quantity} {self.article.name}"
 
+    def save(self, *args, **kwargs):
+        # The rollups are updated by the save signals (see sales.signals): in
+        # the same transaction as the sale
+        using = kwargs.get("using") or router.db_for_write(Sale, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+    def delete(self, using=None, keep_parents=False):
+        """
+        Deletes the sale and removes it from the rollups in a single
+        transaction (see SaleQuerySet.delete()).
+        """
+        from sales.signals import sales_deleted
+
+        using = using or router.db_for_write(Sale, instance=self)
+        with transaction.atomic(using=using):
+            deleted = super().delete(using=using, keep_parents=keep_parents)
+            sales_deleted.send(sender=Sale, sales=[self])
+        return deleted
+
     def update(self, **kwargs):
         updates = tuple((attr, value) for attr, value in kwargs.items())
         for attr, value in updates:
             setattr(self, attr, value)
         self.save()
+
+
+###################################
+# ARTICLE REVENUE #
+###################################
+
+
+class ArticleRevenue(models.Model):
+    """
+    Per-article rollup of the sales, kept up to date on every Sale write
+    (see sales.signals) and rebuilt with the `rebuild_revenues` command.
+    """
+
+    class Meta:
+        verbose_name = "Article Revenue"
+        verbose_name_plural = "Article Revenues"
+        indexes = [
+            models.Index(
+                fields=["-business_revenue", "article"],
+                name="sales_revenue_ranking_idx",
+            ),
+        ]
+
+    article = models.OneToOneField(
+        Article,
+        verbose_name="Article",
+        related_name="revenue",
+        primary_key=True,
+        on_delete=models.CASCADE,
+    )
+    business_revenue = models.DecimalField(
+        "Business revenue", max_digits=20, decimal_places=2, default=0
+    )
+    total_quantity = models.BigIntegerField("Total quantity", default=0)
+    sale_count = models.BigIntegerField("Sale count", default=0)
+    last_sale_date = models.DateField("Last sale date", null=True, blank=True)
+
+    objects = ArticleRevenueQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.article_id} - {self.business_revenue}"
+
+    @property
+    def margin_percentage(self):
+        """
+        Margin of the article sales over their manufacturing cost, in percent.
+        """
+        cost = self.article.manufacturing_cost * self.total_quantity
+        if not cost:
+            return None
+        return (self.business_revenue - cost) / cost * 100
+
+
+###################################
+# DAILY ARTICLE REVENUE #
+###################################
+
+
+class DailyArticleRevenue(models.Model):
+    """
+    Per-article and per-day rollup of the sales, kept up to date on every Sale
+    write (see sales.signals) and rebuilt with the `rebuild_revenues` command.
+    Time-bucketed analytics read it instead of the Sale table.
+    """
+
+    class Meta:
+        verbose_name = "Daily Article Revenue"
+        verbose_name_plural = "Daily Article Revenues"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "article"], name="sales_daily_revenue_unique"
+            ),
+        ]
+
+    date = models.DateField("Date")
+    article = models.ForeignKey(
+        Article,
+        verbose_name="Article",
+        related_name="daily_revenues",
+        on_delete=models.CASCADE,
+    )
+    business_revenue = models.DecimalField(
+        "Business revenue", max_digits=20, decimal_places=2, default=0
+    )
+    total_quantity = models.BigIntegerField("Total quantity", default=0)
+    sale_count = models.BigIntegerField("Sale count", default=0)
+
+    objects = DailyArticleRevenueQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.date} - {self.article_id} - {self.business_revenue}"
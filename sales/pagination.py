@@ -1,7 +1,212 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import b64decode, b64encode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
+
+from utils.db import estimated_count, keyset_filter
 
 
 class SalesPagination(PageNumberPagination):
     page_size = 25
     page_size_query_param = "page_size"
     max_page_size = 1000
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for the async views: the count and the rows of the
+        page are read with the async ORM.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # A cached property: the paginator does not count the rows again
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=page_number, message=str(exc)
+                )
+            )
+        self.page.object_list = [row async for row in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+
+class SalesKeysetPagination(CursorPagination):
+    """
+    Keyset (seek) pagination on the queryset ordering, with `id` appended as a
+    tiebreaker. The cursor holds the ordering values of the first/last row of
+    the current page, so every page is an indexed range scan: no COUNT, no
+    OFFSET, and concurrent inserts never shift rows between pages.
+
+    Only concrete fields of the paginated model can be used in the ordering.
+    Both model instances and `values()` dicts (containing the ordering fields)
+    can be paginated.
+    """
+
+    page_size = 25
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    ordering = "-id"
+    tiebreaker = "id"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, position = self.get_page_queryset(queryset, request)
+        return self.set_page(list(queryset), position)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset, position = self.get_page_queryset(queryset, request)
+        return self.set_page([row async for row in queryset], position)
+
+    def get_page_queryset(self, queryset, request):
+        """
+        The rows of the requested page, plus one telling whether there are more,
+        and the position of the cursor (None on the first page).
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.opts = queryset.model._meta
+        self.ordering = self.get_keyset_ordering(queryset)
+        position, self.reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self._invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(ordering, position))
+        return queryset[: self.page_size + 1], position
+
+    def set_page(self, results, position):
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_keyset_ordering(self, queryset):
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        ordering = [field for field in ordering if isinstance(field, str)]
+        if not ordering:
+            ordering = [self.ordering]
+        names = {field.lstrip("-") for field in ordering}
+        if not names & {self.tiebreaker, "pk"}:
+            prefix = "-" if ordering[-1].startswith("-") else ""
+            ordering.append(prefix + self.tiebreaker)
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = json.loads(b64decode(encoded.encode("ascii")).decode("utf-8"))
+            fields = [self._get_field(field) for field in self.ordering]
+            if len(cursor["p"]) != len(fields):
+                raise ValueError(cursor)
+            position = [
+                field.to_python(value) for field, value in zip(fields, cursor["p"])
+            ]
+            return position, bool(cursor.get("r"))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        position = [
+            self._get_position_value(instance, field) for field in self.ordering
+        ]
+        cursor = {"p": position}
+        if reverse:
+            cursor["r"] = 1
+        encoded = b64encode(json.dumps(cursor).encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position_value(self, instance, field):
+        # Rows are model instances, or dicts when paginating `values()`
+        name = field.lstrip("-")
+        if isinstance(instance, dict):
+            value = instance[name]
+        else:
+            value = getattr(instance, self._get_field(field).attname)
+        return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+    def _get_field(self, field):
+        name = field.lstrip("-")
+        return self.opts.pk if name == "pk" else self.opts.get_field(name)
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+
+class SaleListPagination(SalesPagination):
+    """
+    Page number pagination that switches to keyset pagination when the client
+    asks for it (`?pagination=cursor`, or by following a `cursor` link), or by
+    default once the paginated table is estimated to be larger than
+    `settings.SALES_KEYSET_PAGINATION_THRESHOLD`. Clients can still force page
+    numbers with `?pagination=page`.
+    """
+
+    pagination_query_param = "pagination"
+    keyset_class = SalesKeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(queryset, request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        # The table size estimate is read with a raw query
+        if await sync_to_async(self.use_keyset)(queryset, request):
+            self.keyset = self.keyset_class()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+        return await super().apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def use_keyset(self, queryset, request):
+        mode = request.query_params.get(self.pagination_query_param)
+        if mode is not None:
+            return mode == "cursor"
+        if self.keyset_class.cursor_query_param in request.query_params:
+            return True
+        threshold = getattr(settings, "SALES_KEYSET_PAGINATION_THRESHOLD", None)
+        if threshold is None:
+            return False
+        count = estimated_count(queryset.model)
+        return count is not None and count > threshold
@@ -0,0 +1,208 @@
+"""
+Generation of reproducible dummy datasets, at any scale.
+
+Every sales chunk is generated from its own random generator, seeded by the
+dataset seed and the chunk index: the same seed always gives the same dataset,
+whatever the number of worker processes loading the chunks.
+"""
+
+import multiprocessing
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from faker import Faker
+
+from sales.cache import aggregates_cache, leaderboard, reference_data
+from sales.models import (
+    Article,
+    ArticleCategory,
+    ArticleRevenue,
+    DailyArticleRevenue,
+    Sale,
+)
+from users.models import User
+from utils.db import copy_rows, insert_rows
+
+FIRST_SALE_DATE = date(2021, 1, 1)
+SALE_DAYS = 365
+SALE_COLUMNS = ("date", "author", "article", "quantity", "unit_selling_price")
+
+
+def article_code(number, marker="B"):
+    """
+    Unique 3 letters + 3 digits code of the `number`th generated article
+    (676 000 codes per `marker` letter)
+    """
+    letters = f"{chr(65 + number // 26_000 % 26)}{chr(65 + number // 1000 % 26)}"
+    return f"{letters}{marker}{number % 1000:03}"
+
+
+def seed_users(count, *, seed, batch_size):
+    # A single unusable password: no hashing per user
+    password = make_password(None)
+    offset = User.objects.count()
+    return User.objects.bulk_create(
+        [
+            User(email=f"user-{seed}-{offset + i}@example.com", password=password)
+            for i in range(count)
+        ],
+        batch_size=batch_size,
+    )
+
+
+def seed_categories(count, *, seed, batch_size):
+    fake = Faker()
+    fake.seed_instance(seed)
+    offset = ArticleCategory.objects.count()
+    return ArticleCategory.objects.bulk_create(
+        [
+            ArticleCategory(display_name=f"{fake.word()} {offset + i}")
+            for i in range(count)
+        ],
+        batch_size=batch_size,
+    )
+
+
+def seed_articles(count, categories, *, seed, batch_size):
+    rng = random.Random(f"{seed}-articles")
+    fake = Faker()
+    fake.seed_instance(seed)
+    offset = Article.objects.count()
+    return Article.objects.bulk_create(
+        [
+            Article(
+                # Next marker letter every 676 000 articles (C, D...)
+                code=article_code(
+                    (offset + i) % 676_000, marker=chr(66 + (offset + i) // 676_000)
+                ),
+                category=rng.choice(categories),
+                name=fake.word(),
+                manufacturing_cost=Decimal(rng.randint(100, 99_999)) / 100,
+            )
+            for i in range(count)
+        ],
+        batch_size=batch_size,
+    )
+
+
+def generate_sales(chunk, size, *, seed, user_ids, articles):
+    """
+    Rows (in SALE_COLUMNS order) of the `chunk`th sales chunk, where `articles`
+    is a list of (id, manufacturing cost).
+    """
+    rng = random.Random(f"{seed}-sales-{chunk}")
+    rows = []
+    for _ in range(size):
+        article_id, manufacturing_cost = rng.choice(articles)
+        rows.append(
+            (
+                FIRST_SALE_DATE + timedelta(days=rng.randrange(SALE_DAYS)),
+                rng.choice(user_ids),
+                article_id,
+                rng.randint(1, 99),
+                (manufacturing_cost * rng.randint(120, 150) / 100).quantize(
+                    Decimal("0.01")
+                ),
+            )
+        )
+    return rows
+
+
+def load_sales(rows, *, using="default"):
+    """
+    Loads sales rows with COPY on PostgreSQL, a plain multi-row INSERT
+    elsewhere. The save signals are not sent: the derived data must be rebuilt
+    afterwards.
+    """
+    with transaction.atomic(using=using):
+        if connections[using].vendor == "postgresql":
+            copy_rows(Sale, SALE_COLUMNS, rows, using=using)
+        else:
+            insert_rows(Sale, SALE_COLUMNS, rows, using=using)
+    return len(rows)
+
+
+# Worker processes inherit the dataset references from the parent (fork)
+_worker_context = {}
+
+
+def _load_sales_chunk(chunk_and_size):
+    chunk, size = chunk_and_size
+    rows = generate_sales(chunk, size, **_worker_context)
+    return load_sales(rows)
+
+
+def seed_sales(
+    count, *, seed, user_ids, articles, batch_size, workers=1, progress=None
+):
+    """
+    Generates and loads `count` sales by chunks of `batch_size`, so that the
+    memory used does not depend on `count`. With several `workers` (PostgreSQL
+    only), chunks are loaded concurrently by forked processes, each with its
+    own database connection.
+    """
+    _worker_context.update(seed=seed, user_ids=user_ids, articles=articles)
+    chunks = [
+        (chunk, min(batch_size, count - start))
+        for chunk, start in enumerate(range(0, count, batch_size))
+    ]
+    loaded = 0
+    if workers > 1 and connections["default"].vendor == "postgresql":
+        # Forked processes must not share the parent connections
+        connections.close_all()
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            for size in pool.imap_unordered(_load_sales_chunk, chunks):
+                loaded += size
+                if progress:
+                    progress(loaded)
+    else:
+        for chunk_and_size in chunks:
+            loaded += _load_sales_chunk(chunk_and_size)
+            if progress:
+                progress(loaded)
+    _worker_context.clear()
+    return loaded
+
+
+def populate(
+    *,
+    users,
+    categories,
+    articles,
+    sales,
+    seed=0,
+    batch_size=10_000,
+    workers=1,
+    progress=None,
+):
+    """
+    Seeds a whole dataset and rebuilds the data derived from the sales.
+    Returns the created users.
+    """
+    created_users = seed_users(users, seed=seed, batch_size=batch_size)
+    created_categories = seed_categories(categories, seed=seed, batch_size=batch_size)
+    created_articles = seed_articles(
+        articles, created_categories, seed=seed, batch_size=batch_size
+    )
+    # bulk_create() does not send the signals invalidating the reference data
+    reference_data.invalidate()
+    seed_sales(
+        sales,
+        seed=seed,
+        user_ids=[user.pk for user in created_users],
+        articles=[
+            (article.pk, article.manufacturing_cost) for article in created_articles
+        ],
+        batch_size=batch_size,
+        workers=workers,
+        progress=progress,
+    )
+    ArticleRevenue.objects.rebuild()
+    DailyArticleRevenue.objects.rebuild(batch_size=batch_size)
+    # Nor the ones invalidating the data cached from the rollups
+    aggregates_cache.bump_version_on_commit()
+    leaderboard.invalidate()
+    return created_users
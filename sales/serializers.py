@@ -1,7 +1,39 @@
+from collections import Counter
+
+from django.conf import settings
 from rest_framework import serializers
 from datetime import date
+from sales.cache import reference_data
+from sales.columnar import COLUMNAR_FORMATS, pyarrow
+from sales.exports import EXPORT_FORMATS
+from sales.managers import DailyArticleRevenueQuerySet
 from sales.models import ArticleCategory, Article, Sale
 
+# 3 letters + 3 digits, e.g. ABC123
+ARTICLE_CODE_REGEX = r"^[A-Z]{3}[0-9]{3}$"
+
+
+class ReferencePrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves the pk from the reference data cache (with its `getter` method),
+    querying the `queryset` only for the pks missing from it.
+    """
+
+    def __init__(self, getter, **kwargs):
+        self.getter = getter
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, bool):
+            try:
+                instance = getattr(reference_data, self.getter)(int(data))
+            except (TypeError, ValueError):
+                instance = None
+            if instance is not None:
+                return instance
+        return super().to_internal_value(data)
+
+
 ###################################
 # CATEGORY ARTICLE #
 ###################################
@@ -16,8 +48,8 @@ class CategoryArticleSerializer(serializers.Serializer):
 class ArticleSerializer(serializers.Serializer):
     pk = serializers.IntegerField(read_only=True)
     code = serializers.CharField()
-    category = serializers.PrimaryKeyRelatedField(
-        queryset=ArticleCategory.objects.all()
+    category = ReferencePrimaryKeyRelatedField(
+        "get_category", queryset=ArticleCategory.objects.all()
     )
     name = serializers.CharField()
     manufacturing_cost = serializers.DecimalField(max_digits=5, decimal_places=2)
@@ -30,16 +62,154 @@ class ArticleSerializer(serializers.Serializer):
     #     return Article.objects.create(**validated_data)
 
 
+class ArticleImportListDeserializer(serializers.ListSerializer):
+    """
+    Reads what the items of the batch need to be validated in a few set-based
+    queries, instead of the uniqueness and foreign key queries Article.save()
+    (full_clean) runs per article: the codes already used, and the referenced
+    categories (from the reference data cache, then in a single query for the
+    missing ones).
+    """
+
+    def to_internal_value(self, data):
+        codes, category_ids = Counter(), set()
+        if isinstance(data, list):
+            for item in data:
+                if not isinstance(item, dict):
+                    continue
+                if isinstance(item.get("code"), str):
+                    codes[item["code"]] += 1
+                try:
+                    category_ids.add(int(item["category"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        self.duplicate_codes = {code for code, count in codes.items() if count > 1}
+        self.existing_codes = Article.objects.existing_codes(codes)
+        # A single version check for the whole batch
+        categories = reference_data.get_data().categories
+        self.categories = {
+            category_id: categories[category_id]
+            for category_id in category_ids
+            if category_id in categories
+        }
+        missing = category_ids - set(self.categories)
+        if missing:
+            self.categories.update(ArticleCategory.objects.in_bulk(missing))
+        return super().to_internal_value(data)
+
+
+class ArticleImportDeserializer(serializers.Serializer):
+    """
+    An article of a bulk import (many=True only). With `update` in the
+    context, the existing codes are accepted: their articles are updated.
+    """
+
+    code = serializers.RegexField(
+        ARTICLE_CODE_REGEX,
+        max_length=6,
+        error_messages={"invalid": "Must be 3 capital letters and 3 digits."},
+    )
+    category = serializers.IntegerField()
+    name = serializers.CharField(max_length=255)
+    manufacturing_cost = serializers.DecimalField(max_digits=11, decimal_places=2)
+
+    class Meta:
+        list_serializer_class = ArticleImportListDeserializer
+
+    def validate_code(self, value):
+        if value in self.parent.duplicate_codes:
+            raise serializers.ValidationError("Duplicated in the batch.")
+        if value in self.parent.existing_codes and not self.context.get("update"):
+            raise serializers.ValidationError("Already exists")
+        return value
+
+    def validate_category(self, value):
+        category = self.parent.categories.get(value)
+        if category is None:
+            raise serializers.ValidationError(
+                f'Invalid pk "{value}" - object does not exist.'
+            )
+        return category
+
+
+class ArticleImportQueryDeserializer(serializers.Serializer):
+    update = serializers.BooleanField(
+        default=False,
+        help_text="Update the articles whose code exists instead of rejecting them.",
+    )
+
+
+class ArticleImportResultSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    updated = serializers.IntegerField()
+
+
+class ArticleSearchQueryDeserializer(serializers.Serializer):
+    search = serializers.CharField(
+        max_length=100,
+        help_text=(
+            "Start of the article code, or part of the article name or of its "
+            "category name."
+        ),
+    )
+    fuzzy = serializers.BooleanField(
+        default=False,
+        help_text="Also match the names similar to the search (PostgreSQL only).",
+    )
+
+
+class ArticleLeaderboardQueryDeserializer(serializers.Serializer):
+    category = serializers.IntegerField(
+        required=False, help_text="Rank the articles of this category only."
+    )
+    size = serializers.IntegerField(min_value=1, default=10)
+
+    def validate_category(self, value):
+        if reference_data.get_category(value) is None:
+            raise serializers.ValidationError(
+                f'Invalid pk "{value}" - object does not exist.'
+            )
+        return value
+
+    def validate_size(self, value):
+        if value > settings.SALES_LEADERBOARD_SIZE:
+            raise serializers.ValidationError(
+                f"Ensure this value is less than or equal to "
+                f"{settings.SALES_LEADERBOARD_SIZE}."
+            )
+        return value
+
+
+class ArticleLeaderboardSerializer(serializers.Serializer):
+    """
+    Reads (rank, article, business_revenue) dicts, the articles coming from the
+    reference data cache.
+    """
+
+    rank = serializers.IntegerField()
+    pk = serializers.IntegerField(source="article.pk")
+    code = serializers.CharField(source="article.code")
+    name = serializers.CharField(source="article.name")
+    category_name = serializers.CharField(source="article.category.display_name")
+    business_revenue = serializers.DecimalField(max_digits=20, decimal_places=2)
+
+
 class ArticleListAgregatedSerializer(serializers.Serializer):
+    """
+    Reads from the ArticleRevenue rollup (whose pk is the article pk).
+    """
 
     # Special calculated fields:
-    business_revenue = serializers.DecimalField(max_digits=10, decimal_places=2)
-    # margin_percentage_per_sale = serializers.DecimalField(
-    #     max_digits=10, decimal_places=2
-    # )
+    business_revenue = serializers.DecimalField(max_digits=20, decimal_places=2)
+    total_quantity = serializers.IntegerField()
+    sale_count = serializers.IntegerField()
+    last_sale_date = serializers.DateField()
+    margin_percentage = serializers.DecimalField(
+        max_digits=20, decimal_places=2, allow_null=True
+    )
     pk = serializers.IntegerField(read_only=True)
-    name = serializers.CharField()
-    category_name = serializers.CharField(source="category.display_name")
+    name = serializers.CharField(source="article.name")
+    category_name = serializers.CharField(source="article.category.display_name")
 
 
 ###################################
@@ -50,7 +220,7 @@ class ArticleListAgregatedSerializer(serializers.Serializer):
 class SaleListAgregatedSerializer(serializers.Serializer):
 
     # Special calculated fields:
-    business_revenue = serializers.DecimalField(max_digits=10, decimal_places=2)
+    business_revenue = serializers.DecimalField(max_digits=20, decimal_places=2)
     # margin_percentage_per_sale = serializers.DecimalField(
     #     max_digits=10, decimal_places=2
     # )
@@ -66,7 +236,7 @@ class SaleListAgregatedSerializer(serializers.Serializer):
 
     # article_id = serializers.IntegerField(read_only=True)
     pk = serializers.IntegerField(read_only=True)
-    article = serializers.IntegerField(read_only=True)
+    article = serializers.IntegerField(source="article_id", read_only=True)
     # quantity = serializers.IntegerField()
     # unit_selling_price = serializers.DecimalField(max_digits=11, decimal_places=2)
 
@@ -78,15 +248,72 @@ class SaleSerializer(serializers.ModelSerializer):
 
 
 class SaleCreateDeserializer(serializers.Serializer):
-    article = serializers.PrimaryKeyRelatedField(queryset=Article.objects.all())
+    article = ReferencePrimaryKeyRelatedField(
+        "get_article", queryset=Article.objects.all()
+    )
     quantity = serializers.IntegerField()
     unit_selling_price = serializers.DecimalField(max_digits=11, decimal_places=2)
 
 
+class SaleBulkCreateListDeserializer(serializers.ListSerializer):
+    """
+    Resolves all the articles referenced by the batch before the items are
+    validated one by one: from the reference data cache, then in a single
+    query for the missing ones.
+    """
+
+    def to_internal_value(self, data):
+        article_ids = set()
+        if isinstance(data, list):
+            for item in data:
+                try:
+                    article_ids.add(int(item["article"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        # A single version check for the whole batch
+        articles = reference_data.get_data().articles
+        self.articles = {
+            article_id: articles[article_id]
+            for article_id in article_ids
+            if article_id in articles
+        }
+        missing = article_ids - set(self.articles)
+        if missing:
+            self.articles.update(Article.objects.in_bulk(missing))
+        return super().to_internal_value(data)
+
+
+class SaleBulkCreateDeserializer(serializers.Serializer):
+    article = serializers.IntegerField()
+    # Validated here rather than by the database constraints, which would fail
+    # the whole batch
+    quantity = serializers.IntegerField(min_value=1)
+    unit_selling_price = serializers.DecimalField(
+        max_digits=11, decimal_places=2, min_value=0
+    )
+
+    class Meta:
+        list_serializer_class = SaleBulkCreateListDeserializer
+
+    def validate_article(self, value):
+        articles = getattr(self.parent, "articles", None)
+        if articles is not None:
+            article = articles.get(value)
+        else:
+            article = reference_data.get_article(value)
+            if article is None:
+                article = Article.objects.filter(pk=value).first()
+        if article is None:
+            raise serializers.ValidationError(
+                f'Invalid pk "{value}" - object does not exist.'
+            )
+        return article
+
+
 class SaleCreateSerializer(serializers.Serializer):
     pk = serializers.IntegerField(read_only=True)
     date = serializers.DateField()
-    article = serializers.IntegerField()
+    article = serializers.IntegerField(source="article_id")
     quantity = serializers.IntegerField()
     unit_selling_price = serializers.DecimalField(max_digits=11, decimal_places=2)
 
@@ -103,3 +330,75 @@ class UpdateSaleSerializer(serializers.Serializer):
     # article = serializers.PrimaryKeyRelatedField(many=False, read_only=True)
     quantity = serializers.IntegerField()
     unit_selling_price = serializers.DecimalField(max_digits=11, decimal_places=2)
+
+
+class SaleExportQueryDeserializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(choices=list(EXPORT_FORMATS), default="csv")
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    author = serializers.IntegerField(required=False)
+
+
+class SaleColumnarExportQueryDeserializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(
+        choices=list(COLUMNAR_FORMATS), default="parquet"
+    )
+    dataset = serializers.ChoiceField(
+        choices=["sales", "articles"],
+        default="sales",
+        help_text="The sales, or the articles with their aggregates.",
+    )
+    since_id = serializers.IntegerField(
+        min_value=0,
+        default=0,
+        help_text=(
+            "Export the sales above this id only: the X-Sales-Watermark header "
+            "of the previous export."
+        ),
+    )
+
+    def validate_export_format(self, value):
+        if pyarrow is None:
+            raise serializers.ValidationError(
+                "Columnar exports need pyarrow, which is not installed."
+            )
+        return value
+
+
+class SaleAnalyticsQueryDeserializer(serializers.Serializer):
+    period = serializers.ChoiceField(
+        choices=DailyArticleRevenueQuerySet.PERIODS, default="day"
+    )
+    group_by = serializers.ChoiceField(
+        choices=list(DailyArticleRevenueQuerySet.GROUPS), required=False
+    )
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, data):
+        if data.get("date_from") and data.get("date_to"):
+            if data["date_from"] > data["date_to"]:
+                raise serializers.ValidationError(
+                    {"date_to": "Must be after date_from"}
+                )
+        return data
+
+
+class SaleAnalyticsSerializer(serializers.Serializer):
+    """
+    Reads the buckets of the DailyArticleRevenue rollup: the category or
+    article fields are only present when grouping by them.
+    """
+
+    period = serializers.DateField()
+    category = serializers.IntegerField(read_only=True)
+    category_name = serializers.CharField(read_only=True)
+    article = serializers.IntegerField(read_only=True)
+    article_code = serializers.CharField(read_only=True)
+    article_name = serializers.CharField(read_only=True)
+    business_revenue = serializers.DecimalField(max_digits=20, decimal_places=2)
+    total_quantity = serializers.IntegerField()
+    sale_count = serializers.IntegerField()
+    margin_percentage = serializers.DecimalField(
+        max_digits=20, decimal_places=2, allow_null=True
+    )
@@ -0,0 +1,162 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from sales.cache import aggregates_cache, leaderboard, reference_data
+from sales.models import (
+    Article,
+    ArticleCategory,
+    ArticleRevenue,
+    DailyArticleRevenue,
+    Sale,
+)
+from utils.partitions import create_future_partitions, is_partitioned
+
+# Rollups maintained incrementally from the sales
+SALE_ROLLUPS = (ArticleRevenue, DailyArticleRevenue)
+
+# Sent by SaleQuerySet.bulk_create_sales() with the created `sales`
+sales_bulk_created = Signal()
+# Sent by Sale.delete() and SaleQuerySet.delete() with the deleted `sales`,
+# instead of the delete signals: a receiver of those would make every delete
+# cascading from an article load its sales and run their receivers one by one
+sales_deleted = Signal()
+# Sent by ArticleQuerySet.bulk_import() with the created or updated `articles`
+articles_bulk_imported = Signal()
+
+
+def _sale_values(sale):
+    # Values may still be raw strings when the sale was built from user input
+    return {
+        "article_id": sale.article_id,
+        **{
+            name: Sale._meta.get_field(name).to_python(getattr(sale, name))
+            for name in ("quantity", "unit_selling_price", "date")
+        },
+    }
+
+
+@receiver(post_save, sender=Article)
+def create_article_revenue(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        ArticleRevenue.objects.create(article=instance)
+
+
+@receiver(articles_bulk_imported, sender=Article)
+def create_articles_revenues(sender, articles, **kwargs):
+    # The updated articles already have theirs
+    ArticleRevenue.objects.bulk_create(
+        [ArticleRevenue(article_id=article.pk) for article in articles],
+        ignore_conflicts=True,
+    )
+
+
+@receiver(pre_save, sender=Sale)
+def remember_previous_sale(sender, instance, raw=False, **kwargs):
+    """
+    Keeps the stored values of an updated sale so that they can be removed
+    from the rollup once the new ones are saved.
+    """
+    instance._previous_values = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_values = (
+        Sale.objects.filter(pk=instance.pk)
+        .values("article_id", "quantity", "unit_selling_price", "date")
+        .first()
+    )
+
+
+@receiver(post_save, sender=Sale)
+def add_sale_to_revenue(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_values", None)
+    for rollup in SALE_ROLLUPS:
+        if previous:
+            rollup.objects.remove_sale(**previous)
+        rollup.objects.add_sale(**_sale_values(instance))
+
+
+@receiver(sales_deleted, sender=Sale)
+def remove_sales_from_revenue(sender, sales, **kwargs):
+    if len(sales) == 1:
+        for rollup in SALE_ROLLUPS:
+            rollup.objects.remove_sale(**_sale_values(sales[0]))
+        return
+    # Many sales: the rollups of their articles are computed again, once
+    article_ids = {sale.article_id for sale in sales}
+    for rollup in SALE_ROLLUPS:
+        rollup.objects.rebuild(article_ids=article_ids)
+
+
+@receiver(sales_bulk_created, sender=Sale)
+def add_sales_to_revenue(sender, sales, **kwargs):
+    for rollup in SALE_ROLLUPS:
+        rollup.objects.add_sales(sales)
+
+
+@receiver(post_save, sender=Sale)
+def update_leaderboard(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    article_ids = {instance.article_id}
+    previous = getattr(instance, "_previous_values", None)
+    if previous:
+        article_ids.add(previous["article_id"])
+    leaderboard.update_on_commit(article_ids)
+
+
+@receiver(sales_deleted, sender=Sale)
+def update_leaderboard_on_delete(sender, sales, **kwargs):
+    leaderboard.update_on_commit({sale.article_id for sale in sales})
+
+
+@receiver(sales_bulk_created, sender=Sale)
+def update_leaderboard_on_bulk_create(sender, sales, **kwargs):
+    leaderboard.update_on_commit({sale.article_id for sale in sales})
+
+
+@receiver(post_save, sender=Sale)
+@receiver(sales_deleted, sender=Sale)
+@receiver(sales_bulk_created, sender=Sale)
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+@receiver(articles_bulk_imported, sender=Article)
+@receiver(post_save, sender=ArticleCategory)
+@receiver(post_delete, sender=ArticleCategory)
+def invalidate_aggregates_cache(sender, **kwargs):
+    aggregates_cache.bump_version_on_commit()
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+@receiver(articles_bulk_imported, sender=Article)
+@receiver(post_save, sender=ArticleCategory)
+@receiver(post_delete, sender=ArticleCategory)
+def invalidate_reference_data(sender, **kwargs):
+    reference_data.invalidate()
+
+
+# An article may change category (or its revenue be reset)
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+@receiver(articles_bulk_imported, sender=Article)
+def invalidate_leaderboard(sender, **kwargs):
+    leaderboard.invalidate()
+
+
+@receiver(post_migrate)
+def create_sale_partitions(sender, using, **kwargs):
+    """
+    Creates the next partitions of the sales table, once partitioned (see the
+    partition_sales command).
+    """
+    if sender.name == "sales" and is_partitioned(Sale, using=using):
+        create_future_partitions(
+            Sale,
+            "date",
+            settings.SALES_PARTITION_INTERVAL,
+            settings.SALES_PARTITIONS_AHEAD,
+            using=using,
+        )
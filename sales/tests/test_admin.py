@@ -0,0 +1,187 @@
+from datetime import date
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from sales.admin import SaleAdmin
+from sales.fixtures import create_category_article, create_article, create_sale
+from sales.models import Sale
+from users.fixtures import create_user
+from users.models import User
+
+
+class SaleAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(
+            email="admin@test.com", password="VingtCinq#1"
+        )
+        cls.users = [create_user(email=f"user{number}@test.com") for number in range(2)]
+        cls.articles = [
+            create_article(
+                name=f"Article test {number}",
+                code=f"TST{number:03}",
+                category=create_category_article(display_name=f"Cat test {number}"),
+                manufacturing_cost="10.00",
+            )
+            for number in range(2)
+        ]
+        # Sale n: author and article n % 2, from 2021-12-25 (n + 1 days after)
+        cls.sales = []
+        for number in range(250):
+            sale = create_sale(
+                author=cls.users[number % 2],
+                article=cls.articles[number % 2],
+                unit_selling_price="10.00",
+            )
+            # date is set on creation (auto_now_add): updated afterwards
+            Sale.objects.filter(pk=sale.pk).update(
+                date=date.fromordinal(date(2021, 12, 25).toordinal() + number % 10)
+            )
+            cls.sales.append(sale)
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin_user)
+
+    def get_changelist(self, query_string="", **params):
+        response = self.client.get(
+            reverse("admin:sales_sale_changelist") + query_string, params
+        )
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    # TEST 1 : The changelist is paginated with a cursor, in constant queries
+    def test_keyset_pagination(self):
+        with self.assertNumQueries(7) as context:
+            response = self.get_changelist()
+        self.assertNotIn("OFFSET", "".join(query["sql"] for query in context))
+        cl = response.context["cl"]
+        self.assertTrue(cl.keyset)
+        seen = [sale.pk for sale in cl.result_list]
+        pages = [seen]
+        while cl.next_url:
+            with self.assertNumQueries(7):
+                cl = self.get_changelist(cl.next_url).context["cl"]
+            pages.append([sale.pk for sale in cl.result_list])
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(
+            [pk for page in pages for pk in page],
+            list(Sale.objects.order_by("-date", "-id").values_list("pk", flat=True)),
+        )
+        # Back to the previous page
+        cl = self.get_changelist(cl.previous_url).context["cl"]
+        self.assertEqual([sale.pk for sale in cl.result_list], pages[1])
+        self.assertIsNotNone(cl.first_url)
+        # As for the invalid filters
+        response = self.client.get(
+            reverse("admin:sales_sale_changelist"), {"cursor": "x"}
+        )
+        self.assertRedirects(
+            response,
+            reverse("admin:sales_sale_changelist") + "?e=1",
+            fetch_redirect_response=False,
+        )
+
+    # TEST 2 : The rows are counted up to a limit
+    def test_result_count(self):
+        cl = self.get_changelist().context["cl"]
+        self.assertEqual((cl.result_count, cl.result_count_exact), (250, True))
+        with patch.object(SaleAdmin, "count_limit", 100):
+            response = self.get_changelist(author__id__exact=self.users[0].pk)
+        cl = response.context["cl"]
+        self.assertEqual((cl.result_count, cl.result_count_exact), (100, False))
+        self.assertContains(response, "About 100 Sales")
+
+    # TEST 3 : The foreign keys are filtered with autocomplete inputs
+    def test_autocomplete_filters(self):
+        def get_filter_html(response):
+            author_filter = response.context["cl"].filter_specs[1]
+            return "".join(
+                choice["widget"]
+                for choice in author_filter.choices(response.context["cl"])
+            )
+
+        response = self.get_changelist()
+        self.assertContains(response, "admin/js/autocomplete_filter.js")
+        self.assertNotIn("@test.com", get_filter_html(response))
+        response = self.get_changelist(author__id__exact=self.users[0].pk)
+        # The selected author only
+        self.assertIn("user0@test.com", get_filter_html(response))
+        self.assertNotIn("user1@test.com", get_filter_html(response))
+        self.assertTrue(
+            all(
+                sale.author_id == self.users[0].pk
+                for sale in response.context["cl"].result_list
+            )
+        )
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "app_label": "sales",
+                "model_name": "sale",
+                "field_name": "article",
+                "term": "TST001",
+            },
+        )
+        self.assertEqual(
+            [result["id"] for result in response.json()["results"]],
+            [str(self.articles[1].pk)],
+        )
+
+    # TEST 4 : The date hierarchy lists the periods holding sales
+    def test_date_hierarchy(self):
+        response = self.get_changelist()
+        self.assertContains(response, "?date__year=2021")
+        self.assertContains(response, "?date__year=2022")
+        response = self.get_changelist(date__year=2021)
+        self.assertContains(response, "date__month=12")
+        response = self.get_changelist(date__year=2021, date__month=12)
+        for day in range(25, 32):
+            self.assertContains(response, f"date__day={day}")
+        self.assertNotContains(response, "date__day=24")
+        self.assertEqual(response.context["cl"].result_count, 175)
+
+
+class ArticleAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(
+            email="admin@test.com", password="VingtCinq#1"
+        )
+        cls.categories = [
+            create_category_article(display_name=f"Cat test {number}")
+            for number in range(2)
+        ]
+        for number in range(150):
+            create_article(
+                name=f"Article test {number}",
+                code=f"TST{number:03}",
+                category=cls.categories[number % 2],
+                manufacturing_cost="10.00",
+            )
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin_user)
+
+    # TEST 1 : The articles are paginated by code, and filtered by category
+    def test_changelist(self):
+        url = reverse("admin:sales_article_changelist")
+        cl = self.client.get(url).context["cl"]
+        self.assertEqual(cl.result_list[0].code, "TST000")
+        cl = self.client.get(url + cl.next_url).context["cl"]
+        self.assertEqual(
+            [article.code for article in cl.result_list],
+            [f"TST{number:03}" for number in range(100, 150)],
+        )
+        self.assertIsNone(cl.next_url)
+        response = self.client.get(url, {"category__id__exact": self.categories[1].pk})
+        cl = response.context["cl"]
+        self.assertEqual(
+            [article.code for article in cl.result_list][:2], ["TST001", "TST003"]
+        )
+        self.assertEqual(cl.result_count, 75)
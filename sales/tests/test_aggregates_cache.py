@@ -0,0 +1,122 @@
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from utils.tests import PrettyAssertAPITestCase
+from sales.cache import aggregates_cache
+from sales.fixtures import create_category_article, create_article, create_sale
+from users.fixtures import create_user
+
+from sales.models import Sale
+
+
+class BaseAuthTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+
+        # Create a test user:
+        cls.test_user = create_user(email="user@test.com")
+
+        # Create a test article:
+        cls.category_article = create_category_article(display_name="Cat test 1")
+        cls.article = create_article(
+            name="Article test 1",
+            code="TST001",
+            category=cls.category_article,
+            manufacturing_cost="100",
+        )
+
+        # Create a test sale:
+        cls.sale = create_sale(
+            author=cls.test_user,
+            article=cls.article,
+            quantity=2,
+            unit_selling_price="150.00",
+        )
+
+        return super().setUpTestData()
+
+
+class AggregatesCacheTest(BaseAuthTestMixin, PrettyAssertAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.test_user)
+
+    def get_revenue(self, url_name="sales:articles_revenues", **params):
+        response = self.client.get(reverse(url_name), data=params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data["results"][0]["business_revenue"]
+
+    # TEST 1 : A second identical request is served without any query
+    def test_cache_hit(self):
+        for url_name in ("sales:articles_revenues", "sales:sales_revenues"):
+            self.get_revenue(url_name)
+            with self.assertNumQueries(0):
+                self.assertEqual(self.get_revenue(url_name), "300.00")
+        self.assertEqual(aggregates_cache.stats()["hits"], 2)
+        self.assertEqual(aggregates_cache.stats()["misses"], 2)
+
+    # TEST 2 : The query params are part of the cache key
+    def test_cache_key_params(self):
+        self.get_revenue()
+        with self.assertNumQueries(2):
+            self.get_revenue(page_size=10)
+
+    # TEST 3 : Writing a sale invalidates the cached responses
+    def test_invalidation_on_sale_write(self):
+        self.get_revenue()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sale.update(quantity=3)
+        self.assertEqual(self.get_revenue(), "450.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            Sale.objects.get(pk=self.sale.pk).delete()
+        self.assertEqual(self.get_revenue(), "0.00")
+
+    # TEST 4 : Renaming a category invalidates the cached responses
+    def test_invalidation_on_category_write(self):
+        self.get_revenue()
+        self.category_article.display_name = "Cat renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category_article.save()
+        response = self.client.get(reverse("sales:articles_revenues"))
+        self.assertEqual(
+            response.data["results"][0]["category_name"], "Cat renamed", response.data
+        )
+
+    # TEST 5 : Rebuilding the rollups invalidates the cached responses
+    def test_invalidation_on_rebuild(self):
+        for url_name in ("sales:articles_revenues", "sales:sales_revenues"):
+            self.get_revenue(url_name)
+        # Written behind the signals' back
+        Sale.objects.bulk_create(
+            [
+                Sale(
+                    author=self.test_user,
+                    article=self.article,
+                    quantity=1,
+                    unit_selling_price=Decimal("100.00"),
+                )
+            ]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("rebuild_revenues", stdout=StringIO())
+        for url_name in ("sales:articles_revenues", "sales:sales_revenues"):
+            self.assertEqual(self.get_revenue(url_name), "400.00")
+
+    # TEST 6 : A response read from a replica right after a write is not cached
+    def test_replica_lag(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sale.update(quantity=3)
+        # A stub replica: only the routing of the request matters here
+        with patch("sales.cache.get_read_database", return_value="replica_stub"):
+            for _ in range(2):
+                self.assertEqual(self.get_revenue(), "450.00")
+            self.assertEqual(aggregates_cache.stats()["hits"], 0)
+            # Once the replica has caught up
+            with override_settings(DATABASE_REPLICA_STICKINESS=0):
+                for _ in range(2):
+                    self.get_revenue()
+        self.assertEqual(aggregates_cache.stats()["hits"], 1)
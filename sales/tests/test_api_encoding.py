@@ -0,0 +1,161 @@
+import gzip
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from sales.fixtures import create_category_article, create_article, create_sale
+from users.fixtures import create_user
+from utils.middleware import CompressionMiddleware, brotli, parse_accept_encoding
+from utils.renderers import FastJSONRenderer
+from utils.tests import PrettyAssertAPITestCase
+
+
+class FastJSONRendererTest(SimpleTestCase):
+
+    # TEST 1 : The output is the one of the DRF renderer
+    def test_same_output(self):
+        data = {
+            "results": [
+                {
+                    "id": 1,
+                    "name": "Article é \u2028\u2029",
+                    "unit_selling_price": "10.50",
+                    "business_revenue": Decimal("12.30"),
+                    "date": datetime(2022, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+                    "label": gettext_lazy("Label"),
+                    "ratio": 0.25,
+                    "active": True,
+                    "tags": ("a", None),
+                }
+            ],
+            0: {"quantity": ["Invalid"]},
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+        indented = FastJSONRenderer().render(data, "application/json; indent=2", {})
+        self.assertEqual(
+            indented, JSONRenderer().render(data, "application/json; indent=2", {})
+        )
+
+
+class APIEncodingTest(PrettyAssertAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = create_user(email="user@test.com")
+        cls.article = create_article(
+            code="TST001",
+            category=create_category_article(),
+            manufacturing_cost="10.00",
+        )
+        for number in range(50):
+            create_sale(
+                author=cls.test_user,
+                article=cls.article,
+                unit_selling_price=f"{number + 1}.00",
+            )
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.test_user)
+
+    def get_sales(self, accept_encoding=None, **params):
+        headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+        return self.client.get(
+            reverse("sales:sales"), data={"page_size": 50, **params}, headers=headers
+        )
+
+    # TEST 1 : The responses are rendered and the requests parsed with orjson
+    def test_render_and_parse(self):
+        response = self.get_sales()
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        response = self.client.post(
+            reverse("sales:sales"),
+            data=json.dumps(
+                {"article": self.article.pk, "quantity": 2, "unit_selling_price": 12.5}
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["unit_selling_price"], "12.50")
+        response = self.client.post(
+            reverse("sales:sales"), data="{", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("JSON parse error", response.data["detail"])
+
+    # TEST 2 : The large responses are compressed with gzip when accepted
+    def test_gzip(self):
+        content = self.get_sales().content
+        response = self.get_sales("gzip" if brotli is None else "gzip, br;q=0.5")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), content)
+        # The weak ETag still matches
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith("W/"))
+        response = self.client.get(
+            reverse("sales:sales"),
+            data={"page_size": 50},
+            headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+        )
+        self.assertEqual(response.status_code, 304)
+
+    # TEST 3 : The small or refused responses are not compressed
+    def test_not_compressed(self):
+        for accept_encoding in ("identity", "gzip;q=0", "br;q=0, *;q=0"):
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertNotIn("Content-Encoding", self.get_sales(accept_encoding))
+        self.assertNotIn("Content-Encoding", self.get_sales("gzip", page_size=1))
+        with override_settings(API_COMPRESSION_MIN_SIZE=1_000_000):
+            self.assertNotIn("Content-Encoding", self.get_sales("gzip"))
+
+    # TEST 4 : Brotli is preferred when installed
+    @skipUnless(brotli, "brotli is not installed")
+    def test_brotli(self):
+        content = self.get_sales().content
+        response = self.get_sales("gzip, deflate, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), content)
+        self.assertEqual(self.get_sales("gzip, br;q=0.5")["Content-Encoding"], "gzip")
+
+    # TEST 5 : Accept-Encoding is parsed with its q-values
+    def test_parse_accept_encoding(self):
+        self.assertEqual(
+            parse_accept_encoding("gzip, br;q=0.5 , *;q=0, deflate;q=x"),
+            {"gzip": 1.0, "br": 0.5, "*": 0.0, "deflate": 0.0},
+        )
+        self.assertEqual(parse_accept_encoding(""), {})
+
+    # TEST 6 : Brotli is for the API JSON only, the HTML is padded by gzip
+    @patch("utils.middleware.brotli", object())
+    def test_brotli_types(self):
+        middleware = CompressionMiddleware(lambda request: None)
+        request = RequestFactory().get("/", headers={"Accept-Encoding": "gzip, br"})
+        for content_type, encoding in (
+            ("application/json", "br"),
+            ("application/vnd.oai.openapi+json", "br"),
+            ("text/html; charset=utf-8", "gzip"),
+            ("application/javascript", "gzip"),
+        ):
+            with self.subTest(content_type=content_type):
+                response = HttpResponse(content_type=content_type)
+                self.assertEqual(middleware.get_encoding(request, response), encoding)
+
+    # TEST 7 : "*" negotiates brotli, but not gzip (which must be named)
+    def test_any_encoding(self):
+        request = RequestFactory().get("/", headers={"Accept-Encoding": "*"})
+        response = HttpResponse(content_type="application/json")
+        middleware = CompressionMiddleware(lambda request: None)
+        with patch("utils.middleware.brotli", None):
+            self.assertIsNone(middleware.get_encoding(request, response))
+        with patch("utils.middleware.brotli", object()):
+            self.assertEqual(middleware.get_encoding(request, response), "br")
@@ -0,0 +1,144 @@
+import csv
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from sales.cache import reference_data
+from sales.fixtures import create_category_article, create_article
+from sales.models import Article, ArticleRevenue
+from users.fixtures import create_user
+from utils.tests import PrettyAssertAPITestCase
+
+
+class BaseImportTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = create_user(email="user@test.com")
+        cls.category = create_category_article(display_name="Cat test 1")
+        cls.article = create_article(
+            name="Article test 1",
+            code="TST001",
+            category=cls.category,
+            manufacturing_cost="10.00",
+        )
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.test_user)
+
+    def article_data(self, number, **kwargs):
+        return {
+            "code": f"IMP{number:03}",
+            "category": self.category.pk,
+            "name": f"Imported {number}",
+            "manufacturing_cost": "5.50",
+            **kwargs,
+        }
+
+    def import_articles(self, data, **params):
+        path = reverse("sales:article_bulk")
+        if params:
+            path += "?" + "&".join(f"{key}={value}" for key, value in params.items())
+        return self.client.post(path, data=data)
+
+
+class ArticleBulkImportViewTest(BaseImportTestMixin, PrettyAssertAPITestCase):
+
+    # TEST 1 : The articles are created with their revenue rollup
+    def test_import(self):
+        response = self.import_articles([self.article_data(n) for n in range(3)])
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data, {"created": 3, "updated": 0})
+        articles = Article.objects.filter(code__startswith="IMP")
+        self.assertEqual(articles.count(), 3)
+        self.assertEqual(ArticleRevenue.objects.filter(article__in=articles).count(), 3)
+        self.assertIsNotNone(reference_data.get_article_by_code("IMP002"))
+
+    # TEST 2 : The number of queries does not depend on the number of articles
+    def test_set_based_queries(self):
+        reference_data.get_data()
+        self.import_articles([self.article_data(n) for n in range(3)])
+        few = len(self.client.recorded_requests[-1])
+        reference_data.get_data()
+        self.import_articles([self.article_data(n) for n in range(10, 60)])
+        self.assertEqual(len(self.client.recorded_requests[-1]), few)
+
+    # TEST 3 : Errors are reported per row, and nothing is imported
+    def test_errors(self):
+        response = self.import_articles(
+            [
+                self.article_data(1),
+                self.article_data(2, code="imp002"),
+                self.article_data(3, code="TST001"),
+                self.article_data(4, category=0),
+                self.article_data(5, code="IMP005"),
+                self.article_data(6, code="IMP005"),
+            ]
+        )
+        self.assertEqual(response.status_code, 400, response.data)
+        self.assertEqual(
+            response.data,
+            {
+                1: {"code": ["Must be 3 capital letters and 3 digits."]},
+                2: {"code": ["Already exists"]},
+                3: {"category": ['Invalid pk "0" - object does not exist.']},
+                4: {"code": ["Duplicated in the batch."]},
+                5: {"code": ["Duplicated in the batch."]},
+            },
+        )
+        self.assertFalse(Article.objects.filter(code__startswith="IMP").exists())
+
+    # TEST 4 : Existing articles are updated on request
+    def test_update(self):
+        response = self.import_articles(
+            [
+                self.article_data(1, code="TST001", name="Renamed"),
+                self.article_data(2),
+            ],
+            update="true",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data, {"created": 1, "updated": 1})
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.name, "Renamed")
+        self.assertEqual(str(self.article.manufacturing_cost), "5.50")
+        self.assertEqual(reference_data.get_article(self.article.pk).name, "Renamed")
+        self.assertEqual(ArticleRevenue.objects.count(), 2)
+
+
+class ImportArticlesCommandTest(BaseImportTestMixin, PrettyAssertAPITestCase):
+    def write_csv(self, rows):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / "articles.csv"
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(self.article_data(0)))
+            writer.writeheader()
+            writer.writerows(rows)
+        return str(path)
+
+    # TEST 1 : The articles of the file are imported
+    def test_import(self):
+        path = self.write_csv([self.article_data(n) for n in range(5)])
+        output = StringIO()
+        call_command("import_articles", path, stdout=output)
+        self.assertIn("5 articles created, 0 updated.", output.getvalue())
+        self.assertEqual(Article.objects.filter(code__startswith="IMP").count(), 5)
+
+    # TEST 2 : The invalid rows are reported with their line number
+    def test_errors(self):
+        path = self.write_csv(
+            [self.article_data(1), self.article_data(2, code="TST001")]
+        )
+        errors = StringIO()
+        with self.assertRaisesMessage(
+            CommandError, "1 invalid articles, nothing imported."
+        ):
+            call_command("import_articles", path, stderr=errors)
+        self.assertIn("Line 3: code: Already exists", errors.getvalue())
+        call_command("import_articles", path, "--update", stdout=StringIO())
+        self.assertEqual(Article.objects.count(), 2)
@@ -0,0 +1,97 @@
+from unittest import skipIf, skipUnless
+
+from django.db import connection
+from django.urls import reverse
+
+from sales.fixtures import create_category_article, create_article
+from sales.models import Article
+from users.fixtures import create_user
+from utils.tests import PrettyAssertAPITestCase
+
+
+class ArticleSearchTest(PrettyAssertAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = create_user(email="user@test.com")
+        cls.tools = create_category_article(display_name="Garden tools")
+        cls.toys = create_category_article(display_name="Toys")
+        for code, name, category in (
+            ("SHV001", "Shovel", cls.tools),
+            ("SHV002", "Small shovel", cls.tools),
+            ("RAK001", "Rake", cls.tools),
+            ("BAL001", "Ball", cls.toys),
+            ("BAL002", "Beach ball", cls.toys),
+            ("TRC001", "Toy shovel", cls.toys),
+        ):
+            create_article(
+                code=code, name=name, category=category, manufacturing_cost="10.00"
+            )
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.test_user)
+
+    def search(self, **params):
+        response = self.client.get(reverse("sales:articles_search"), data=params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def codes(self, **params):
+        return [article["code"] for article in self.search(**params).data["results"]]
+
+    # TEST 1 : Codes are matched by prefix, case-insensitively, first
+    def test_code_prefix(self):
+        self.assertEqual(self.codes(search="shv"), ["SHV001", "SHV002"])
+        self.assertEqual(self.codes(search="SHV00"), ["SHV001", "SHV002"])
+        self.assertEqual(self.codes(search="HV0"), [])
+        # Then the names starting with the term, then the other names
+        self.assertEqual(self.codes(search="bal"), ["BAL001", "BAL002"])
+        self.assertEqual(self.codes(search="sho"), ["SHV001", "SHV002", "TRC001"])
+
+    # TEST 2 : Names are matched anywhere, or by prefix when the term is short
+    def test_name(self):
+        self.assertEqual(self.codes(search="shovel"), ["SHV001", "SHV002", "TRC001"])
+        self.assertEqual(self.codes(search="all"), ["BAL001", "BAL002", "SHV002"])
+        self.assertEqual(self.codes(search="ra"), ["RAK001"])
+        self.assertEqual(self.codes(search="ke"), [])
+
+    # TEST 3 : Articles are matched by their category name
+    def test_category(self):
+        self.assertEqual(self.codes(search="garden"), ["RAK001", "SHV001", "SHV002"])
+        self.assertEqual(self.codes(search="toy"), ["TRC001", "BAL001", "BAL002"])
+
+    # TEST 4 : Results are paginated, in a constant number of queries
+    def test_pagination(self):
+        response = self.search(search="shovel", page_size=2)
+        self.assertEqual(response.data["count"], 3)
+        self.assertIsNotNone(response.data["next"])
+        self.assertEqual(
+            response.data["results"][0],
+            {
+                "pk": Article.objects.get(code="SHV001").pk,
+                "code": "SHV001",
+                "category": self.tools.pk,
+                "name": "Shovel",
+                "manufacturing_cost": "10.00",
+            },
+        )
+        response = self.search(search="shovel", page_size=2, page=2)
+        self.assertEqual(len(response.data["results"]), 1)
+        response = self.client.get(reverse("sales:articles_search"))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("search", response.data)
+
+    # TEST 5 : Fuzzy search also matches misspelled names (PostgreSQL only)
+    @skipUnless(connection.vendor == "postgresql", "pg_trgm is PostgreSQL only")
+    def test_fuzzy(self):
+        self.assertEqual(self.codes(search="shovl"), [])
+        self.assertEqual(self.codes(search="shovl", fuzzy=True)[0], "SHV001")
+        plan = Article.objects.search("shovel", fuzzy=True).explain()
+        self.assertIn("sales_article_name_trgm_idx", plan)
+
+    # TEST 6 : Elsewhere, fuzzy is ignored
+    @skipIf(connection.vendor == "postgresql", "pg_trgm is PostgreSQL only")
+    def test_fuzzy_ignored(self):
+        self.assertEqual(self.codes(search="shovl", fuzzy=True), [])
+        self.assertEqual(self.codes(search="rake", fuzzy=True), ["RAK001"])
@@ -0,0 +1,133 @@
+from urllib.parse import parse_qsl, urlsplit
+
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import resolve, reverse
+
+from sales.benchmarks import get_sales_urlconf
+from sales.fixtures import create_category_article, create_article, create_sale
+from sales.models import Sale
+from users.fixtures import create_user
+from utils.tests import PrettyAssertAPITestCase
+
+
+class AsyncViewsTest(PrettyAssertAPITestCase):
+    """
+    The async read views answer exactly as the sync ones, within the same
+    query budgets, and still handle the writes of their routes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = create_user(email="user@test.com")
+        categories = [create_category_article() for _ in range(2)]
+        cls.articles = [
+            create_article(
+                code=f"TST{number:03}",
+                category=categories[number % 2],
+                manufacturing_cost="10.00",
+            )
+            for number in range(4)
+        ]
+        cls.sales = [
+            create_sale(
+                author=cls.test_user,
+                article=article,
+                quantity=number + 1,
+                unit_selling_price="15.00",
+            )
+            for number, article in enumerate(cls.articles * 8)
+        ]
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.client.check_queries = True
+        self.client.force_authenticate(user=self.test_user)
+
+    def get(self, name, *, async_views, kwargs=None, data=None):
+        with override_settings(ROOT_URLCONF=get_sales_urlconf(async_views)):
+            path = reverse(f"sales:{name}", kwargs=kwargs)
+            view_class = resolve(path).func.view_class
+            self.assertEqual(view_class.view_is_async, async_views, name)
+            return self.client.get(path, data=data)
+
+    # TEST 1 : The read endpoints return the same data as the sync views
+    def test_same_responses(self):
+        for name, kwargs, data in [
+            ("category", None, None),
+            ("article", None, None),
+            ("article", None, {"ordering": "category"}),
+            ("sales", None, None),
+            ("sales", None, {"page": 2, "page_size": 10}),
+            ("sales", None, {"pagination": "cursor", "page_size": 10}),
+            ("sales", None, {"author": self.test_user.pk}),
+            ("retrieve_update_delete_sales", {"pk": self.sales[0].pk}, None),
+            ("sales_revenues", None, None),
+            ("articles_revenues", None, {"page_size": 2}),
+        ]:
+            sync_response = self.get(name, async_views=False, kwargs=kwargs, data=data)
+            # The revenue reports are shared with the sync views in the cache
+            for cache in caches.all():
+                cache.clear()
+            async_response = self.get(name, async_views=True, kwargs=kwargs, data=data)
+            self.assertEqual(sync_response.status_code, 200, name)
+            self.assertEqual(async_response.status_code, 200, name)
+            self.assertEqual(async_response.data, sync_response.data, name)
+
+    # TEST 2 : The cursor links are followed the same way
+    def test_cursor_pagination(self):
+        ids = []
+        data = {"pagination": "cursor", "page_size": 7}
+        while True:
+            response = self.get("sales", async_views=True, data=data)
+            ids += [sale["id"] for sale in response.data["results"]]
+            if response.data["next"] is None:
+                break
+            data = dict(parse_qsl(urlsplit(response.data["next"]).query))
+        self.assertEqual(
+            ids,
+            list(
+                Sale.objects.order_by("-unit_selling_price", "-id").values_list(
+                    "pk", flat=True
+                )
+            ),
+        )
+
+    # TEST 3 : Missing sales, invalid pages and anonymous users are rejected
+    def test_errors(self):
+        response = self.get(
+            "retrieve_update_delete_sales", async_views=True, kwargs={"pk": 0}
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.get("sales_revenues", async_views=True, data={"page": 99})
+        self.assertEqual(response.status_code, 404)
+        self.client.force_authenticate(user=None)
+        response = self.get("sales", async_views=True)
+        self.assertEqual(response.status_code, 401)
+
+    # TEST 4 : The other methods are handled by the sync views
+    def test_writes(self):
+        sale = self.sales[0]
+        with override_settings(ROOT_URLCONF=get_sales_urlconf(True)):
+            sale_path = reverse(
+                "sales:retrieve_update_delete_sales", kwargs={"pk": sale.pk}
+            )
+            response = self.client.post(
+                reverse("sales:sales"),
+                data={
+                    "article": self.articles[0].pk,
+                    "quantity": 1,
+                    "unit_selling_price": "2.00",
+                },
+            )
+            self.assertEqual(response.status_code, 201, response.data)
+            response = self.client.put(
+                sale_path, data={"quantity": 3, "unit_selling_price": "4.00"}
+            )
+            self.assertEqual(response.status_code, 202, response.data)
+            response = self.client.delete(sale_path)
+            self.assertEqual(response.status_code, 204)
+            response = self.client.options(reverse("sales:category"))
+            self.assertEqual(response.status_code, 200)
+        self.assertFalse(Sale.objects.filter(pk=sale.pk).exists())
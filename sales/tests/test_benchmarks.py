@@ -0,0 +1,95 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from sales.benchmarks import (
+    APIBenchmark,
+    ConcurrencyBenchmark,
+    SearchBenchmark,
+    parse_scale,
+    seed_catalog,
+    seed_sales,
+)
+from sales.models import Article, Sale
+from sales.urls import sales_urlpatterns
+
+
+class APIBenchmarkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_sales(sales=200, batch_size=50)
+        return super().setUpTestData()
+
+    # TEST 1 : Scales are parsed with their suffix
+    def test_parse_scale(self):
+        self.assertEqual(parse_scale("10k"), 10_000)
+        self.assertEqual(parse_scale("1.5M"), 1_500_000)
+        self.assertEqual(parse_scale("250"), 250)
+
+    # TEST 2 : Every route is benchmarked, and every request succeeds
+    def test_run(self):
+        self.assertEqual(Sale.objects.count(), 200)
+        report = APIBenchmark(self.user, iterations=2).run()
+        self.assertGreaterEqual(len(report), len(sales_urlpatterns))
+        for endpoint, measures in report.items():
+            self.assertTrue(
+                all(200 <= status < 300 for status in measures["status"]), endpoint
+            )
+            self.assertLessEqual(measures["p50_ms"], measures["p99_ms"], endpoint)
+            self.assertGreater(measures["peak_memory_kib"], 0, endpoint)
+
+    # TEST 3 : The revenue report variants are compared on the same rows
+    def test_benchmark_revenues(self):
+        output = StringIO()
+        call_command("benchmark_revenues", "--repeat", "1", stdout=output)
+        results = json.loads(output.getvalue())
+        for variant in ("grouped", "subquery"):
+            self.assertEqual(results[variant]["rows"], 100, results)
+            self.assertEqual(results[variant]["queries"], 1, results)
+        self.assertIn("speedup", results)
+
+    # TEST 4 : The JSON renderers and the compressions are compared per page
+    def test_benchmark_renderers(self):
+        output = StringIO()
+        call_command("benchmark_renderers", "--repeat", "1", stdout=output)
+        results = json.loads(output.getvalue())
+        for page in ("sales", "articles"):
+            self.assertGreater(results[page]["rows"], 0, results)
+            for variant in ("drf", "orjson"):
+                self.assertIn("render_cpu_ms", results[page][variant], results)
+            self.assertLess(results[page]["gzip"]["bytes"], results[page]["bytes"])
+
+
+class SearchBenchmarkTest(TestCase):
+
+    # TEST 1 : Every search is benchmarked on the seeded catalog
+    def test_run(self):
+        user = seed_catalog(articles=300, batch_size=100)
+        self.assertEqual(Article.objects.count(), 300)
+        self.assertEqual(seed_catalog(articles=300), user)
+        report = SearchBenchmark(user, iterations=2).run()
+        self.assertIn("code_prefix", report)
+        for search, measures in report.items():
+            self.assertEqual(measures["status"], [200], search)
+            self.assertLessEqual(measures["queries"], 3, search)
+        self.assertGreater(report["code_prefix"]["count"], 0)
+        self.assertEqual(report["no_match"]["count"], 0)
+
+
+class ConcurrencyBenchmarkTest(TransactionTestCase):
+    """
+    The handlers serve the requests from other threads: the seeded data must
+    be committed.
+    """
+
+    # TEST 1 : Every server answers the whole mixed read load
+    def test_run(self):
+        user = seed_sales(sales=100, batch_size=50)
+        report = ConcurrencyBenchmark(user, concurrency=4, requests=28).run()
+        self.assertEqual(list(report), ["wsgi", "asgi_sync", "asgi_async"])
+        for server, measures in report.items():
+            self.assertEqual(measures["status"], [200], server)
+            self.assertGreater(measures["requests_per_s"], 0, server)
+            self.assertLessEqual(measures["p50_ms"], measures["p99_ms"], server)
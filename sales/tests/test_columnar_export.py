@@ -0,0 +1,208 @@
+import os
+from datetime import date
+from decimal import Decimal
+from io import BytesIO, StringIO
+from tempfile import TemporaryDirectory
+from unittest import skipIf, skipUnless
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from sales.columnar import (
+    article_rows,
+    chunk_rows,
+    pyarrow,
+    sale_month,
+    sale_rows,
+    sales_since,
+)
+from sales.fixtures import create_category_article, create_article, create_sale
+from sales.models import Article, ArticleRevenue, Sale
+from users.fixtures import create_user
+from utils.tests import PrettyAssertAPITestCase
+
+
+class ColumnarTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = create_user(email="user@test.com")
+        cls.article = create_article(
+            name="Article test 1",
+            code="TST001",
+            category=create_category_article(display_name="Cat test 1"),
+            manufacturing_cost="100.00",
+        )
+        cls.unsold_article = create_article(
+            name="Article test 2",
+            code="TST002",
+            category=cls.article.category,
+            manufacturing_cost="20.00",
+        )
+        # Two sales in January, one in February, one in March
+        cls.sales = []
+        for day in (
+            date(2021, 1, 2),
+            date(2021, 1, 30),
+            date(2021, 2, 1),
+            date(2021, 3, 5),
+        ):
+            sale = create_sale(
+                author=cls.test_user,
+                article=cls.article,
+                quantity=3,
+                unit_selling_price="150.50",
+            )
+            Sale.objects.filter(pk=sale.pk).update(date=day)
+            cls.sales.append(sale)
+        ArticleRevenue.objects.rebuild()
+        return super().setUpTestData()
+
+
+class ColumnarRowsTest(ColumnarTestMixin, TestCase):
+
+    # TEST 1 : Sales rows are joined with their article, by date
+    def test_sale_rows(self):
+        rows = list(sale_rows(Sale.objects.all()))
+        self.assertEqual(
+            rows[0],
+            (
+                self.sales[0].pk,
+                date(2021, 1, 2),
+                self.test_user.pk,
+                self.article.pk,
+                "TST001",
+                "Article test 1",
+                "Cat test 1",
+                3,
+                Decimal("150.50"),
+                Decimal("451.50"),
+            ),
+        )
+        self.assertEqual([row[0] for row in rows], [sale.pk for sale in self.sales])
+
+    # TEST 2 : Articles rows hold their aggregates, zero when never sold
+    def test_article_rows(self):
+        rows = list(article_rows(Article.objects.all()))
+        self.assertEqual(
+            rows[0][4:],
+            (Decimal("100.00"), Decimal("1806.00"), 12, 4, date(2021, 3, 5)),
+        )
+        self.assertEqual(rows[1][4:], (Decimal("20.00"), 0, 0, 0, None))
+
+    # TEST 3 : Rows are chunked by month, and by size
+    def test_chunk_rows(self):
+        rows = list(sale_rows(Sale.objects.all()))
+        chunks = list(chunk_rows(rows, key=sale_month))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1, 1])
+        chunks = list(chunk_rows(rows, size=1, key=sale_month))
+        self.assertEqual([len(chunk) for chunk in chunks], [1, 1, 1, 1])
+        self.assertEqual([len(chunk) for chunk in chunk_rows(rows, size=3)], [3, 1])
+        self.assertEqual(list(chunk_rows([])), [])
+
+    # TEST 4 : The sales are exported from the watermark to the last id
+    def test_sales_since(self):
+        queryset, until_id = sales_since(Sale.objects.all())
+        self.assertEqual(until_id, self.sales[-1].pk)
+        self.assertEqual(queryset.count(), 4)
+        queryset, until_id = sales_since(Sale.objects.all(), self.sales[1].pk)
+        self.assertEqual(
+            sorted(queryset.values_list("pk", flat=True)),
+            [sale.pk for sale in self.sales[2:]],
+        )
+        queryset, until_id = sales_since(Sale.objects.all(), self.sales[-1].pk)
+        self.assertEqual((queryset.count(), until_id), (0, self.sales[-1].pk))
+        # Sales still being written: the watermark does not move
+        with patch("sales.columnar.wait_for_transactions", return_value=False):
+            queryset, until_id = sales_since(Sale.objects.all(), self.sales[1].pk)
+        self.assertEqual((queryset.count(), until_id), (0, self.sales[1].pk))
+
+
+@skipUnless(pyarrow, "pyarrow is not installed")
+class ColumnarExportTest(ColumnarTestMixin, PrettyAssertAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.test_user)
+
+    def export(self, **params):
+        response = self.client.get(reverse("sales:sales_export_columnar"), data=params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, BytesIO(b"".join(response.streaming_content))
+
+    # TEST 1 : Sales are exported as Parquet, a row group per month
+    def test_export_parquet(self):
+        import pyarrow.parquet
+
+        response, content = self.export()
+        self.assertEqual(response["X-Sales-Watermark"], str(self.sales[-1].pk))
+        parquet_file = pyarrow.parquet.ParquetFile(content)
+        self.assertEqual(parquet_file.num_row_groups, 3)
+        table = parquet_file.read()
+        self.assertEqual(table.num_rows, 4)
+        self.assertEqual(
+            table.column("total_selling_price")[0].as_py(), Decimal("451.50")
+        )
+        self.assertEqual(table.column("date")[3].as_py(), date(2021, 3, 5))
+        # Incremental
+        response, content = self.export(since_id=self.sales[1].pk)
+        table = pyarrow.parquet.read_table(content)
+        self.assertEqual(
+            table.column("id").to_pylist(), [sale.pk for sale in self.sales[2:]]
+        )
+
+    # TEST 2 : Articles are exported as an Arrow stream
+    def test_export_arrow(self):
+        import pyarrow.ipc
+
+        response, content = self.export(dataset="articles", export_format="arrow")
+        self.assertEqual(
+            response["Content-Type"], "application/vnd.apache.arrow.stream"
+        )
+        table = pyarrow.ipc.open_stream(content).read_all()
+        self.assertEqual(table.column("code").to_pylist(), ["TST001", "TST002"])
+        self.assertEqual(table.column("sale_count").to_pylist(), [4, 0])
+
+    # TEST 3 : Every run of the command appends the new sales
+    def test_command(self):
+        import pyarrow.parquet
+
+        with TemporaryDirectory() as output:
+            call_command("export_sales_columnar", "--output", output, stdout=StringIO())
+            sale = create_sale(
+                author=self.test_user,
+                article=self.article,
+                quantity=1,
+                unit_selling_price="10.00",
+            )
+            call_command("export_sales_columnar", "--output", output, stdout=StringIO())
+            files = sorted(os.listdir(os.path.join(output, "sales")))
+            self.assertEqual(len(files), 2)
+            table = pyarrow.parquet.read_table(os.path.join(output, "sales"))
+            self.assertEqual(table.num_rows, 5)
+            self.assertIn(sale.pk, table.column("id").to_pylist())
+            articles = pyarrow.parquet.read_table(
+                os.path.join(output, "articles.parquet")
+            )
+            self.assertEqual(articles.num_rows, 2)
+            # A full export replaces the sales files
+            call_command(
+                "export_sales_columnar", "--output", output, "--full", stdout=StringIO()
+            )
+            self.assertEqual(len(os.listdir(os.path.join(output, "sales"))), 1)
+
+
+@skipIf(pyarrow, "pyarrow is installed")
+class ColumnarExportUnavailableTest(PrettyAssertAPITestCase):
+
+    # TEST 1 : Without pyarrow, the exports are refused
+    def test_unavailable(self):
+        self.client.force_authenticate(user=create_user(email="user@test.com"))
+        response = self.client.get(reverse("sales:sales_export_columnar"))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pyarrow", str(response.data["export_format"]))
+        with TemporaryDirectory() as output:
+            with self.assertRaisesMessage(CommandError, "pyarrow"):
+                call_command("export_sales_columnar", "--output", output)
@@ -0,0 +1,91 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from utils.serializers import compile_serializer
+from utils.tests import PrettyAssertAPITestCase
+from sales.fixtures import create_category_article, create_article, create_sale
+from users.fixtures import create_user
+
+from sales.models import Article, ArticleCategory, Sale
+from sales.serializers import (
+    ArticleSerializer,
+    CategoryArticleSerializer,
+    SaleCreateSerializer,
+    SaleSerializer,
+)
+
+
+class BaseAuthTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+
+        # Create a test user:
+        cls.test_user = create_user(email="user@test.com")
+
+        # Create test articles:
+        cls.category_article = create_category_article(display_name="Cat test 1")
+        cls.articles = [
+            create_article(
+                name=f"Article test {i}",
+                code=f"TST00{i}",
+                category=cls.category_article,
+                manufacturing_cost="99.5",
+            )
+            for i in range(3)
+        ]
+
+        # Create test sales:
+        for i, price in enumerate(("10", "20.5", "20.50", "0.1")):
+            create_sale(
+                author=cls.test_user,
+                article=cls.articles[i % 3],
+                quantity=i + 1,
+                unit_selling_price=price,
+            )
+
+        return super().setUpTestData()
+
+
+class CompiledSerializerTest(BaseAuthTestMixin, PrettyAssertAPITestCase):
+    def assertSameJSON(self, serializer_class, queryset):
+        compiled = compile_serializer(serializer_class)
+        self.assertEqual(
+            JSONRenderer().render(
+                compiled.convert_many(queryset.values(*compiled.lookups))
+            ),
+            JSONRenderer().render(serializer_class(queryset, many=True).data),
+        )
+
+    # TEST 1 : The compiled serializers output the same JSON
+    def test_same_json(self):
+        self.assertSameJSON(SaleSerializer, Sale.objects.order_by("pk"))
+        self.assertSameJSON(SaleCreateSerializer, Sale.objects.order_by("pk"))
+        self.assertSameJSON(ArticleSerializer, Article.objects.order_by("pk"))
+        self.assertSameJSON(
+            CategoryArticleSerializer, ArticleCategory.objects.order_by("pk")
+        )
+
+    # TEST 2 : The list endpoints output the same JSON as the regular path
+    def test_same_list_response(self):
+        self.client.force_authenticate(user=self.test_user)
+        response = self.client.get(reverse("sales:sales"))
+        queryset = Sale.objects.order_by("-unit_selling_price", "-id")
+        self.assertEqual(
+            response.content,
+            JSONRenderer().render(
+                {
+                    "count": 4,
+                    "next": None,
+                    "previous": None,
+                    "results": SaleSerializer(queryset, many=True).data,
+                }
+            ),
+        )
+
+    # TEST 3 : Fields without database column cannot be compiled
+    def test_unsupported_field(self):
+        class NestedSerializer(SaleSerializer):
+            article = ArticleSerializer()
+
+        with self.assertRaises(ImproperlyConfigured):
+            compile_serializer(NestedSerializer)
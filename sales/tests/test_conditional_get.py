@@ -0,0 +1,103 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from sales.benchmarks import get_sales_urlconf
+from sales.fixtures import create_category_article, create_article, create_sale
+from users.fixtures import create_user
+from utils.tests import PrettyAssertAPITestCase
+
+
+class ConditionalGetTest(PrettyAssertAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = create_user(email="user@test.com")
+        cls.category = create_category_article()
+        cls.article = create_article(
+            code="TST001", category=cls.category, manufacturing_cost="10.00"
+        )
+        create_sale(
+            author=cls.test_user, article=cls.article, unit_selling_price="20.00"
+        )
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.test_user)
+
+    def get(self, name, etag=None, **params):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get(reverse(name), data=params, headers=headers)
+
+    def write(self, function, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return function(*args, **kwargs)
+
+    # TEST 1 : A current copy is answered with a 304, without any query
+    def test_not_modified(self):
+        for name in (
+            "sales:category",
+            "sales:article",
+            "sales:sales",
+            "sales:sales_revenues",
+            "sales:articles_revenues",
+            "sales:sales_analytics",
+        ):
+            with self.subTest(name=name):
+                response = self.get(name)
+                self.assertEqual(response.status_code, 200)
+                etag = response["ETag"]
+                with self.assertNumQueries(0):
+                    response = self.get(name, etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], etag)
+                self.assertEqual(response.content, b"")
+                # Weak comparison, as for the other conditional requests
+                self.assertEqual(self.get(name, f'"x", W/{etag}').status_code, 304)
+                self.assertEqual(self.get(name, '"x"').status_code, 200)
+
+    # TEST 2 : The ETag depends on the query string
+    def test_query_string(self):
+        etag = self.get("sales:sales")["ETag"]
+        response = self.get("sales:sales", etag, page_size=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    # TEST 3 : The ETag changes with the data served
+    def test_writes(self):
+        sales_etag = self.get("sales:sales")["ETag"]
+        articles_etag = self.get("sales:article")["ETag"]
+        self.write(
+            create_sale,
+            author=self.test_user,
+            article=self.article,
+            unit_selling_price="30.00",
+        )
+        response = self.get("sales:sales", sales_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        self.assertNotEqual(response["ETag"], sales_etag)
+        # A sale does not change the articles
+        self.assertEqual(self.get("sales:article", articles_etag).status_code, 304)
+        self.article.name = "Renamed"
+        self.write(self.article.save)
+        self.assertEqual(self.get("sales:article", articles_etag).status_code, 200)
+
+    # TEST 4 : The writes and the other views are not affected
+    def test_other_requests(self):
+        etag = self.get("sales:category")["ETag"]
+        response = self.client.post(
+            reverse("sales:category"),
+            data={"display_name": "Cat test 2"},
+            headers={"If-None-Match": etag},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("ETag", response)
+        self.assertNotIn("ETag", self.get("sales:articles_leaderboard"))
+
+    # TEST 5 : The async views answer the conditional requests too
+    def test_async_view(self):
+        etag = self.get("sales:sales")["ETag"]
+        with override_settings(ROOT_URLCONF=get_sales_urlconf(async_views=True)):
+            response = self.get("sales:sales", etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(self.get("sales:sales", '"x"').status_code, 200)
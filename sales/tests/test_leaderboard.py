@@ -0,0 +1,181 @@
+from decimal import Decimal
+
+from django.test import override_settings
+from django.urls import reverse
+
+from sales.cache import leaderboard, reference_data
+from sales.fixtures import create_category_article, create_article, create_sale
+from sales.models import ArticleRevenue, Sale
+from users.fixtures import create_user
+from utils.tests import PrettyAssertAPITestCase
+
+
+class BaseLeaderboardTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = create_user(email="user@test.com")
+        cls.categories = [
+            create_category_article(display_name=f"Cat test {number}")
+            for number in range(2)
+        ]
+        # Revenues: 100, 200, 300 and 400, in alternate categories
+        cls.articles = []
+        for number in range(4):
+            article = create_article(
+                name=f"Article test {number}",
+                code=f"TST{number:03}",
+                category=cls.categories[number % 2],
+                manufacturing_cost="10.00",
+            )
+            create_sale(
+                author=cls.test_user,
+                article=article,
+                quantity=number + 1,
+                unit_selling_price="100.00",
+            )
+            cls.articles.append(article)
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.test_user)
+
+    def get_ranking(self, **params):
+        response = self.client.get(reverse("sales:articles_leaderboard"), data=params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(entry["code"], entry["business_revenue"]) for entry in response.data]
+
+    def write(self, function, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return function(*args, **kwargs)
+
+
+class ArticleLeaderboardViewTest(BaseLeaderboardTestMixin, PrettyAssertAPITestCase):
+
+    # TEST 1 : The articles are ranked by revenue, overall and per category
+    def test_ranking(self):
+        response = self.client.get(
+            reverse("sales:articles_leaderboard"), data={"size": 1}
+        )
+        self.assertEqual(
+            response.data,
+            [
+                {
+                    "rank": 1,
+                    "pk": self.articles[3].pk,
+                    "code": "TST003",
+                    "name": "Article test 3",
+                    "category_name": "Cat test 1",
+                    "business_revenue": "400.00",
+                }
+            ],
+        )
+        self.assertEqual(
+            self.get_ranking(category=self.categories[0].pk),
+            [("TST002", "300.00"), ("TST000", "100.00")],
+        )
+
+    # TEST 2 : The board is read without any query once built
+    def test_cached(self):
+        self.get_ranking()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.get_ranking(size=2), [("TST003", "400.00"), ("TST002", "300.00")]
+            )
+
+    # TEST 3 : The sale writes update the board, without rebuilding it
+    def test_sale_writes(self):
+        self.get_ranking()
+        self.get_ranking(category=self.categories[0].pk)
+        reference_data.get_data()
+        sale = self.write(
+            create_sale,
+            author=self.test_user,
+            article=self.articles[0],
+            quantity=5,
+            unit_selling_price="100.00",
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.get_ranking(size=2), [("TST000", "600.00"), ("TST003", "400.00")]
+            )
+            self.assertEqual(
+                self.get_ranking(category=self.categories[0].pk, size=1),
+                [("TST000", "600.00")],
+            )
+        self.write(Sale.objects.get(pk=sale.pk).delete)
+        self.assertEqual(self.get_ranking(size=1), [("TST003", "400.00")])
+        self.write(
+            Sale.objects.bulk_create_sales,
+            [
+                Sale(
+                    date=sale.date,
+                    author=self.test_user,
+                    article=self.articles[1],
+                    quantity=10,
+                    unit_selling_price=Decimal("100.00"),
+                )
+            ],
+        )
+        self.assertEqual(self.get_ranking(size=1), [("TST001", "1200.00")])
+
+    # TEST 4 : The articles falling out of a full board are replaced
+    @override_settings(SALES_LEADERBOARD_SIZE=2)
+    def test_floor(self):
+        self.assertEqual(
+            self.get_ranking(size=2), [("TST003", "400.00"), ("TST002", "300.00")]
+        )
+        # TST003 falls under TST001, which is not on the board
+        self.write(Sale.objects.filter(article=self.articles[3]).get().delete)
+        self.assertEqual(
+            self.get_ranking(size=2), [("TST002", "300.00"), ("TST001", "200.00")]
+        )
+
+    # TEST 5 : A write concurrent to an update drops the boards
+    def test_concurrent_update(self):
+        self.get_ranking()
+        version = leaderboard.get_version()
+        leaderboard.cache.add(leaderboard.lock_key, True)
+        leaderboard.update({self.articles[0].pk})
+        self.assertNotEqual(leaderboard.get_version(), version)
+        leaderboard.cache.delete(leaderboard.lock_key)
+        self.assertEqual(self.get_ranking(size=1), [("TST003", "400.00")])
+
+    # TEST 6 : The revenues merged are the ones read once locked
+    def test_update_reads_locked_revenues(self):
+        self.get_ranking()
+        ArticleRevenue.objects.filter(article=self.articles[0]).update(
+            business_revenue=Decimal("5000.00")
+        )
+        leaderboard.update({self.articles[0].pk})
+        self.assertEqual(self.get_ranking(size=1), [("TST000", "5000.00")])
+
+    # TEST 7 : The board matches the rollup after random writes
+    def test_consistency(self):
+        self.get_ranking()
+        for number, article in enumerate(self.articles * 2):
+            self.write(
+                create_sale,
+                author=self.test_user,
+                article=article,
+                quantity=(number * 7) % 5 + 1,
+                unit_selling_price="100.00",
+            )
+        self.write(Sale.objects.filter(article=self.articles[2]).first().delete)
+        self.assertEqual(
+            [(entry[0], entry[1]) for entry in leaderboard.get(10)],
+            ArticleRevenue.objects.top(10),
+        )
+
+    # TEST 8 : The size and category are checked
+    def test_invalid_params(self):
+        path = reverse("sales:articles_leaderboard")
+        response = self.client.get(path, data={"size": 51, "category": 0})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data,
+            {
+                "category": ['Invalid pk "0" - object does not exist.'],
+                "size": ["Ensure this value is less than or equal to 50."],
+            },
+        )
@@ -0,0 +1,132 @@
+from datetime import date
+from io import StringIO
+from unittest import skipIf, skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from sales.fixtures import create_category_article, create_article, create_sale
+from sales.models import Sale
+from users.fixtures import create_user
+from utils.partitions import (
+    create_partitions,
+    get_partitions,
+    is_partitioned,
+    next_partition_start,
+    partition_name,
+    partition_start,
+)
+
+
+class PartitionBoundsTest(SimpleTestCase):
+
+    # TEST 1 : The partitions are aligned on months or years
+    def test_bounds(self):
+        day = date(2022, 12, 15)
+        self.assertEqual(partition_start(day, "month"), date(2022, 12, 1))
+        self.assertEqual(partition_start(day, "year"), date(2022, 1, 1))
+        self.assertEqual(
+            next_partition_start(date(2022, 12, 1), "month"), date(2023, 1, 1)
+        )
+        self.assertEqual(
+            next_partition_start(date(2022, 11, 1), "month", 3), date(2023, 2, 1)
+        )
+        self.assertEqual(
+            next_partition_start(date(2022, 1, 1), "year"), date(2023, 1, 1)
+        )
+        self.assertEqual(
+            partition_name(Sale, date(2022, 3, 1), "month"), "sales_sale_p2022_03"
+        )
+        self.assertEqual(
+            partition_name(Sale, date(2022, 1, 1), "year"), "sales_sale_p2022"
+        )
+
+
+@skipIf(connection.vendor == "postgresql", "Partitioning is supported")
+class PartitionSalesCommandTest(TestCase):
+
+    # TEST 1 : Partitioning is refused on the other backends
+    def test_unsupported(self):
+        self.assertFalse(is_partitioned(Sale))
+        with self.assertRaisesMessage(CommandError, "requires PostgreSQL"):
+            call_command("partition_sales", "--convert", stdout=StringIO())
+
+
+@skipUnless(connection.vendor == "postgresql", "Partitioning requires PostgreSQL")
+class SalePartitioningTest(TestCase):
+    """
+    The conversion runs in the transaction of the test: PostgreSQL rolls the
+    DDL statements back with it.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = create_user(email="user@test.com")
+        cls.article = create_article(
+            code="TST001",
+            category=create_category_article(),
+            manufacturing_cost="10.00",
+        )
+        cls.sales = []
+        # date is set on creation (auto_now_add): updated afterwards
+        for day in (date(2022, 1, 10), date(2022, 2, 10), date(2022, 3, 10)):
+            sale = create_sale(
+                author=cls.test_user, article=cls.article, unit_selling_price="10.00"
+            )
+            Sale.objects.filter(pk=sale.pk).update(date=day)
+            cls.sales.append(sale)
+        return super().setUpTestData()
+
+    def convert(self, *args):
+        call_command("partition_sales", "--convert", *args, stdout=StringIO())
+
+    # TEST 1 : The table is converted, its rows kept
+    def test_convert(self):
+        self.convert("--interval", "month", "--ahead", "2")
+        self.assertTrue(is_partitioned(Sale))
+        names = [name for name, bounds in get_partitions(Sale)]
+        for name in (
+            "sales_sale_p2022_01",
+            "sales_sale_p2022_03",
+            "sales_sale_default",
+        ):
+            self.assertIn(name, names)
+        self.assertEqual(
+            list(Sale.objects.order_by("pk").values_list("pk", flat=True)),
+            [sale.pk for sale in self.sales],
+        )
+        # The pks continue, and the Django writes still work
+        sale = create_sale(
+            author=self.test_user, article=self.article, unit_selling_price="10.00"
+        )
+        self.assertGreater(sale.pk, self.sales[-1].pk)
+        sale.update(quantity=3)
+        sale.delete()
+        with self.assertRaisesMessage(CommandError, "already partitioned"):
+            self.convert()
+
+    # TEST 2 : The date filters only scan the partitions of the period
+    def test_pruning(self):
+        self.convert()
+        plan = Sale.objects.in_period(date(2022, 2, 1), date(2022, 2, 28)).explain()
+        self.assertIn("sales_sale_p2022_02", plan)
+        self.assertNotIn("sales_sale_p2022_01", plan)
+        self.assertNotIn("sales_sale_default", plan)
+
+    # TEST 3 : The rows of the default partition are moved to a new partition
+    def test_default_partition(self):
+        self.convert("--interval", "year", "--ahead", "0")
+        sale = create_sale(
+            author=self.test_user, article=self.article, unit_selling_price="10.00"
+        )
+        Sale.objects.filter(pk=sale.pk).update(date=date(2100, 6, 1))
+        self.assertEqual(
+            create_partitions(Sale, "date", date(2100, 1, 1), date(2100, 1, 1), "year"),
+            ["sales_sale_p2100"],
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id FROM sales_sale_p2100")
+            self.assertEqual(cursor.fetchall(), [(sale.pk,)])
+            cursor.execute("SELECT COUNT(*) FROM sales_sale_default")
+            self.assertEqual(cursor.fetchone(), (0,))
@@ -0,0 +1,60 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from sales.cache import aggregates_cache, leaderboard
+from sales.models import Article, ArticleCategory, ArticleRevenue, Sale
+from sales.seeding import FIRST_SALE_DATE, generate_sales
+from users.models import User
+
+
+class PopulateDbTest(TestCase):
+    def populate(self, **options):
+        call_command(
+            "populate_db",
+            *[f"--{name.replace('_', '-')}={value}" for name, value in options.items()],
+            stdout=StringIO(),
+        )
+
+    # TEST 1 : The default dataset keeps its size
+    def test_default_scale(self):
+        self.populate(seed=1)
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(ArticleCategory.objects.count(), 10)
+        self.assertEqual(Article.objects.count(), 100)
+        self.assertEqual(Sale.objects.count(), 1000)
+
+    # TEST 2 : Sales are loaded by chunks, keeping their dates, and rolled up
+    def test_chunked_sales(self):
+        self.populate(
+            users=3, categories=2, articles=5, sales=250, seed=1, batch_size=100
+        )
+        self.assertEqual(Sale.objects.count(), 250)
+        self.assertTrue(Sale.objects.filter(date__year=FIRST_SALE_DATE.year).exists())
+        self.assertEqual(
+            sum(ArticleRevenue.objects.values_list("sale_count", flat=True)), 250
+        )
+
+    # TEST 3 : A seed always generates the same sales
+    def test_reproducible(self):
+        context = {
+            "seed": 7,
+            "user_ids": [1, 2, 3],
+            "articles": [(1, Decimal("10")), (2, Decimal("20"))],
+        }
+        self.assertEqual(
+            generate_sales(3, 50, **context), generate_sales(3, 50, **context)
+        )
+        self.assertNotEqual(
+            generate_sales(3, 50, **context), generate_sales(4, 50, **context)
+        )
+
+    # TEST 4 : The data cached from the rollups is invalidated
+    def test_invalidation(self):
+        versions = aggregates_cache.get_version(), leaderboard.get_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.populate(users=1, categories=1, articles=1, sales=10, seed=1)
+        self.assertNotEqual(aggregates_cache.get_version(), versions[0])
+        self.assertNotEqual(leaderboard.get_version(), versions[1])
@@ -0,0 +1,176 @@
+from unittest.mock import patch
+
+from django.urls import reverse
+from rest_framework import views
+
+from sales.api_views import SaleListCreateView
+from sales.fixtures import create_category_article, create_article, create_sale
+from sales.models import ArticleRevenue, Sale
+from sales.urls import sales_urlpatterns
+from users.fixtures import create_user
+from utils.tests import PrettyAssertAPITestCase, normalize_sql
+
+
+class QueryBudgetsTest(PrettyAssertAPITestCase):
+    """
+    Every endpoint is requested on a dataset of several categories, articles
+    and sales: the number of queries must stay within the view budget, and
+    must not depend on the number of rows (no N+1 queries).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = create_user(email="user@test.com")
+        categories = [create_category_article() for _ in range(3)]
+        cls.articles = [
+            create_article(
+                code=f"TST{number:03}",
+                category=categories[number % 3],
+                manufacturing_cost="10.00",
+            )
+            for number in range(6)
+        ]
+        cls.sales = [
+            create_sale(
+                author=cls.test_user,
+                article=article,
+                quantity=2,
+                unit_selling_price="15.00",
+            )
+            for article in cls.articles * 3
+        ]
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.client.check_queries = True
+        self.client.force_authenticate(user=self.test_user)
+
+    # TEST 1 : Every view declares a budget for each method it handles
+    def test_views_declare_query_budgets(self):
+        for pattern in sales_urlpatterns:
+            view_class = pattern.callback.view_class
+            methods = {
+                method.upper()
+                for method in view_class.http_method_names
+                if method not in ("head", "options")
+                and hasattr(view_class, method)
+                and getattr(view_class, method)
+                is not getattr(views.APIView, method, None)
+            }
+            self.assertLessEqual(
+                methods, set(getattr(view_class, "query_budgets", {})), pattern.name
+            )
+
+    # TEST 2 : Read endpoints stay within their budgets
+    def test_read_endpoints(self):
+        sale = self.sales[0]
+        for path, data in [
+            (reverse("sales:category"), None),
+            (reverse("sales:article"), None),
+            (reverse("sales:sales"), None),
+            (reverse("sales:sales"), {"pagination": "cursor", "page_size": 5}),
+            (reverse("sales:sales_export"), None),
+            (reverse("sales:sales_export"), {"export_format": "ndjson"}),
+            (
+                reverse("sales:retrieve_update_delete_sales", kwargs={"pk": sale.pk}),
+                None,
+            ),
+            (reverse("sales:sales_revenues"), None),
+            (reverse("sales:articles_revenues"), None),
+            (
+                reverse("sales:sales_analytics"),
+                {"period": "week", "group_by": "article"},
+            ),
+        ]:
+            response = self.client.get(path, data=data)
+            self.assertEqual(response.status_code, 200, path)
+
+    # TEST 3 : Write endpoints stay within their budgets
+    def test_write_endpoints(self):
+        article, category = self.articles[0], self.articles[0].category
+        sale_path = reverse(
+            "sales:retrieve_update_delete_sales", kwargs={"pk": self.sales[0].pk}
+        )
+        for method, path, data, status_code in [
+            ("post", reverse("sales:category"), {"display_name": "New"}, 201),
+            (
+                "post",
+                reverse("sales:article"),
+                {
+                    "code": "NEW001",
+                    "category": category.pk,
+                    "name": "New",
+                    "manufacturing_cost": "1.00",
+                },
+                201,
+            ),
+            (
+                "post",
+                reverse("sales:article_bulk"),
+                [
+                    {
+                        "code": f"NEW{number:03}",
+                        "category": category.pk,
+                        "name": "New",
+                        "manufacturing_cost": "1.00",
+                    }
+                    for number in range(2, 12)
+                ],
+                201,
+            ),
+            (
+                "post",
+                reverse("sales:sales"),
+                {"article": article.pk, "quantity": 1, "unit_selling_price": "2.00"},
+                201,
+            ),
+            ("put", sale_path, {"quantity": 1, "unit_selling_price": "2.00"}, 202),
+            ("delete", sale_path, None, 204),
+        ]:
+            response = getattr(self.client, method)(path, data=data, format="json")
+            self.assertEqual(response.status_code, status_code, path)
+
+    # TEST 4 : Bulk creation updates the rollup without a query per article
+    def test_bulk_create_many_articles(self):
+        response = self.client.post(
+            reverse("sales:sales_bulk"),
+            data=[
+                {"article": article.pk, "quantity": 1, "unit_selling_price": "20.00"}
+                for article in self.articles * 2
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        for expected in ArticleRevenue.objects.compute():
+            stored = ArticleRevenue.objects.get(pk=expected.article_id)
+            self.assertEqual(stored.business_revenue, expected.business_revenue)
+            self.assertEqual(stored.total_quantity, expected.total_quantity)
+            self.assertEqual(stored.sale_count, expected.sale_count)
+            self.assertEqual(stored.last_sale_date, expected.last_sale_date)
+
+    # TEST 5 : Repeated similar statements are reported as N+1 queries
+    def test_n_plus_one_detected(self):
+        original_get_queryset = SaleListCreateView.get_queryset
+
+        def get_queryset(view):
+            # Sale.__str__ fetches the article of every sale
+            [str(sale) for sale in Sale.objects.all()]
+            return original_get_queryset(view)
+
+        with patch.object(SaleListCreateView, "get_queryset", get_queryset):
+            with self.assertRaises(AssertionError) as context:
+                self.client.get(reverse("sales:sales"))
+        message = str(context.exception)
+        self.assertIn("budget is 2", message)
+        self.assertIn(f"N+1 queries, {len(self.sales)} similar statements", message)
+        self.assertIn(f"[x{len(self.sales)}]", message)
+
+    # TEST 6 : Statements differing only by their parameters are similar
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql(
+                "SELECT * FROM \"t1\" WHERE id IN (1, 2, 3) AND name = 'O''Neil'"
+            ),
+            'SELECT * FROM "t1" WHERE id IN (...) AND name = ?',
+        )
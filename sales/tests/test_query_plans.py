@@ -0,0 +1,182 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Max
+from django.test import TestCase
+
+from sales.filters import SaleFilterSet
+from sales.fixtures import create_category_article, create_article
+from users.fixtures import create_user
+
+from sales.models import Article, ArticleRevenue, Sale
+
+
+class SeededDatasetMixin:
+    """
+    Seeds enough rows for the planner to prefer the indexes. On PostgreSQL,
+    sequential scans are also disabled so that a missing index shows up in the
+    plan whatever the size of the test dataset.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user() for _ in range(3)]
+        category = create_category_article(display_name="Cat test 1")
+        cls.articles = [
+            create_article(
+                name=f"Article test {i}",
+                code=f"TST{i:03}",
+                category=category,
+                manufacturing_cost="100",
+            )
+            for i in range(20)
+        ]
+        Sale.objects.bulk_create(
+            [
+                Sale(
+                    author=cls.users[i % 3],
+                    article=cls.articles[i % 20],
+                    quantity=i % 7 + 1,
+                    unit_selling_price=Decimal(100 + i % 50),
+                )
+                for i in range(2000)
+            ]
+        )
+        ArticleRevenue.objects.rebuild()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        return super().setUpTestData()
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return super().setUp()
+
+
+class SaleQueryPlanTest(SeededDatasetMixin, TestCase):
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+
+    # TEST 1 : The sales list is read in index order
+    def test_list_ordered_by_price(self):
+        self.assertUsesIndex(
+            Sale.objects.order_by("-unit_selling_price", "-id")[:25],
+            "sales_sale_price_idx",
+        )
+
+    # TEST 2 : The sales list filtered by author is read in index order
+    def test_list_filtered_by_author(self):
+        self.assertUsesIndex(
+            Sale.objects.filter(author=self.users[0]).order_by(
+                "-unit_selling_price", "-id"
+            )[:25],
+            "sales_sale_author_price_idx",
+        )
+
+    # TEST 3 : The last sale date of an article is an index lookup
+    def test_last_sale_date(self):
+        self.assertUsesIndex(
+            Sale.objects.filter(article=self.articles[0])
+            .values("article")
+            .annotate(last_sale_date=Max("date")),
+            "sales_sale_article_date_idx",
+        )
+
+    # TEST 4 : The per-article revenue subquery reads the covering index
+    def test_article_revenues_subquery(self):
+        self.assertUsesIndex(
+            Article.objects.with_revenues_subquery(), "sales_sale_article_date_idx"
+        )
+
+    # TEST 5 : The revenue ranking is read from the rollup index
+    def test_revenue_ranking(self):
+        self.assertUsesIndex(
+            ArticleRevenue.objects.ordered_by_revenue()[:25],
+            "sales_revenue_ranking_idx",
+        )
+
+    # TEST 6 : The article revenue report reads the covering index
+    def test_article_revenues_report(self):
+        self.assertUsesIndex(
+            Article.objects.with_revenues(), "sales_sale_article_date_idx"
+        )
+
+
+class SaleFilterSetQueryPlanTest(SeededDatasetMixin, TestCase):
+    """
+    Every filter of the sales list, with the ordering it is used with, is
+    served by an index (see SaleFilterSet).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Authors selective enough for a filter on a few of them
+        authors = [create_user() for _ in range(20)]
+        Sale.objects.bulk_create(
+            [
+                Sale(
+                    author=authors[i % 20],
+                    article=cls.articles[i % 20],
+                    quantity=1,
+                    unit_selling_price=Decimal(100 + i % 50),
+                )
+                for i in range(2000)
+            ]
+        )
+        # A category of a single article
+        cls.category = create_category_article(display_name="Cat test 2")
+        create_article(
+            name="Article test 100",
+            code="TST100",
+            category=cls.category,
+            manufacturing_cost="100",
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, params, index_name):
+        filterset = SaleFilterSet(
+            params, queryset=Sale.objects.order_by("-unit_selling_price", "-id")
+        )
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        plan = filterset.qs[:25].explain()
+        self.assertIn(index_name, plan, plan)
+
+    # TEST 1 : Filtered by authors
+    def test_authors(self):
+        self.assertUsesIndex(
+            {"author": f"{self.users[0].pk},{self.users[1].pk}"},
+            "sales_sale_author_price_idx",
+        )
+
+    # TEST 2 : Filtered by articles, or by categories
+    def test_articles(self):
+        self.assertUsesIndex(
+            {"article": f"{self.articles[0].pk},{self.articles[1].pk}"},
+            "sales_sale_article_date_idx",
+        )
+        self.assertUsesIndex(
+            {"category": str(self.category.pk)},
+            "sales_sale_article_date_idx",
+        )
+
+    # TEST 3 : Filtered by date range, or ordered by date
+    def test_dates(self):
+        self.assertUsesIndex(
+            {"date_from": "2022-01-01", "date_to": "2022-01-31", "ordering": "-date"},
+            "sales_sale_date_idx",
+        )
+        self.assertUsesIndex({"ordering": "date"}, "sales_sale_date_idx")
+
+    # TEST 4 : Filtered by price range
+    def test_prices(self):
+        self.assertUsesIndex(
+            {"price_min": "110", "price_max": "120"}, "sales_sale_price_idx"
+        )
+        self.assertUsesIndex(
+            {"author": str(self.users[0].pk), "price_min": "110"},
+            "sales_sale_author_price_idx",
+        )
@@ -0,0 +1,152 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from sales.cache import ReferenceDataCache, reference_data
+from sales.fixtures import create_category_article, create_article
+from sales.models import Article
+from users.fixtures import create_user
+from utils.routers import read_from_replica
+from utils.tests import PrettyAssertAPITestCase
+
+
+class BaseReferenceTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = create_user(email="user@test.com")
+        cls.category = create_category_article(display_name="Cat test 1")
+        cls.articles = [
+            create_article(
+                name=f"Article test {i}",
+                code=f"TST{i:03}",
+                category=cls.category,
+                manufacturing_cost="10",
+            )
+            for i in range(3)
+        ]
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.test_user)
+
+    def assertNoReferenceQueries(self):
+        statements = self.client.recorded_requests[-1].statements
+        for statement in statements:
+            self.assertNotRegex(
+                statement, r'^SELECT .* FROM "sales_article(category)?"( |$)'
+            )
+
+
+class ReferenceDataCacheTest(BaseReferenceTestMixin, PrettyAssertAPITestCase):
+
+    # TEST 1 : The maps are loaded at once, and read without queries
+    def test_maps(self):
+        with self.assertNumQueries(2):
+            reference_data.get_data()
+        with self.assertNumQueries(0):
+            article = reference_data.get_article(self.articles[0].pk)
+            self.assertEqual(article.code, "TST000")
+            self.assertEqual(article.category.display_name, "Cat test 1")
+            self.assertEqual(
+                reference_data.get_article_by_code("TST001").pk, self.articles[1].pk
+            )
+            self.assertEqual(
+                reference_data.get_category(self.category.pk).pk, self.category.pk
+            )
+            self.assertIsNone(reference_data.get_article(0))
+
+    # TEST 2 : The hot paths make no reference data query once loaded
+    def test_hot_paths(self):
+        reference_data.get_data()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("sales:article"))
+        self.assertEqual(len(response.data), 3)
+        response = self.client.post(
+            reverse("sales:sales"),
+            data={
+                "article": self.articles[0].pk,
+                "quantity": 1,
+                "unit_selling_price": "20.00",
+            },
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertNoReferenceQueries()
+        response = self.client.post(
+            reverse("sales:sales_bulk"),
+            data=[
+                {"article": article.pk, "quantity": 1, "unit_selling_price": "20.00"}
+                for article in self.articles
+            ],
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertNoReferenceQueries()
+
+    # TEST 3 : Writes are visible to every worker
+    def test_invalidation(self):
+        other_worker = ReferenceDataCache(reference_data.prefix)
+        self.assertIsNone(other_worker.get_article_by_code("NEW001"))
+        response = self.client.post(
+            reverse("sales:article"),
+            data={
+                "name": "New",
+                "code": "NEW001",
+                "category": self.category.pk,
+                "manufacturing_cost": "1.00",
+            },
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIsNotNone(other_worker.get_article_by_code("NEW001"))
+        response = self.client.get(reverse("sales:article"))
+        self.assertIn("NEW001", [article["code"] for article in response.data])
+
+        self.category.display_name = "Renamed"
+        self.category.save()
+        article = other_worker.get_article(self.articles[0].pk)
+        self.assertEqual(article.category.display_name, "Renamed")
+
+    # TEST 4 : The rows missing from the cache are still found in the database
+    def test_missing_rows(self):
+        reference_data.get_data()
+        # bulk_create() sends no signal: the cache is not invalidated
+        (article,) = Article.objects.bulk_create(
+            [
+                Article(
+                    code="BLK001",
+                    category=self.category,
+                    name="Bulk",
+                    manufacturing_cost="1.00",
+                )
+            ]
+        )
+        for path, data in [
+            (
+                reverse("sales:sales"),
+                {"article": article.pk, "quantity": 1, "unit_selling_price": "2.00"},
+            ),
+            (
+                reverse("sales:sales_bulk"),
+                [{"article": article.pk, "quantity": 1, "unit_selling_price": "2.00"}],
+            ),
+        ]:
+            response = self.client.post(path, data=data)
+            self.assertEqual(response.status_code, 201, response.data)
+
+    # TEST 5 : Unknown pks are still rejected
+    def test_unknown_article(self):
+        response = self.client.post(
+            reverse("sales:sales"),
+            data={"article": 0, "quantity": 1, "unit_selling_price": "2.00"},
+        )
+        self.assertEqual(response.status_code, 400, response.data)
+        self.assertEqual(
+            str(response.data["article"][0]), 'Invalid pk "0" - object does not exist.'
+        )
+
+    # TEST 6 : The reference data is loaded from the primary, never a replica
+    @override_settings(DATABASE_REPLICAS=["replica_stub"])
+    def test_load_from_primary(self):
+        reference_data.invalidate()
+        # The stub replica has no connection: a read from it would fail
+        with read_from_replica():
+            article = reference_data.get_article(self.articles[0].pk)
+        self.assertEqual(article.code, "TST000")
@@ -0,0 +1,136 @@
+from datetime import date
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import router
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from sales.benchmarks import get_sales_urlconf
+from sales.fixtures import create_category_article, create_article, create_sale
+from sales.models import Article, ArticleCategory, Sale
+from users.fixtures import create_user
+from users.models import User
+from utils.routers import is_pinned_to_primary, pin_to_primary, read_from_replica
+from utils.tests import PrettyAssertAPITestCase
+
+# Configured with `db_replicas` (main/settings/db.py): every replica gets its
+# own test database, e.g. a second local PostgreSQL database
+REPLICAS = [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+
+
+@override_settings(DATABASE_REPLICAS=["replica_test"])
+class PrimaryReplicaRouterTest(TestCase):
+
+    # TEST 1 : Reads go to a replica in a replica reads context only
+    def test_read_database(self):
+        self.assertEqual(router.db_for_read(Sale), "default")
+        with read_from_replica():
+            self.assertEqual(router.db_for_read(Sale), "replica_test")
+            self.assertEqual(router.db_for_write(Sale), "default")
+        self.assertEqual(router.db_for_read(Sale), "default")
+        with override_settings(DATABASE_REPLICAS=[]), read_from_replica():
+            self.assertEqual(router.db_for_read(Sale), "default")
+
+    # TEST 2 : Users are pinned to the primary for a short while
+    def test_stickiness(self):
+        user = create_user(email="user@test.com")
+        self.assertFalse(is_pinned_to_primary(user))
+        pin_to_primary(user)
+        self.assertTrue(is_pinned_to_primary(user))
+        caches[settings.DATABASE_REPLICA_STICKINESS_CACHE_ALIAS].clear()
+        self.assertFalse(is_pinned_to_primary(user))
+        with override_settings(DATABASE_REPLICAS=[]):
+            pin_to_primary(user)
+            self.assertFalse(is_pinned_to_primary(user))
+
+
+@skipUnless(REPLICAS, "No replica database configured")
+class ReplicaRoutingTest(PrettyAssertAPITestCase):
+    """
+    The replica holds a sale the primary does not have (and conversely), to
+    tell which database each request reads from.
+    """
+
+    databases = {"default", *REPLICAS}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.replica = REPLICAS[0]
+        cls.test_user = create_user(email="user@test.com")
+        cls.article = create_article(
+            code="TST001",
+            category=create_category_article(),
+            manufacturing_cost="10.00",
+        )
+        for model in (User, ArticleCategory, Article):
+            model.objects.using(cls.replica).bulk_create(model.objects.all())
+        cls.primary_sale = create_sale(
+            author=cls.test_user, article=cls.article, unit_selling_price="10.00"
+        )
+        (cls.replica_sale,) = Sale.objects.using(cls.replica).bulk_create(
+            [
+                Sale(
+                    date=date(2022, 1, 1),
+                    author=cls.test_user,
+                    article=cls.article,
+                    quantity=1,
+                    unit_selling_price="20.00",
+                )
+            ]
+        )
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        caches[settings.DATABASE_REPLICA_STICKINESS_CACHE_ALIAS].clear()
+        self.client.force_authenticate(user=self.test_user)
+        replicas = override_settings(DATABASE_REPLICAS=[self.replica])
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+
+    def get_sale_ids(self):
+        response = self.client.get(reverse("sales:sales"))
+        self.assertEqual(response.status_code, 200, response.data)
+        return {sale["id"] for sale in response.data["results"]}
+
+    # TEST 1 : The read-only views read from the replica
+    def test_reads_from_replica(self):
+        self.assertEqual(self.get_sale_ids(), {self.replica_sale.pk})
+        response = self.client.get(
+            reverse(
+                "sales:retrieve_update_delete_sales",
+                kwargs={"pk": self.replica_sale.pk},
+            )
+        )
+        self.assertEqual(response.status_code, 200)
+        # The database is chosen in a worker thread for the async views
+        with override_settings(ROOT_URLCONF=get_sales_urlconf(async_views=True)):
+            self.assertEqual(self.get_sale_ids(), {self.replica_sale.pk})
+
+    # TEST 2 : Writes go to the primary, and pin the user to it for a while
+    def test_read_your_writes(self):
+        response = self.client.post(
+            reverse("sales:sales"),
+            data={
+                "article": self.article.pk,
+                "quantity": 1,
+                "unit_selling_price": "30.00",
+            },
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        new_sale = Sale.objects.using("default").get(pk=response.data["pk"])
+        self.assertEqual(self.get_sale_ids(), {self.primary_sale.pk, new_sale.pk})
+        # Once the stickiness window is over
+        caches[settings.DATABASE_REPLICA_STICKINESS_CACHE_ALIAS].clear()
+        self.assertEqual(self.get_sale_ids(), {self.replica_sale.pk})
+
+    # TEST 3 : The reporting commands read from the replica
+    def test_export_from_replica(self):
+        output = StringIO()
+        call_command("export_sales", "--format", "ndjson", stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), 1)
+        self.assertIn('"unit_selling_price": "20.00"', output.getvalue())
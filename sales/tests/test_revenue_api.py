@@ -0,0 +1,280 @@
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from utils.tests import PrettyAssertAPITestCase, get_auth_header_for_user
+from sales.fixtures import create_category_article, create_article, create_sale
+from users.fixtures import create_user
+
+from sales.managers import DailyArticleRevenueQuerySet
+from sales.models import Article, ArticleRevenue, DailyArticleRevenue, Sale
+
+
+class BaseAuthTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+
+        # Create a test user:
+        cls.test_user = create_user(email="user@test.com")
+        cls.auth_headers = get_auth_header_for_user(cls.test_user)
+
+        # Create a test category_article:
+        cls.category_article = create_category_article(display_name="Cat test 1")
+
+        # Create two test articles (which belong to the test category):
+        cls.article = create_article(
+            name="Article test 1",
+            code="TST001",
+            category=cls.category_article,
+            manufacturing_cost="100",
+        )
+        cls.other_article = create_article(
+            name="Article test 2",
+            code="TST002",
+            category=cls.category_article,
+            manufacturing_cost="10",
+        )
+
+        # Create test sales:
+        cls.sale = create_sale(
+            author=cls.test_user,
+            article=cls.article,
+            quantity=2,
+            unit_selling_price="150.00",
+        )
+        create_sale(
+            author=cls.test_user,
+            article=cls.other_article,
+            quantity=1,
+            unit_selling_price="20.00",
+        )
+
+        return super().setUpTestData()
+
+
+class ArticleRevenueRollupTest(BaseAuthTestMixin, PrettyAssertAPITestCase):
+    def assertRollupUpToDate(self):
+        for expected in ArticleRevenue.objects.compute():
+            stored = ArticleRevenue.objects.get(pk=expected.article_id)
+            for field in (
+                "business_revenue",
+                "total_quantity",
+                "sale_count",
+                "last_sale_date",
+            ):
+                self.assertEqual(
+                    getattr(stored, field), getattr(expected, field), field
+                )
+
+    # TEST 1 : Creating sales adds them to the rollup
+    def test_create_sale(self):
+        create_sale(
+            author=self.test_user,
+            article=self.article,
+            quantity="3",
+            unit_selling_price="120.00",
+        )
+        rollup = ArticleRevenue.objects.get(article=self.article)
+        self.assertEqual(rollup.business_revenue, Decimal("660.00"))
+        self.assertEqual(rollup.total_quantity, 5)
+        self.assertEqual(rollup.sale_count, 2)
+        self.assertRollupUpToDate()
+
+    # TEST 2 : Updating a sale replaces its previous values in the rollup
+    def test_update_sale(self):
+        self.sale.update(quantity=1, unit_selling_price=Decimal("110.00"))
+        rollup = ArticleRevenue.objects.get(article=self.article)
+        self.assertEqual(rollup.business_revenue, Decimal("110.00"))
+        self.assertEqual(rollup.sale_count, 1)
+        self.assertRollupUpToDate()
+
+    # TEST 3 : Moving a sale to another article updates both rollups
+    def test_update_sale_article(self):
+        self.sale.update(article=self.other_article)
+        self.assertEqual(ArticleRevenue.objects.get(article=self.article).sale_count, 0)
+        self.assertEqual(
+            ArticleRevenue.objects.get(article=self.other_article).sale_count, 2
+        )
+        self.assertRollupUpToDate()
+
+    # TEST 4 : Deleting a sale removes it from the rollup
+    def test_delete_sale(self):
+        Sale.objects.get(pk=self.sale.pk).delete()
+        rollup = ArticleRevenue.objects.get(article=self.article)
+        self.assertEqual(rollup.business_revenue, Decimal("0.00"))
+        self.assertIsNone(rollup.last_sale_date)
+        self.assertRollupUpToDate()
+
+    # TEST 5 : The command rebuilds rows written behind the signals' back
+    def test_rebuild_command(self):
+        Sale.objects.bulk_create(
+            [
+                Sale(
+                    author=self.test_user,
+                    article=self.article,
+                    quantity=1,
+                    unit_selling_price=Decimal("100.00"),
+                )
+            ]
+        )
+        call_command("rebuild_revenues", stdout=StringIO())
+        self.assertEqual(
+            ArticleRevenue.objects.get(article=self.article).business_revenue,
+            Decimal("400.00"),
+        )
+        self.assertRollupUpToDate()
+
+    # TEST 6 : A sale is not saved nor deleted when its rollups cannot be updated
+    def test_atomic_rollups(self):
+        with patch.object(
+            DailyArticleRevenueQuerySet, "add_sale", side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                self.sale.update(quantity=5)
+        with patch.object(
+            DailyArticleRevenueQuerySet, "remove_sale", side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                Sale.objects.get(pk=self.sale.pk).delete()
+        self.assertEqual(Sale.objects.get(pk=self.sale.pk).quantity, 2)
+        self.assertRollupUpToDate()
+
+    # TEST 7 : Deleting many sales computes the rollups of their articles again
+    def test_delete_sales(self):
+        create_sale(
+            author=self.test_user,
+            article=self.article,
+            quantity=1,
+            unit_selling_price="10.00",
+        )
+        Sale.objects.filter(article=self.article, quantity=2).delete()
+        self.assertEqual(
+            ArticleRevenue.objects.get(article=self.article).business_revenue,
+            Decimal("10.00"),
+        )
+        Sale.objects.all().delete()
+        self.assertRollupUpToDate()
+        self.assertFalse(DailyArticleRevenue.objects.filter(sale_count__gt=0))
+
+    # TEST 8 : Deleting an article deletes its sales without loading them
+    def test_delete_article(self):
+        def count_queries(article):
+            with CaptureQueriesContext(connection) as context:
+                article.delete()
+            return len(context.captured_queries)
+
+        for number in range(10):
+            create_sale(
+                author=self.test_user,
+                article=self.other_article,
+                quantity=1,
+                unit_selling_price="10.00",
+            )
+        self.assertEqual(count_queries(self.other_article), count_queries(self.article))
+        self.assertFalse(Sale.objects.exists())
+        self.assertFalse(ArticleRevenue.objects.exists())
+
+
+class ArticleRevenueReportTest(BaseAuthTestMixin, PrettyAssertAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # Same revenue as other_article, and an article never sold
+        self.tied_article = create_article(
+            name="Article test 3",
+            code="TST003",
+            category=self.category_article,
+            manufacturing_cost="10",
+        )
+        create_sale(
+            author=self.test_user,
+            article=self.tied_article,
+            quantity=2,
+            unit_selling_price="10.00",
+        )
+        self.unsold_article = create_article(
+            name="Article test 4",
+            code="TST004",
+            category=self.category_article,
+            manufacturing_cost="10",
+        )
+
+    # TEST 1 : Every total of every article, by decreasing revenue then pk
+    def test_article_revenues(self):
+        report = [
+            (
+                article.pk,
+                article.business_revenue,
+                article.total_quantity,
+                article.sale_count,
+                article.margin_percentage,
+                article.category_name,
+            )
+            for article in Article.objects.with_revenues()
+        ]
+        self.assertEqual(
+            report,
+            [
+                (self.article.pk, Decimal("300.00"), 2, 1, 50.0, "Cat test 1"),
+                (self.other_article.pk, Decimal("20.00"), 1, 1, 100.0, "Cat test 1"),
+                (self.tied_article.pk, Decimal("20.00"), 2, 1, 0.0, "Cat test 1"),
+                (self.unsold_article.pk, Decimal("0.00"), 0, 0, None, "Cat test 1"),
+            ],
+        )
+        last_sale_dates = dict(
+            Article.objects.with_revenues().values_list("pk", "last_sale_date")
+        )
+        self.assertEqual(last_sale_dates[self.article.pk], self.sale.date)
+        self.assertIsNone(last_sale_dates[self.unsold_article.pk])
+
+    # TEST 2 : The sales side gives one row per article sold
+    def test_sale_revenues(self):
+        create_sale(
+            author=self.test_user,
+            article=self.article,
+            quantity=1,
+            unit_selling_price="100.00",
+        )
+        report = [
+            (row["article"], row["business_revenue"], row["sale_count"])
+            for row in Sale.objects.with_revenues()
+        ]
+        self.assertEqual(
+            report,
+            [
+                (self.article.pk, Decimal("400.00"), 2),
+                (self.other_article.pk, Decimal("20.00"), 1),
+                (self.tied_article.pk, Decimal("20.00"), 1),
+            ],
+        )
+
+
+class ArticleListAgregatedViewTest(BaseAuthTestMixin, PrettyAssertAPITestCase):
+
+    # TEST 1 : Articles are listed by decreasing revenue
+    def test_list_articles_revenues(self):
+        self.client.force_authenticate(user=self.test_user)
+        response = self.client.get(path=reverse("sales:articles_revenues"))
+        self.assertEqual(response.status_code, 200, response.data)
+        results = response.data["results"]
+        self.assertEqual(
+            [row["pk"] for row in results], [self.article.pk, self.other_article.pk]
+        )
+        self.assertEqual(results[0]["business_revenue"], "300.00", results)
+        self.assertEqual(results[0]["margin_percentage"], "50.00", results)
+        self.assertEqual(results[0]["category_name"], "Cat test 1", results)
+
+
+class SaleListAgregatedViewTest(BaseAuthTestMixin, PrettyAssertAPITestCase):
+
+    # TEST 1 : Revenues are listed by decreasing revenue
+    def test_list_sales_revenues(self):
+        self.client.force_authenticate(user=self.test_user)
+        response = self.client.get(path=reverse("sales:sales_revenues"))
+        self.assertEqual(response.status_code, 200, response.data)
+        results = response.data["results"]
+        self.assertEqual(results[0]["article"], self.article.pk, results)
+        self.assertEqual(results[0]["business_revenue"], "300.00", results)
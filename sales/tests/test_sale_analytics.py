@@ -0,0 +1,208 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from sales.fixtures import create_category_article, create_article, create_sale
+from sales.models import DailyArticleRevenue, Sale
+from users.fixtures import create_user
+from utils.tests import PrettyAssertAPITestCase
+
+
+class BaseAnalyticsTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = create_user(email="user@test.com")
+        cls.category = create_category_article(display_name="Cat A")
+        cls.other_category = create_category_article(display_name="Cat B")
+        cls.article = create_article(
+            name="Article A",
+            code="TST001",
+            category=cls.category,
+            manufacturing_cost="10.00",
+        )
+        cls.other_article = create_article(
+            name="Article B",
+            code="TST002",
+            category=cls.other_category,
+            manufacturing_cost="5.00",
+        )
+        # Monday 2022-01-03, Sunday 2022-01-09, Monday 2022-01-10, 2022-02-01
+        for sale_date, article, quantity, unit_selling_price in [
+            (date(2022, 1, 3), cls.article, 2, "15.00"),
+            (date(2022, 1, 3), cls.other_article, 1, "10.00"),
+            (date(2022, 1, 9), cls.article, 1, "20.00"),
+            (date(2022, 1, 10), cls.other_article, 4, "6.00"),
+            (date(2022, 2, 1), cls.article, 1, "12.00"),
+        ]:
+            sale = create_sale(
+                author=cls.test_user,
+                article=article,
+                quantity=quantity,
+                unit_selling_price=unit_selling_price,
+            )
+            # The sale date is set on creation
+            sale.update(date=sale_date)
+        return super().setUpTestData()
+
+    def get_analytics(self, **params):
+        self.client.force_authenticate(user=self.test_user)
+        return self.client.get(reverse("sales:sales_analytics"), data=params)
+
+    def assertDailyRollupUpToDate(self):
+        stored = {
+            (row.article_id, row.date): (
+                row.business_revenue,
+                row.total_quantity,
+                row.sale_count,
+            )
+            for row in DailyArticleRevenue.objects.filter(sale_count__gt=0)
+        }
+        expected = {
+            (row.article_id, row.date): (
+                row.business_revenue,
+                row.total_quantity,
+                row.sale_count,
+            )
+            for row in DailyArticleRevenue.objects.compute()
+        }
+        self.assertEqual(stored, expected)
+
+
+class SaleAnalyticsViewTest(BaseAnalyticsTestMixin, PrettyAssertAPITestCase):
+
+    # TEST 1 : Daily buckets, in chronological order
+    def test_daily_buckets(self):
+        response = self.get_analytics()
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            [
+                (row["period"], row["business_revenue"], row["total_quantity"])
+                for row in response.data["results"]
+            ],
+            [
+                ("2022-01-03", "40.00", 3),
+                ("2022-01-09", "20.00", 1),
+                ("2022-01-10", "24.00", 4),
+                ("2022-02-01", "12.00", 1),
+            ],
+        )
+        self.assertNotIn("category", response.data["results"][0])
+
+    # TEST 2 : Weekly buckets start on mondays
+    def test_weekly_buckets(self):
+        response = self.get_analytics(period="week")
+        self.assertEqual(
+            [
+                (row["period"], row["business_revenue"], row["sale_count"])
+                for row in response.data["results"]
+            ],
+            [
+                ("2022-01-03", "60.00", 3),
+                ("2022-01-10", "24.00", 1),
+                ("2022-01-31", "12.00", 1),
+            ],
+        )
+
+    # TEST 3 : Monthly buckets per category, with their margin
+    def test_monthly_buckets_by_category(self):
+        response = self.get_analytics(period="month", group_by="category")
+        self.assertEqual(
+            response.data["results"],
+            [
+                {
+                    "period": "2022-01-01",
+                    "category": self.category.pk,
+                    "category_name": "Cat A",
+                    "business_revenue": "50.00",
+                    "total_quantity": 3,
+                    "sale_count": 2,
+                    "margin_percentage": "66.67",
+                },
+                {
+                    "period": "2022-01-01",
+                    "category": self.other_category.pk,
+                    "category_name": "Cat B",
+                    "business_revenue": "34.00",
+                    "total_quantity": 5,
+                    "sale_count": 2,
+                    "margin_percentage": "36.00",
+                },
+                {
+                    "period": "2022-02-01",
+                    "category": self.category.pk,
+                    "category_name": "Cat A",
+                    "business_revenue": "12.00",
+                    "total_quantity": 1,
+                    "sale_count": 1,
+                    "margin_percentage": "20.00",
+                },
+            ],
+        )
+
+    # TEST 4 : Buckets per article, restricted to a date range
+    def test_article_buckets_in_range(self):
+        response = self.get_analytics(
+            period="month",
+            group_by="article",
+            date_from="2022-01-04",
+            date_to="2022-01-31",
+        )
+        self.assertEqual(
+            [
+                (row["article"], row["article_code"], row["business_revenue"])
+                for row in response.data["results"]
+            ],
+            [
+                (self.other_article.pk, "TST002", "24.00"),
+                (self.article.pk, "TST001", "20.00"),
+            ],
+        )
+
+    # TEST 5 : Invalid parameters are rejected
+    def test_invalid_parameters(self):
+        for params in [
+            {"period": "year"},
+            {"group_by": "author"},
+            {"date_from": "2022-02-01", "date_to": "2022-01-01"},
+        ]:
+            response = self.get_analytics(**params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class DailyArticleRevenueRollupTest(BaseAnalyticsTestMixin, PrettyAssertAPITestCase):
+
+    # TEST 1 : The rollup follows the created, updated and deleted sales
+    def test_rollup_follows_sale_writes(self):
+        self.assertDailyRollupUpToDate()
+        sale = Sale.objects.filter(date=date(2022, 1, 9)).get()
+        sale.update(date=date(2022, 1, 3), quantity=3)
+        self.assertDailyRollupUpToDate()
+        sale.delete()
+        self.assertDailyRollupUpToDate()
+        Sale.objects.bulk_create_sales(
+            [
+                Sale(
+                    author=self.test_user,
+                    article=article,
+                    quantity=1,
+                    unit_selling_price=Decimal("1.00"),
+                )
+                for article in (self.article, self.other_article, self.article)
+            ]
+        )
+        self.assertDailyRollupUpToDate()
+
+    # TEST 2 : The rebuild command reports and repairs a drifted rollup
+    def test_rebuild_revenues(self):
+        DailyArticleRevenue.objects.filter(date=date(2022, 1, 3)).delete()
+        output = StringIO()
+        call_command("rebuild_revenues", "--check", stdout=output)
+        self.assertIn("2 daily article revenues drifted", output.getvalue())
+        call_command("rebuild_revenues", stdout=StringIO())
+        self.assertDailyRollupUpToDate()
+        output = StringIO()
+        call_command("rebuild_revenues", "--check", stdout=output)
+        self.assertIn("Daily article revenues are up to date", output.getvalue())
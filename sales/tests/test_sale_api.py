@@ -1,10 +1,13 @@
 from pprint import pprint
+from unittest.mock import patch
+
 from django.urls import reverse
 from utils.tests import PrettyAssertAPITestCase, get_auth_header_for_user
 from sales.fixtures import create_category_article, create_article, create_sale
 from users.fixtures import create_user
 
-from sales.models import Sale
+from sales.cache import reference_data
+from sales.models import ArticleRevenue, Sale
 
 
 class BaseAuthTestMixin:
@@ -74,3 +77,76 @@ class SaleListCreateViewTest(BaseAuthTestMixin, PrettyAssertAPITestCase):
 
 class RetrieveUpdateDeleteSaleViewTest(BaseAuthTestMixin, PrettyAssertAPITestCase):
     pass
+
+
+class SaleBulkCreateViewTest(BaseAuthTestMixin, PrettyAssertAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.test_user)
+
+    def bulk_data(self, count):
+        return [
+            {"article": self.article.pk, "quantity": 2, "unit_selling_price": "150.00"}
+            for _ in range(count)
+        ]
+
+    # TEST 1 : Test the creation of many sales at once
+    def test_bulk_create_sales(self):
+        response = self.client.post(
+            path=reverse("sales:sales_bulk"), data=self.bulk_data(3)
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(response.data), 3, response.data)
+        self.assertEqual(response.data[0]["article"], self.article.pk, response.data)
+        self.assertEqual(Sale.objects.filter(author=self.test_user).count(), 4)
+        self.assertEqual(ArticleRevenue.objects.get(article=self.article).sale_count, 4)
+
+    # TEST 2 : The number of queries does not depend on the number of sales
+    def test_bulk_create_sales_queries(self):
+        path = reverse("sales:sales_bulk")
+        reference_data.get_data()
+        with self.assertNumQueries(7):
+            self.client.post(path=path, data=self.bulk_data(2))
+        with self.assertNumQueries(7):
+            self.client.post(path=path, data=self.bulk_data(50))
+        # Nor the reference data version checks on the number of articles
+        version_checks = []
+        for count in (2, 50):
+            data = self.bulk_data(count)
+            for number, item in enumerate(data):
+                item["article"] = self.article.pk + 1 + number
+            with patch.object(
+                reference_data, "get_version", wraps=reference_data.get_version
+            ) as get_version:
+                self.client.post(path=path, data=data)
+            version_checks.append(get_version.call_count)
+        self.assertEqual(version_checks[0], version_checks[1])
+
+    # TEST 3 : Errors are reported per item and nothing is created
+    def test_bulk_create_sales_errors(self):
+        data = self.bulk_data(3)
+        data[1]["article"] = 0
+        data[2]["quantity"] = "many"
+        response = self.client.post(path=reverse("sales:sales_bulk"), data=data)
+        self.assertEqual(response.status_code, 400, response.data)
+        errors = response.data
+        if isinstance(errors, list):  # Older DRF versions list all the items
+            errors = dict(enumerate(errors))
+        self.assertFalse(errors.get(0), errors)
+        self.assertIn("article", errors[1], errors)
+        self.assertIn("quantity", errors[2], errors)
+        self.assertEqual(Sale.objects.count(), 1)
+
+    # TEST 4 : Negative quantities and prices are reported, not sent to the database
+    def test_bulk_create_sales_bounds(self):
+        data = self.bulk_data(3)
+        data[1]["quantity"] = -1
+        data[2]["unit_selling_price"] = "-0.01"
+        response = self.client.post(path=reverse("sales:sales_bulk"), data=data)
+        self.assertEqual(response.status_code, 400, response.data)
+        errors = response.data
+        if isinstance(errors, list):  # Older DRF versions list all the items
+            errors = dict(enumerate(errors))
+        self.assertEqual(list(errors[1]), ["quantity"], errors)
+        self.assertEqual(list(errors[2]), ["unit_selling_price"], errors)
+        self.assertEqual(Sale.objects.count(), 1)
@@ -0,0 +1,88 @@
+import json
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from utils.tests import PrettyAssertAPITestCase
+from sales.fixtures import create_category_article, create_article, create_sale
+from users.fixtures import create_user
+
+from sales.models import Sale
+
+
+class BaseAuthTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+
+        # Create test users:
+        cls.test_user = create_user(email="user@test.com")
+        cls.other_user = create_user(email="other@test.com")
+
+        # Create a test article:
+        cls.article = create_article(
+            name="Article test 1",
+            code="TST001",
+            category=create_category_article(display_name="Cat test 1"),
+            manufacturing_cost="100",
+        )
+
+        # Create test sales, on different days:
+        for day, author in (
+            (1, cls.test_user),
+            (2, cls.other_user),
+            (3, cls.test_user),
+        ):
+            sale = create_sale(
+                author=author,
+                article=cls.article,
+                quantity=day,
+                unit_selling_price="150.50",
+            )
+            Sale.objects.filter(pk=sale.pk).update(date=date(2021, 1, day))
+
+        return super().setUpTestData()
+
+
+class SaleExportViewTest(BaseAuthTestMixin, PrettyAssertAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.test_user)
+
+    def export(self, **params):
+        response = self.client.get(reverse("sales:sales_export"), data=params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    # TEST 1 : Test the CSV export of all sales
+    def test_export_csv(self):
+        lines = self.export().splitlines()
+        self.assertEqual(
+            lines[0],
+            "date,category,article_code,article_name,quantity,"
+            "unit_selling_price,total_selling_price",
+        )
+        self.assertEqual(
+            lines[1], "2021-01-01,Cat test 1,TST001,Article test 1,1,150.50,150.50"
+        )
+        self.assertEqual(len(lines), 4)
+
+    # TEST 2 : Test the NDJSON export, filtered by date range and author
+    def test_export_ndjson_filtered(self):
+        content = self.export(
+            export_format="ndjson",
+            date_from="2021-01-02",
+            date_to="2021-01-03",
+            author=self.test_user.pk,
+        )
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 1, rows)
+        self.assertEqual(rows[0]["date"], "2021-01-03", rows)
+        self.assertEqual(rows[0]["total_selling_price"], "451.50", rows)
+
+    # TEST 3 : Test the export command
+    def test_export_command(self):
+        output = StringIO()
+        call_command("export_sales", "--format", "ndjson", stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), 3)
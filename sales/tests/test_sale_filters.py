@@ -0,0 +1,126 @@
+from datetime import date
+
+from django.test import override_settings
+from django.urls import reverse
+
+from sales.benchmarks import get_sales_urlconf
+from sales.fixtures import create_category_article, create_article, create_sale
+from sales.models import Sale
+from users.fixtures import create_user
+from utils.tests import PrettyAssertAPITestCase
+
+
+class BaseFilterTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(email=f"user{number}@test.com") for number in range(3)]
+        cls.categories = [
+            create_category_article(display_name=f"Cat test {number}")
+            for number in range(2)
+        ]
+        cls.articles = [
+            create_article(
+                name=f"Article test {number}",
+                code=f"TST{number:03}",
+                category=cls.categories[number % 2],
+                manufacturing_cost="10.00",
+            )
+            for number in range(3)
+        ]
+        # Sale n: author n % 3, article n % 3, price 10 * (n + 1), day n + 1
+        cls.sales = []
+        for number in range(9):
+            sale = create_sale(
+                author=cls.users[number % 3],
+                article=cls.articles[number % 3],
+                quantity=1,
+                unit_selling_price=f"{10 * (number + 1)}.00",
+            )
+            # date is set on creation (auto_now_add): updated afterwards
+            Sale.objects.filter(pk=sale.pk).update(date=date(2022, 1, number + 1))
+            cls.sales.append(sale)
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.users[0])
+
+    def get_sale_numbers(self, **params):
+        response = self.client.get(
+            reverse("sales:sales"), data={"page_size": 100, **params}
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        numbers = {sale.pk: number for number, sale in enumerate(self.sales)}
+        return [numbers[sale["id"]] for sale in response.data["results"]]
+
+
+class SaleFilterSetTest(BaseFilterTestMixin, PrettyAssertAPITestCase):
+
+    # TEST 1 : Sales are filtered by several authors, articles or categories
+    def test_multiple_values(self):
+        authors = f"{self.users[0].pk},{self.users[2].pk}"
+        self.assertEqual(self.get_sale_numbers(author=authors), [8, 6, 5, 3, 2, 0])
+        self.assertEqual(self.get_sale_numbers(article=self.articles[1].pk), [7, 4, 1])
+        # Articles 0 and 2
+        self.assertEqual(
+            self.get_sale_numbers(category=self.categories[0].pk),
+            [8, 6, 5, 3, 2, 0],
+        )
+        self.assertEqual(
+            self.get_sale_numbers(
+                author=self.users[0].pk, category=self.categories[1].pk
+            ),
+            [],
+        )
+
+    # TEST 2 : Sales are filtered by date and price ranges
+    def test_ranges(self):
+        self.assertEqual(
+            self.get_sale_numbers(date_from="2022-01-03", date_to="2022-01-05"),
+            [4, 3, 2],
+        )
+        self.assertEqual(
+            self.get_sale_numbers(price_min="20", price_max="40.00"), [3, 2, 1]
+        )
+
+    # TEST 3 : Only the whitelisted orderings are accepted
+    def test_ordering(self):
+        self.assertEqual(
+            self.get_sale_numbers(ordering="date", date_to="2022-01-03"), [0, 1, 2]
+        )
+        self.assertEqual(self.get_sale_numbers(ordering="-id")[:2], [8, 7])
+        response = self.client.get(reverse("sales:sales"), data={"ordering": "author"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ordering", response.data)
+
+    # TEST 4 : The keyset pagination follows the ordering and the filters
+    def test_cursor_pagination(self):
+        url = reverse("sales:sales")
+        params = {
+            "pagination": "cursor",
+            "page_size": 2,
+            "ordering": "-date",
+            "article": f"{self.articles[0].pk},{self.articles[1].pk}",
+        }
+        response = self.client.get(url, data=params)
+        numbers = {sale.pk: number for number, sale in enumerate(self.sales)}
+        seen = [numbers[sale["id"]] for sale in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            seen += [numbers[sale["id"]] for sale in response.data["results"]]
+        self.assertEqual(seen, [7, 6, 4, 3, 1, 0])
+
+    # TEST 5 : Invalid values are rejected
+    def test_invalid_values(self):
+        response = self.client.get(
+            reverse("sales:sales"), data={"author": "x", "date_from": "yesterday"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {"author", "date_from"})
+
+    # TEST 6 : The async view resolves the categories off the event loop
+    def test_async_view(self):
+        with override_settings(ROOT_URLCONF=get_sales_urlconf(async_views=True)):
+            self.assertEqual(
+                self.get_sale_numbers(category=self.categories[1].pk), [7, 4, 1]
+            )
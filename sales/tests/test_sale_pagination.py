@@ -0,0 +1,96 @@
+from django.urls import reverse
+from utils.tests import PrettyAssertAPITestCase
+from sales.fixtures import create_category_article, create_article, create_sale
+from users.fixtures import create_user
+
+from sales.models import Sale
+
+
+class BaseAuthTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+
+        # Create a test user:
+        cls.test_user = create_user(email="user@test.com")
+
+        # Create a test article:
+        cls.article = create_article(
+            name="Article test 1",
+            code="TST001",
+            category=create_category_article(display_name="Cat test 1"),
+            manufacturing_cost="100",
+        )
+
+        # Create test sales, with duplicated prices to exercise the tiebreaker:
+        for price in ("10.00", "20.00", "20.00", "20.00", "30.00", "40.00", "40.00"):
+            create_sale(
+                author=cls.test_user,
+                article=cls.article,
+                quantity=1,
+                unit_selling_price=price,
+            )
+
+        return super().setUpTestData()
+
+
+class SaleKeysetPaginationTest(BaseAuthTestMixin, PrettyAssertAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.test_user)
+        self.expected = list(
+            Sale.objects.order_by("-unit_selling_price", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+    def walk(self, url, link="next"):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertNotIn("count", response.data)
+            ids.extend(row["id"] for row in response.data["results"])
+            url = response.data[link]
+        return ids
+
+    # TEST 1 : Page numbers stay the default
+    def test_page_number_by_default(self):
+        response = self.client.get(reverse("sales:sales"))
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["count"], 7, response.data)
+
+    # TEST 2 : Walking forward returns every sale once, in order
+    def test_walk_forward(self):
+        url = reverse("sales:sales") + "?pagination=cursor&page_size=3"
+        self.assertEqual(self.walk(url), self.expected)
+
+    # TEST 3 : Walking back from the last page returns the same sales
+    def test_walk_backward(self):
+        url = reverse("sales:sales") + "?pagination=cursor&page_size=3"
+        while True:
+            response = self.client.get(url)
+            if response.data["next"] is None:
+                break
+            url = response.data["next"]
+        first_ids = [row["id"] for row in response.data["results"]]
+        previous_ids = self.walk(response.data["previous"], link="previous")
+        self.assertEqual(sorted(previous_ids + first_ids), sorted(self.expected))
+
+    # TEST 4 : Sales inserted while paginating do not shift the next pages
+    def test_concurrent_insert(self):
+        url = reverse("sales:sales") + "?pagination=cursor&page_size=3"
+        response = self.client.get(url)
+        seen = [row["id"] for row in response.data["results"]]
+        create_sale(
+            author=self.test_user,
+            article=self.article,
+            quantity=1,
+            unit_selling_price="50.00",
+        )
+        seen += self.walk(response.data["next"])
+        self.assertEqual(seen, self.expected)
+
+    # TEST 5 : A tampered cursor is rejected
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("sales:sales") + "?cursor=garbage")
+        self.assertEqual(response.status_code, 404, response.data)
@@ -1,9 +1,23 @@
+from django.conf import settings
 from django.urls import path
 
 
 from sales.api_views import (
+    ArticleBulkImportView,
+    ArticleLeaderboardView,
     ArticleListAgregatedView,
     ArticleListCreateView,
+    ArticleSearchView,
+    AsyncArticleListAgregatedView,
+    AsyncArticleListCreateView,
+    AsyncCategoryArticleListCreateView,
+    AsyncRetrieveUpdateDeleteSaleView,
+    AsyncSaleListAgregatedView,
+    AsyncSaleListCreateView,
+    SaleAnalyticsView,
+    SaleBulkCreateView,
+    SaleColumnarExportView,
+    SaleExportView,
     SaleListCreateView,
     CategoryArticleListCreateView,
     RetrieveUpdateDeleteSaleView,
@@ -11,19 +25,56 @@ from sales.api_views import (
 )
 
 
-sales_urlpatterns = [
-    path("categories", CategoryArticleListCreateView.as_view(), name="category"),
-    path("articles", ArticleListCreateView.as_view(), name="article"),
-    path("", SaleListCreateView.as_view(), name="sales"),
-    path(
-        "<int:pk>",
-        RetrieveUpdateDeleteSaleView.as_view(),
-        name="retrieve_update_delete_sales",
-    ),
-    path(
-        "revenue",
-        SaleListAgregatedView.as_view(),
-        name="sales_revenues",
-    ),
-    path("money", ArticleListAgregatedView.as_view(), name="articles_revenues"),
-]
+def get_sales_urlpatterns(async_views=False):
+    """
+    The sales routes, with the async versions of the read views if
+    `async_views` (to serve under ASGI), else the sync ones.
+    """
+
+    def view(sync_view, async_view):
+        return (async_view if async_views else sync_view).as_view()
+
+    return [
+        path(
+            "categories",
+            view(CategoryArticleListCreateView, AsyncCategoryArticleListCreateView),
+            name="category",
+        ),
+        path(
+            "articles",
+            view(ArticleListCreateView, AsyncArticleListCreateView),
+            name="article",
+        ),
+        path("articles/bulk", ArticleBulkImportView.as_view(), name="article_bulk"),
+        path("articles/search", ArticleSearchView.as_view(), name="articles_search"),
+        path("", view(SaleListCreateView, AsyncSaleListCreateView), name="sales"),
+        path("bulk", SaleBulkCreateView.as_view(), name="sales_bulk"),
+        path("export", SaleExportView.as_view(), name="sales_export"),
+        path(
+            "export/columnar",
+            SaleColumnarExportView.as_view(),
+            name="sales_export_columnar",
+        ),
+        path(
+            "<int:pk>",
+            view(RetrieveUpdateDeleteSaleView, AsyncRetrieveUpdateDeleteSaleView),
+            name="retrieve_update_delete_sales",
+        ),
+        path(
+            "revenue",
+            view(SaleListAgregatedView, AsyncSaleListAgregatedView),
+            name="sales_revenues",
+        ),
+        path(
+            "money",
+            view(ArticleListAgregatedView, AsyncArticleListAgregatedView),
+            name="articles_revenues",
+        ),
+        path(
+            "leaderboard", ArticleLeaderboardView.as_view(), name="articles_leaderboard"
+        ),
+        path("analytics", SaleAnalyticsView.as_view(), name="sales_analytics"),
+    ]
+
+
+sales_urlpatterns = get_sales_urlpatterns(settings.SALES_ASYNC_VIEWS)
@@ -15,6 +15,7 @@ from django.utils.translation import gettext, gettext_lazy as _
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.debug import sensitive_post_parameters
 
+from users.authentication import token_user_cache
 from users.forms import UserChangeForm, UserCreationForm
 from users.models import User
 
@@ -63,6 +64,14 @@ class UserAdmin(admin.ModelAdmin):
         "groups",
         "user_permissions",
     )
+    actions = ["deactivate_users"]
+
+    @admin.action(description=_("Deactivate selected users"))
+    def deactivate_users(self, request, queryset):
+        count = queryset.update(is_active=False)
+        # update() sends no signal: evict the cached tokens here
+        token_user_cache.invalidate()
+        self.message_user(request, _("%(count)d users deactivated.") % {"count": count})
 
     def get_fieldsets(self, request, obj=None):
         if not obj:
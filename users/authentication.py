@@ -0,0 +1,117 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from utils.cache import VersionStamp
+
+
+class TokenUserCache(VersionStamp):
+    """
+    In-process LRU of the (user, token) pairs authenticated by token key,
+    bounded to settings.TOKEN_AUTH_CACHE_SIZE entries kept for
+    settings.TOKEN_AUTH_CACHE_TTL seconds at most.
+
+    Deleting a token, or saving (e.g. deactivating) a user, bumps the shared
+    version stamp (see users.signals): every worker then drops all its entries
+    on its next lookup.
+    """
+
+    def __init__(self, prefix, alias=None):
+        super().__init__(prefix, alias)
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, version=None):
+        """
+        The (user, token) pair cached for `key`, or None. `version` is the
+        current version stamp, if already read.
+        """
+        if version is None:
+            version = self.get_version()
+        with self._lock:
+            if version != self._version:
+                self._clear(version)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Requests may annotate their user: never share the cached instance
+        user, token = entry[0]
+        return copy.copy(user), token
+
+    def set(self, key, user_token, version):
+        """
+        Caches the (user, token) pair read from the database under `version`,
+        the stamp read before the database: not if it was bumped meanwhile, as
+        the pair may predate the write which bumped it.
+        """
+        if self.get_version() != version:
+            return
+        with self._lock:
+            if version != self._version:
+                self._clear(version)
+            self._entries[key] = (
+                user_token,
+                time.monotonic() + settings.TOKEN_AUTH_CACHE_TTL,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.TOKEN_AUTH_CACHE_SIZE:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """
+        Drops the entries of every worker, now and once the current transaction
+        is committed (a worker may cache the old rows in between).
+        """
+        with self._lock:
+            self._clear(None)
+        self.bump_version()
+        self.bump_version_on_commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+    def _clear(self, version):
+        self.evictions += len(self._entries)
+        self._entries.clear()
+        self._version = version
+
+
+token_user_cache = TokenUserCache("users:tokens")
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication resolving the token keys from `token_user_cache`: the
+    requests authenticated by a cached token make no query.
+    """
+
+    def authenticate_credentials(self, key):
+        # Read before the database, so that a write committed meanwhile is seen
+        version = token_user_cache.get_version()
+        cached = token_user_cache.get(key, version)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        token_user_cache.set(key, (user, token), version)
+        return copy.copy(user), token
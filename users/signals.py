@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from users.authentication import token_user_cache
+from users.models import User
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    token_user_cache.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_changed_user(sender, instance, update_fields=None, **kwargs):
+    """
+    Deactivated users must be rejected at once, and the other cached users must
+    not keep stale permissions. Logins only update `last_login`.
+    """
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    token_user_cache.invalidate()
@@ -0,0 +1,148 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from users.authentication import (
+    CachedTokenAuthentication,
+    TokenUserCache,
+    token_user_cache,
+)
+from users.fixtures import create_user
+from users.models import User
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = create_user(email="user@test.com")
+        cls.token = Token.objects.create(user=cls.test_user)
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.authentication = CachedTokenAuthentication()
+
+    def authenticate(self, token=None):
+        return self.authentication.authenticate_credentials((token or self.token).key)
+
+    def assertRejected(self, token=None):
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    # TEST 1 : Cached tokens are resolved without any query
+    def test_cached_token(self):
+        hits = token_user_cache.stats()["hits"]
+        with self.assertNumQueries(1):
+            user, token = self.authenticate()
+        with self.assertNumQueries(0):
+            cached_user, cached_token = self.authenticate()
+        self.assertEqual(cached_user, self.test_user)
+        self.assertEqual(cached_token, self.token)
+        # Each request gets its own copy of the user
+        self.assertIsNot(cached_user, user)
+        self.assertEqual(token_user_cache.stats()["hits"], hits + 1)
+
+    # TEST 2 : API requests authenticated by a cached token skip the query
+    def test_api_request(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        path = reverse("sales:category")
+        with self.assertNumQueries(2):
+            self.assertEqual(client.get(path).status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(client.get(path).status_code, 200)
+
+    # TEST 3 : Deleted tokens are rejected at once, in every worker
+    def test_deleted_token(self):
+        other_worker = TokenUserCache(token_user_cache.prefix)
+        self.authenticate()
+        other_worker.set(
+            self.token.key, (self.test_user, self.token), other_worker.get_version()
+        )
+        self.token.delete()
+        self.assertRejected()
+        self.assertIsNone(other_worker.get(self.token.key))
+
+    # TEST 4 : Deactivated users are rejected at once
+    def test_deactivated_user(self):
+        self.authenticate()
+        self.test_user.is_active = False
+        self.test_user.save()
+        self.assertRejected()
+
+    # TEST 5 : Users deactivated from the admin are rejected at once
+    def test_deactivated_from_admin(self):
+        admin = User.objects.create_superuser(email="admin@test.com", password="x")
+        self.client.force_login(admin)
+        other_token = Token.objects.create(user=create_user(email="other@test.com"))
+        self.authenticate()
+        self.authenticate(other_token)
+
+        response = self.client.post(
+            reverse("admin:users_user_changelist"),
+            data={
+                "action": "deactivate_users",
+                "_selected_action": [self.test_user.pk],
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertRejected()
+
+        change_data = {
+            "email": "other@test.com",
+            "first_name": "Other",
+            "last_name": "User",
+            "is_active": "",
+            "last_login_0": "",
+            "last_login_1": "",
+            "date_joined_0": "2022-01-01",
+            "date_joined_1": "00:00:00",
+        }
+        response = self.client.post(
+            reverse("admin:users_user_change", args=[other_token.user_id]),
+            data=change_data,
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertRejected(other_token)
+
+    # TEST 6 : Rows read before a concurrent write are not cached
+    def test_write_during_lookup(self):
+        version = token_user_cache.get_version()
+        self.test_user.is_active = False
+        self.test_user.save()
+        token_user_cache.set(self.token.key, (self.test_user, self.token), version)
+        self.assertIsNone(token_user_cache.get(self.token.key))
+
+    # TEST 7 : The cache is bounded, and its entries expire
+    def test_bounds(self):
+        tokens = [
+            Token.objects.create(user=create_user(email=f"user{number}@test.com"))
+            for number in range(3)
+        ]
+        with override_settings(TOKEN_AUTH_CACHE_SIZE=2):
+            for token in tokens:
+                self.authenticate(token)
+            with self.assertNumQueries(1):
+                self.authenticate(tokens[0])
+            with self.assertNumQueries(0):
+                self.authenticate(tokens[2])
+            self.assertEqual(token_user_cache.stats()["size"], 2)
+        with override_settings(TOKEN_AUTH_CACHE_TTL=0):
+            self.authenticate()
+            with self.assertNumQueries(1):
+                self.authenticate()
+
+    # TEST 8 : The hit rate is reported
+    def test_stats(self):
+        cache = TokenUserCache("users:tokens:test")
+        self.assertIsNone(cache.stats()["hit_rate"])
+        self.assertIsNone(cache.get(self.token.key))
+        cache.set(self.token.key, (self.test_user, self.token), cache.get_version())
+        cache.get(self.token.key)
+        cache.get(self.token.key)
+        self.assertEqual(
+            cache.stats(),
+            {"hits": 2, "misses": 1, "evictions": 0, "size": 1, "hit_rate": 2 / 3},
+        )
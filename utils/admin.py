@@ -1,3 +1,294 @@
+import json
+from base64 import b64decode, b64encode
+from copy import copy
+from datetime import date, timedelta
+
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.utils import get_last_value_from_parameters
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Max, Min
+
+from utils.db import estimated_count, keyset_filter
+
+CURSOR_VAR = "cursor"
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    List filter on a foreign key picking the related object with an
+    autocomplete input, as ModelAdmin.autocomplete_fields: only the selected
+    object is read, instead of every one of them. The admin of the related
+    model must define search_fields.
+
+        list_filter = [("author", AutocompleteFilter)]
+    """
+
+    template = "admin/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        self.lookup_val = get_last_value_from_parameters(params, self.lookup_kwarg)
+        self.admin_site = model_admin.admin_site
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.title = field.verbose_name
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        formfield = forms.ModelChoiceField(
+            queryset=self.field.remote_field.model._default_manager.all(),
+            required=False,
+            widget=AutocompleteSelect(self.field, self.admin_site),
+        )
+        yield {
+            "selected": self.lookup_val is None,
+            "query_string": changelist.get_query_string(remove=[self.lookup_kwarg]),
+            "widget": formfield.widget.render(
+                self.lookup_kwarg,
+                self.lookup_val,
+                attrs={"id": f"id_filter_{self.lookup_kwarg}"},
+            ),
+        }
+
+
+def truncate_date(day, kind):
+    if kind == "year":
+        return date(day.year, 1, 1)
+    if kind == "month":
+        return date(day.year, day.month, 1)
+    return day
+
+
+def next_date(day, kind):
+    if kind == "year":
+        return date(day.year + 1, 1, 1)
+    if kind == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def indexed_dates(queryset, field_name, kind, bounds=None):
+    """
+    queryset.dates(field_name, kind) ("year", "month" or "day"), probing every
+    period from the first to the last date with an EXISTS: as many index range
+    scans, instead of a DISTINCT over all the rows. `bounds` are the first and
+    last dates, if already read.
+    """
+    queryset = queryset.order_by()
+    if bounds is None:
+        bounds = queryset.aggregate(first=Min(field_name), last=Max(field_name))
+    if bounds["first"] is None:
+        return []
+    dates = []
+    start = truncate_date(bounds["first"], kind)
+    while start <= bounds["last"]:
+        end = next_date(start, kind)
+        period = {f"{field_name}__gte": start, f"{field_name}__lt": end}
+        if queryset.filter(**period).exists():
+            dates.append(start)
+        start = end
+    return dates
+
+
+class IndexedDatesQuerySet:
+    """
+    ChangeList.queryset stand-in for admin_list.date_hierarchy(), listing the
+    dates with indexed_dates() (date fields only)
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self.bounds = None
+
+    def aggregate(self, *args, **kwargs):
+        # The first and last dates, which select the drilldown level
+        self.bounds = self.queryset.aggregate(*args, **kwargs)
+        return self.bounds
+
+    def dates(self, field_name, kind):
+        return indexed_dates(self.queryset, field_name, kind, self.bounds)
+
+
+class KeysetChangeList(ChangeList):
+    """
+    ChangeList paginated on its ordering (seek method): the `cursor` parameter
+    holds the ordering values of the last (or first) row of the previous page,
+    so that every page is an indexed range scan whatever its depth, instead of
+    an OFFSET. Unless the ordering involves other than the model columns, or
+    the list is editable: then it is paginated by page number.
+
+    The number of rows is the ModelAdmin.get_result_count() estimate.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        # The cursor is not a filter, nor kept in the links of the page
+        self.cursor = request.GET.get(CURSOR_VAR)
+        if self.cursor is not None:
+            request = copy(request)
+            request.GET = request.GET.copy()
+            del request.GET[CURSOR_VAR]
+        super().__init__(request, *args, **kwargs)
+
+    def get_keyset_ordering(self):
+        """
+        The ordering of the queryset, if made of the model columns only
+        """
+        # ChangeList.get_ordering() repeats the ModelAdmin ordering
+        ordering = list(dict.fromkeys(self.queryset.query.order_by))
+        for field in ordering:
+            if not isinstance(field, str):
+                return None
+            name = field.lstrip("-")
+            if name != "pk":
+                try:
+                    model_field = self.opts.get_field(name)
+                except FieldDoesNotExist:
+                    return None
+                if not model_field.concrete or model_field.is_relation:
+                    return None
+        return ordering or None
+
+    def get_results(self, request):
+        ordering = None if self.list_editable else self.get_keyset_ordering()
+        self.keyset = ordering is not None
+        if not self.keyset:
+            return super().get_results(request)
+        self.keyset_ordering = ordering
+        position, reverse = self.decode_cursor()
+
+        queryset = self.queryset
+        if reverse:
+            ordering = [
+                field[1:] if field.startswith("-") else f"-{field}"
+                for field in ordering
+            ]
+            queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(ordering, position))
+        results = list(queryset[: self.list_per_page + 1])
+        has_more = len(results) > self.list_per_page
+        results = results[: self.list_per_page]
+        if reverse:
+            results.reverse()
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.result_count, self.result_count_exact = self.model_admin.get_result_count(
+            request, self.queryset
+        )
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = results
+        self.can_show_all = False
+        self.multi_page = has_next or has_previous
+        self.paginator = None
+        self.first_url = self.get_query_string() if has_previous else None
+        self.previous_url = (
+            self.get_query_string(
+                {CURSOR_VAR: self.encode_cursor(results[0], reverse=True)}
+            )
+            if has_previous and results
+            else None
+        )
+        self.next_url = (
+            self.get_query_string({CURSOR_VAR: self.encode_cursor(results[-1])})
+            if has_next and results
+            else None
+        )
+
+    def get_field(self, field):
+        name = field.lstrip("-")
+        return self.opts.pk if name == "pk" else self.opts.get_field(name)
+
+    def decode_cursor(self):
+        """
+        (ordering values of the cursor row or None, whether going backwards)
+        """
+        if self.cursor is None:
+            return None, False
+        try:
+            cursor = json.loads(b64decode(self.cursor.encode("ascii")).decode())
+            fields = [self.get_field(field) for field in self.keyset_ordering]
+            if len(cursor["p"]) != len(fields):
+                raise ValueError(cursor)
+            position = [
+                field.to_python(value) for field, value in zip(fields, cursor["p"])
+            ]
+            return position, bool(cursor.get("r"))
+        except Exception as exc:
+            raise IncorrectLookupParameters(exc)
+
+    def encode_cursor(self, obj, reverse=False):
+        position = []
+        for field in self.keyset_ordering:
+            value = getattr(obj, self.get_field(field).attname)
+            position.append(
+                value.isoformat() if hasattr(value, "isoformat") else str(value)
+            )
+        cursor = {"p": position}
+        if reverse:
+            cursor["r"] = 1
+        return b64encode(json.dumps(cursor).encode()).decode("ascii")
+
+
+class LargeTableAdminMixin:
+    """
+    ModelAdmin of a table too large to be counted, or its related objects to
+    be listed, on every changelist load:
+     - the changelist is paginated with a cursor (KeysetChangeList), and its
+       rows counted by get_result_count(),
+     - the date hierarchy is built from index probes (indexed_dates()),
+     - the filter facets are never counted: the foreign keys are filtered with
+       AutocompleteFilter and edited with autocomplete_fields.
+    The ordering should match an index, as the list_select_related the columns.
+    """
+
+    change_list_template = "admin/large_table_change_list.html"
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    # Rows counted at most, when the planner estimate cannot be used
+    count_limit = 10000
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_paginator(self, request, queryset, *args, **kwargs):
+        paginator = super().get_paginator(request, queryset, *args, **kwargs)
+        # A cached property: the paginator does not count the rows
+        paginator.count = self.get_result_count(request, queryset)[0]
+        return paginator
+
+    def get_result_count(self, request, queryset):
+        """
+        (number of rows, whether it is exact): the planner estimate of the
+        table size when the changelist is not filtered, else the rows counted
+        up to count_limit (a bounded scan).
+        """
+        if not queryset.query.where:
+            count = estimated_count(queryset.model)
+            if count is not None:
+                return count, False
+        count = queryset.order_by()[: self.count_limit + 1].count()
+        return min(count, self.count_limit), count <= self.count_limit
 
-# Register your models here.
+    @property
+    def media(self):
+        media = super().media
+        if any(
+            isinstance(list_filter, (list, tuple))
+            and issubclass(list_filter[1], AutocompleteFilter)
+            for list_filter in self.list_filter
+        ):
+            media += AutocompleteSelect(None, self.admin_site).media
+            media += forms.Media(js=["admin/js/autocomplete_filter.js"])
+        return media
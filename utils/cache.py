@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+class VersionStamp:
+    """
+    Version stamp shared by all the workers (through the cache backend), to
+    invalidate data cached under it.
+    """
+
+    def __init__(self, prefix, alias=None):
+        self.prefix = prefix
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias or settings.SALES_CACHE_ALIAS]
+
+    @property
+    def version_key(self):
+        return f"{self.prefix}:version"
+
+    def get_version(self):
+        version = self.cache.get(self.version_key)
+        if version is None:
+            # A timestamp, so that an evicted stamp never goes back in time
+            self.cache.add(self.version_key, time.time_ns(), timeout=None)
+            version = self.cache.get(self.version_key)
+        return version
+
+    @property
+    def bumped_at_key(self):
+        return f"{self.prefix}:bumped_at"
+
+    def bump_version(self):
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            self.get_version()
+        self.cache.set(self.bumped_at_key, time.time(), timeout=None)
+
+    def get_version_and_bump_time(self):
+        """
+        (version, time of its last bump or None), in a single cache lookup
+        """
+        values = self.cache.get_many([self.version_key, self.bumped_at_key])
+        version = values.get(self.version_key)
+        if version is None:
+            version = self.get_version()
+        return version, values.get(self.bumped_at_key)
+
+    def bumped_recently(self):
+        """
+        Whether the version was bumped less than settings.DATABASE_REPLICA_STICKINESS
+        seconds ago: a replica may not have replayed the write yet.
+        """
+        _, bumped_at = self.get_version_and_bump_time()
+        return (
+            bumped_at is not None
+            and time.time() - bumped_at <= settings.DATABASE_REPLICA_STICKINESS
+        )
+
+    def bump_version_on_commit(self):
+        """
+        Bumps the version once the current transaction is committed, so that a
+        concurrent request cannot cache the data it is replacing.
+        """
+        transaction.on_commit(self.bump_version)
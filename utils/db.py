@@ -0,0 +1,98 @@
+from io import StringIO
+
+from django.db import connections, router
+from django.db.models import Q
+
+
+def estimated_count(model):
+    """
+    Returns the planner's row estimate for the table of `model`, without
+    scanning it. Only PostgreSQL keeps such statistics: other backends (and
+    tables never analyzed) return None.
+    """
+    using = router.db_for_read(model)
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def keyset_filter(ordering, position):
+    """
+    Rows strictly after `position` (the values of the `ordering` fields), i.e.
+    for (a, b, c):
+    a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND c > vc)
+    """
+    keyset = Q()
+    equal = Q()
+    for field, value in zip(ordering, position):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        keyset |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return keyset
+
+
+def copy_rows(model, columns, rows, *, using=None):
+    """
+    Loads `rows` (tuples of `columns` values) into the table of `model` with
+    PostgreSQL's COPY, the fastest bulk-load path (no per-row INSERT parsing nor
+    RETURNING). Values must not contain tabs, newlines or backslashes.
+    """
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    db_columns = ", ".join(
+        connection.ops.quote_name(model._meta.get_field(column).column)
+        for column in columns
+    )
+    sql = (
+        f"COPY {connection.ops.quote_name(model._meta.db_table)} ({db_columns}) "
+        "FROM STDIN"
+    )
+    data = "".join(
+        "\t".join(r"\N" if value is None else str(value) for value in row) + "\n"
+        for row in rows
+    )
+    with connection.cursor() as cursor:
+        driver_cursor = cursor.cursor
+        if hasattr(driver_cursor, "copy_expert"):  # psycopg2
+            driver_cursor.copy_expert(sql, StringIO(data))
+        else:  # psycopg 3
+            with driver_cursor.copy(sql) as copy:
+                copy.write(data)
+
+
+def insert_rows(model, columns, rows, *, using=None):
+    """
+    Inserts `rows` (tuples of `columns` values) into the table of `model` with
+    a single executemany(). Unlike bulk_create(), no model is instantiated and
+    the fields pre_save() (e.g. auto_now_add) do not override the values.
+    """
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    fields = [model._meta.get_field(column) for column in columns]
+    db_columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    placeholders = ", ".join(["%s"] * len(fields))
+    sql = (
+        f"INSERT INTO {connection.ops.quote_name(model._meta.db_table)} "
+        f"({db_columns}) VALUES ({placeholders})"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            sql,
+            [
+                [
+                    field.get_db_prep_save(value, connection)
+                    for field, value in zip(fields, row)
+                ]
+                for row in rows
+            ],
+        )
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+
+def parse_accept_encoding(header):
+    """
+    "br;q=1.0, gzip;q=0.5, *;q=0" -> {"br": 1.0, "gzip": 0.5, "*": 0.0}
+    """
+    encodings = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[coding.lower()] = quality
+    return encodings
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware negotiating the encoding with the client (Accept-Encoding
+    and its q-values): brotli, when the brotli package is installed, or gzip.
+    Only the text and JSON responses of at least
+    settings.API_COMPRESSION_MIN_SIZE bytes are compressed; the streaming ones,
+    and the ones other than the API JSON (e.g. the admin HTML, which may mirror
+    the request next to a CSRF token), with gzip only: GZipMiddleware pads them
+    against BREACH.
+    """
+
+    compressible_types = (
+        "application/json",
+        "application/javascript",
+        "application/vnd.oai.openapi",
+        "application/xml",
+        "text/",
+    )
+    brotli_types = ("application/json", "application/vnd.oai.openapi")
+    brotli_quality = 5
+
+    def process_response(self, request, response):
+        if (
+            response.has_header("Content-Encoding")
+            or not response.get("Content-Type", "").startswith(self.compressible_types)
+            or (
+                not response.streaming
+                and len(response.content) < settings.API_COMPRESSION_MIN_SIZE
+            )
+        ):
+            return response
+        encoding = self.get_encoding(request, response)
+        if encoding == "gzip":
+            return super().process_response(request, response)
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if encoding == "br":
+            compressed_content = brotli.compress(
+                response.content, quality=self.brotli_quality
+            )
+            if len(compressed_content) < len(response.content):
+                response.content = compressed_content
+                response.headers["Content-Length"] = str(len(response.content))
+                # As GZipMiddleware: a strong ETag is made weak
+                etag = response.get("ETag")
+                if etag and etag.startswith('"'):
+                    response.headers["ETag"] = "W/" + etag
+                response.headers["Content-Encoding"] = "br"
+        return response
+
+    def get_encoding(self, request, response):
+        """
+        The supported encoding of highest quality for the client, brotli first
+        for an equal quality, or None
+        """
+        encodings = parse_accept_encoding(request.headers.get("Accept-Encoding", ""))
+        supported = ["gzip"]
+        if (
+            brotli is not None
+            and not response.streaming
+            and response.get("Content-Type", "").startswith(self.brotli_types)
+        ):
+            supported.insert(0, "br")
+        qualities = {
+            coding: encodings.get(coding, encodings.get("*", 0.0))
+            for coding in supported
+        }
+        # GZipMiddleware only compresses when gzip is named, not for "*"
+        qualities["gzip"] = encodings.get("gzip", 0.0)
+        coding = max(supported, key=lambda coding: qualities[coding])
+        return coding if qualities[coding] > 0 else None
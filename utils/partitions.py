@@ -0,0 +1,268 @@
+from datetime import date
+
+from django.db import connections, router, transaction
+from django.db.models import CheckConstraint
+
+INTERVALS = ("month", "year")
+
+
+def partition_start(day, interval):
+    """
+    First day of the `interval` ("month" or "year") partition holding `day`
+    """
+    if interval == "year":
+        return date(day.year, 1, 1)
+    return date(day.year, day.month, 1)
+
+
+def next_partition_start(start, interval, count=1):
+    """
+    First day of the `count`th partition after the one starting on `start`
+    """
+    if interval == "year":
+        return date(start.year + count, 1, 1)
+    months = start.year * 12 + start.month - 1 + count
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(model, start, interval):
+    """
+    e.g. sales_sale_p2022_01 (monthly) or sales_sale_p2022 (yearly)
+    """
+    suffix = f"{start:%Y}" if interval == "year" else f"{start:%Y_%m}"
+    return f"{model._meta.db_table}_p{suffix}"
+
+
+def default_partition_name(model):
+    return f"{model._meta.db_table}_default"
+
+
+def _get_connection(model, using):
+    return connections[using or router.db_for_write(model)]
+
+
+def is_partitioned(model, *, using=None):
+    """
+    Whether the table of `model` is a partitioned table (always False on the
+    backends other than PostgreSQL).
+    """
+    connection = _get_connection(model, using)
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [model._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def get_partitions(model, *, using=None):
+    """
+    (name, bounds) of the partitions of the table of `model`, by name
+    """
+    connection = _get_connection(model, using)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+            "FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s) ORDER BY child.relname",
+            [model._meta.db_table],
+        )
+        return cursor.fetchall()
+
+
+def create_partition(model, field_name, start, interval, *, using=None):
+    """
+    Creates the partition of the `interval` starting on `start`, unless it
+    exists. The rows of the range already stored in the default partition are
+    moved to it. Returns whether it was created.
+    """
+    connection = _get_connection(model, using)
+    qn = connection.ops.quote_name
+    table = model._meta.db_table
+    column = model._meta.get_field(field_name).column
+    name = partition_name(model, start, interval)
+    default = default_partition_name(model)
+    # Trusted dates, inlined: DDL statements take no parameters
+    date_from = f"'{start.isoformat()}'"
+    date_to = f"'{next_partition_start(start, interval).isoformat()}'"
+    in_range = f"{qn(column)} >= {date_from} AND {qn(column)} < {date_to}"
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s), to_regclass(%s)", [name, default])
+        existing, default_exists = cursor.fetchone()
+        if existing is not None:
+            return False
+        moved = False
+        if default_exists is not None:
+            cursor.execute(f"SELECT 1 FROM {qn(default)} WHERE {in_range} LIMIT 1")
+            moved = cursor.fetchone() is not None
+        if not moved:
+            cursor.execute(
+                f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} "
+                f"FOR VALUES FROM ({date_from}) TO ({date_to})"
+            )
+            return True
+        # The default partition must not hold rows of the new one: they are
+        # moved to a standalone table, attached once filled
+        cursor.execute(
+            f"CREATE TABLE {qn(name)} "
+            f"(LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"INSERT INTO {qn(name)} SELECT * FROM {qn(default)} WHERE {in_range}"
+        )
+        cursor.execute(f"DELETE FROM {qn(default)} WHERE {in_range}")
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} "
+            f"FOR VALUES FROM ({date_from}) TO ({date_to})"
+        )
+    return True
+
+
+def create_partitions(model, field_name, date_from, date_to, interval, *, using=None):
+    """
+    Creates the missing `interval` partitions holding the dates from
+    `date_from` to `date_to` (both included). Returns the names of the created
+    ones.
+    """
+    created = []
+    start = partition_start(date_from, interval)
+    while start <= date_to:
+        if create_partition(model, field_name, start, interval, using=using):
+            created.append(partition_name(model, start, interval))
+        start = next_partition_start(start, interval)
+    return created
+
+
+def create_future_partitions(model, field_name, interval, ahead, *, using=None):
+    """
+    Creates the missing partitions from the current one to `ahead` more, so
+    that the rows written in the coming intervals never land in the default
+    partition (to run periodically, e.g. daily).
+    """
+    today = date.today()
+    date_to = next_partition_start(partition_start(today, interval), interval, ahead)
+    return create_partitions(model, field_name, today, date_to, interval, using=using)
+
+
+def partition_table(model, field_name, interval, *, ahead=0, using=None):
+    """
+    Converts the table of `model` into a table partitioned by range of
+    `field_name` (a date field) per `interval`, in a single transaction which
+    locks it: the rows are copied into a new partitioned table, with the
+    partitions holding them (and `ahead` more), and a default partition for
+    the dates out of them.
+
+    The primary key then includes the partition key, and the Meta.indexes, the
+    Meta.constraints and the foreign keys of the model are recreated on the
+    partitioned table (the partitions inherit them). The other indexes (e.g.
+    db_index fields) are not: the model must declare them as Meta.indexes. No
+    other table may reference it.
+    """
+    connection = _get_connection(model, using)
+    qn = connection.ops.quote_name
+    table = model._meta.db_table
+    column = model._meta.get_field(field_name).column
+    pk_column = model._meta.pk.column
+    new_table = f"{table}_partitioned"
+
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(
+                "SELECT attidentity FROM pg_attribute "
+                "WHERE attrelid = to_regclass(%s) AND attname = %s",
+                [table, pk_column],
+            )
+            identity = cursor.fetchone()[0] != ""
+            cursor.execute(
+                f"SELECT MIN({qn(column)}), MAX({qn(column)}) FROM {qn(table)}"
+            )
+            first, last = cursor.fetchone()
+            cursor.execute(
+                f"CREATE TABLE {qn(new_table)} ("
+                f"LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+                f"INCLUDING IDENTITY) PARTITION BY RANGE ({qn(column)})"
+            )
+            cursor.execute(
+                f"ALTER TABLE {qn(new_table)} "
+                f"ADD CONSTRAINT {qn(f'{new_table}_pkey')} "
+                f"PRIMARY KEY ({qn(pk_column)}, {qn(column)})"
+            )
+            # Named after the final table, which the partitions keep
+            today = date.today()
+            date_from = min(first or today, today)
+            date_to = next_partition_start(
+                partition_start(max(last or today, today), interval), interval, ahead
+            )
+            start = partition_start(date_from, interval)
+            while start <= date_to:
+                end = next_partition_start(start, interval)
+                cursor.execute(
+                    f"CREATE TABLE {qn(partition_name(model, start, interval))} "
+                    f"PARTITION OF {qn(new_table)} "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                )
+                start = end
+            cursor.execute(
+                f"CREATE TABLE {qn(default_partition_name(model))} "
+                f"PARTITION OF {qn(new_table)} DEFAULT"
+            )
+
+            overriding = "OVERRIDING SYSTEM VALUE " if identity else ""
+            cursor.execute(
+                f"INSERT INTO {qn(new_table)} {overriding}SELECT * FROM {qn(table)}"
+            )
+            if identity:
+                # A new sequence, continuing the old one
+                cursor.execute(
+                    "SELECT setval(pg_get_serial_sequence(%s, %s), "
+                    f"COALESCE(MAX({qn(pk_column)}), 0) + 1, false) "
+                    f"FROM {qn(new_table)}",
+                    [new_table, pk_column],
+                )
+            else:
+                # A serial column: the new table takes over its sequence
+                cursor.execute(
+                    "SELECT pg_get_serial_sequence(%s, %s)", [table, pk_column]
+                )
+                sequence = cursor.fetchone()[0]
+                cursor.execute(
+                    f"ALTER SEQUENCE {sequence} "
+                    f"OWNED BY {qn(new_table)}.{qn(pk_column)}"
+                )
+
+            cursor.execute(f"DROP TABLE {qn(table)}")
+            cursor.execute(f"ALTER TABLE {qn(new_table)} RENAME TO {qn(table)}")
+            cursor.execute(
+                f"ALTER TABLE {qn(table)} RENAME CONSTRAINT "
+                f"{qn(f'{new_table}_pkey')} TO {qn(f'{table}_pkey')}"
+            )
+            if identity:
+                cursor.execute(
+                    "SELECT pg_get_serial_sequence(%s, %s)", [table, pk_column]
+                )
+                sequence = cursor.fetchone()[0]
+                cursor.execute(
+                    f"ALTER SEQUENCE {sequence} "
+                    f"RENAME TO {qn(f'{table}_{pk_column}_seq')}"
+                )
+
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for index in model._meta.indexes:
+                schema_editor.add_index(model, index)
+            # The check constraints were copied with the columns
+            for constraint in model._meta.constraints:
+                if not isinstance(constraint, CheckConstraint):
+                    schema_editor.add_constraint(model, constraint)
+            for field in model._meta.local_fields:
+                if field.remote_field and field.db_constraint:
+                    schema_editor.execute(
+                        schema_editor._create_fk_sql(
+                            model, field, "_fk_%(to_table)s_%(to_column)s"
+                        )
+                    )
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {qn(table)}")
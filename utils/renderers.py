@@ -0,0 +1,38 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson, several times faster than the standard
+    library encoder on the large lists, for the same bytes with the default
+    COMPACT_JSON, UNICODE_JSON and STRICT_JSON settings: the Decimal fields are
+    already strings (COERCE_DECIMAL_TO_STRING), and the types orjson does not
+    encode as DRF does (raw Decimals, datetimes, lazy strings...) go through the
+    DRF encoder. Only the exponent of very small or large floats is written
+    differently (1e-5 for 1e-05), and NaN as null.
+
+    The indented output (?format=json with `; indent=4`, or other settings) is
+    rendered by JSONRenderer.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(
+            data, default=self.encoder_class().default, option=self.options
+        )
+        # As JSONRenderer: the line separators are escaped (for JavaScript)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028")
+            ret = ret.replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
@@ -0,0 +1,94 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+# Database the reads of the current request (or task) are sent to, None for
+# the primary. A context variable: it follows the async views across threads.
+_read_database = ContextVar("read_database", default=None)
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes go to the primary (`default`). Reads go to the primary too, unless
+    they are made in a replica reads context (see `read_from_replica()`): read
+    only API views and reporting querysets opt in, so that the reads of a write
+    request never hit a lagging replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        # Instances read from a replica are saved on the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def choose_replica():
+    """
+    A random replica alias, or None (the primary) if there are none.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+def get_read_database():
+    return _read_database.get()
+
+
+def set_read_database(alias):
+    """
+    Sends the following reads of the current context to `alias` (None for the
+    primary). Prefer `read_from_replica()` outside of the request cycle.
+    """
+    _read_database.set(alias)
+
+
+@contextmanager
+def read_from_replica():
+    """
+    Sends the reads of the block to a replica (the same one for the whole
+    block, for consistent results).
+    """
+    token = _read_database.set(choose_replica())
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+def _get_stickiness_key(user):
+    return f"db:primary:{user.pk}"
+
+
+def pin_to_primary(user):
+    """
+    Sends the reads of `user` to the primary for the next
+    settings.DATABASE_REPLICA_STICKINESS seconds, so that they see their own
+    writes whatever the replication lag.
+    """
+    if not settings.DATABASE_REPLICAS or not user.is_authenticated:
+        return
+    caches[settings.DATABASE_REPLICA_STICKINESS_CACHE_ALIAS].set(
+        _get_stickiness_key(user), True, timeout=settings.DATABASE_REPLICA_STICKINESS
+    )
+
+
+def is_pinned_to_primary(user):
+    if not user.is_authenticated:
+        return False
+    return bool(
+        caches[settings.DATABASE_REPLICA_STICKINESS_CACHE_ALIAS].get(
+            _get_stickiness_key(user)
+        )
+    )
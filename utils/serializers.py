@@ -0,0 +1,73 @@
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import fields, relations, serializers
+
+# Fields whose representation of a database value is the value itself
+IDENTITY_FIELDS = (fields.IntegerField, fields.CharField, fields.ReadOnlyField)
+
+
+class CompiledSerializer:
+    """
+    Row to dict converter precomputed from the declared fields of a (read-only)
+    serializer, fed by `values()` rows instead of model instances.
+
+    The (key, lookup, converter) entries are computed once, so converting a row
+    costs neither model instantiation nor per-field dispatch: the fields whose
+    representation is the database value are copied as is, the other ones go
+    through their own `to_representation` (hence the same output).
+
+    Only fields mapping to database columns (possibly through relations) are
+    supported: a property or a method source fails when the query runs.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.lookups = []
+        # (key, lookup of the value in the row, converter or None to copy it)
+        entries = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            lookup = self.get_lookup(name, field)
+            if lookup not in self.lookups:
+                self.lookups.append(lookup)
+            converter = None if self.is_identity(field) else field.to_representation
+            entries.append((name, lookup, converter))
+        entries = tuple(entries)
+
+        def convert(row):
+            return {
+                key: value if converter is None or value is None else converter(value)
+                for key, lookup, converter in entries
+                for value in (row[lookup],)
+            }
+
+        self.convert = convert
+
+    def get_lookup(self, name, field):
+        unsupported = (
+            serializers.BaseSerializer,
+            fields.SerializerMethodField,
+            fields.HiddenField,
+            relations.ManyRelatedField,
+        )
+        if isinstance(field, unsupported) or field.source == "*":
+            raise ImproperlyConfigured(
+                f"{self.serializer_class.__name__}.{name} cannot be compiled."
+            )
+        return "__".join(field.source_attrs)
+
+    def is_identity(self, field):
+        if isinstance(field, relations.PrimaryKeyRelatedField):
+            return field.pk_field is None
+        return type(field) in IDENTITY_FIELDS
+
+    def convert_many(self, rows):
+        convert = self.convert
+        return [convert(row) for row in rows]
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    return CompiledSerializer(serializer_class)
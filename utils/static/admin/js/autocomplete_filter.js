@@ -0,0 +1,19 @@
+'use strict';
+{
+    const $ = django.jQuery;
+    // Reloads the changelist filtered on the object picked in an
+    // AutocompleteFilter (from its first page)
+    $(function() {
+        $('.autocomplete-filter select').on('change', function() {
+            const params = new URLSearchParams(window.location.search);
+            params.delete('p');
+            params.delete('cursor');
+            if (this.value) {
+                params.set(this.name, this.value);
+            } else {
+                params.delete(this.name);
+            }
+            window.location.search = params.toString();
+        });
+    });
+}
@@ -0,0 +1,29 @@
+from copy import copy
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+
+from utils.admin import IndexedDatesQuerySet
+
+register = template.Library()
+
+
+def indexed_date_hierarchy(cl):
+    """
+    admin_list.date_hierarchy(), with the dates listed from index probes
+    """
+    cl = copy(cl)
+    cl.queryset = IndexedDatesQuerySet(cl.queryset)
+    return date_hierarchy(cl)
+
+
+@register.tag(name="indexed_date_hierarchy")
+def indexed_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=indexed_date_hierarchy,
+        template_name="date_hierarchy.html",
+        takes_context=False,
+    )
@@ -1,15 +1,21 @@
 import logging
+import re
+from collections import Counter
 from contextlib import contextmanager
 from io import BytesIO
 import sys
 from unittest.mock import patch
 
 from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
 from django.db.models.enums import ChoicesMeta
 from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.urls import Resolver404, resolve
 from faker import Faker
 from rest_framework.exceptions import ErrorDetail
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -27,12 +33,140 @@ class FastTestRunner(DiscoverRunner):
             "django.contrib.auth.hashers.MD5PasswordHasher",
         ]
         logging.disable(logging.WARNING)
+        # Every API test request is checked by QueryRecordingAPIClient
+        settings.CHECK_QUERY_BUDGETS = True
+        # The test data is written in a transaction of the primary: the replica
+        # routing tests enable the replicas explicitly
+        settings.DATABASE_REPLICAS = []
+
+
+# Transaction management statements do not count as queries
+IGNORED_STATEMENTS = re.compile(r"^\s*(RELEASE |ROLLBACK TO )?SAVEPOINT\b", re.I)
+SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+SQL_IN_LISTS = re.compile(r"\bIN \(\?(?:, \?)*\)")
+
+
+def normalize_sql(sql):
+    """
+    Statement with its literal values replaced by placeholders, so that the
+    statements differing only by their parameters are equal
+    """
+    return SQL_IN_LISTS.sub("IN (...)", SQL_LITERALS.sub("?", sql))
+
+
+class RequestQueries:
+    """SQL statements run while handling a test client request"""
+
+    def __init__(self, method, path, view_class, captured_queries):
+        self.method = method
+        self.path = path
+        self.view_class = view_class
+        self.statements = [
+            query["sql"]
+            for query in captured_queries
+            if not IGNORED_STATEMENTS.match(query["sql"])
+        ]
+
+    def __len__(self):
+        return len(self.statements)
+
+    @property
+    def budget(self):
+        """Maximum number of queries declared by the view for the method"""
+        return getattr(self.view_class, "query_budgets", {}).get(self.method)
+
+    def get_repeated_statements(self, threshold):
+        """Normalized statements run at least `threshold` times (N+1 queries)"""
+        counts = Counter(normalize_sql(statement) for statement in self.statements)
+        return {sql: count for sql, count in counts.items() if count >= threshold}
+
+    def get_errors(self, n_plus_one_threshold):
+        errors = []
+        if self.budget is not None and len(self) > self.budget:
+            errors.append(f"{len(self)} queries, budget is {self.budget}")
+        for sql, count in self.get_repeated_statements(n_plus_one_threshold).items():
+            errors.append(f"N+1 queries, {count} similar statements: {sql}")
+        return errors
+
+    def format(self, errors):
+        view_name = getattr(self.view_class, "__name__", "unknown view")
+        lines = [f"{self.method} {self.path} ({view_name}):"]
+        lines += [f"  - {error}" for error in errors]
+        lines.append("Statements:")
+        counts = Counter(normalize_sql(statement) for statement in self.statements)
+        for number, statement in enumerate(self.statements, start=1):
+            repeated = counts[normalize_sql(statement)]
+            marker = f"[x{repeated}] " if repeated > 1 else ""
+            lines.append(f"  {number}. {marker}{statement}")
+        return "\n".join(lines)
+
+
+class QueryRecordingAPIClient(APIClient):
+    """
+    API test client recording the SQL statements run by every request in
+    `recorded_requests`.
+
+    When `check_queries` is set (by default, when `settings.CHECK_QUERY_BUDGETS`
+    is, see FastTestRunner), a request fails if it runs more queries than the
+    `query_budgets` its view declares for the HTTP method, or if it runs the
+    same statement (parameters aside) `n_plus_one_threshold` times or more.
+    Budgets do not include the authentication queries: tests authenticate with
+    `force_authenticate`.
+    """
+
+    n_plus_one_threshold = 3
+
+    def __init__(self, *args, check_queries=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.check_queries = check_queries
+        self.recorded_requests = []
+
+    def request(self, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = super().request(**kwargs)
+            if response.streaming:
+                # Streamed content is queried while being consumed
+                response.streaming_content = list(response.streaming_content)
+        queries = RequestQueries(
+            kwargs["REQUEST_METHOD"],
+            kwargs["PATH_INFO"],
+            self._get_view_class(kwargs["PATH_INFO"]),
+            context.captured_queries,
+        )
+        self.recorded_requests.append(queries)
+        check_queries = self.check_queries
+        if check_queries is None:
+            check_queries = getattr(settings, "CHECK_QUERY_BUDGETS", False)
+        if check_queries:
+            errors = queries.get_errors(self.n_plus_one_threshold)
+            if errors:
+                raise AssertionError(queries.format(errors))
+        return response
+
+    @staticmethod
+    def _get_view_class(path):
+        try:
+            view = resolve(path).func
+        except Resolver404:
+            return None
+        return getattr(view, "view_class", None)
 
 
 class PrettyAssertAPITestCase(APITestCase):
-    """Replaces OrderedDict by regular dicts in API tests responses"""
+    """
+    Replaces OrderedDict by regular dicts in API tests responses, and starts
+    every test with empty caches (cached responses would outlive the rolled
+    back test data). Requests are checked against the views query budgets
+    (see QueryRecordingAPIClient).
+    """
 
     maxDiff = None
+    client_class = QueryRecordingAPIClient
+
+    def setUp(self):
+        super().setUp()
+        for cache in caches.all():
+            cache.clear()
 
     def _formatMessage(self, msg, standardMsg):
         if isinstance(msg, ReturnList) or isinstance(msg, ReturnDict):
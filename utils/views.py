@@ -1,3 +1,242 @@
-from django.shortcuts import render
+import hashlib
+import time
 
-# Create your views here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.functional import classproperty
+from django.utils.http import parse_etags
+from rest_framework import permissions, response, status
+
+from utils.routers import (
+    choose_replica,
+    get_read_database,
+    is_pinned_to_primary,
+    pin_to_primary,
+    set_read_database,
+)
+from utils.serializers import compile_serializer
+
+
+class CompiledListMixin:
+    """
+    Opt-in fast path for read-only list endpoints: the rows are read with
+    `values()` and converted by the compiled version of the view serializer,
+    producing the same JSON as the regular path without building any model
+    instance or running DRF field-by-field serialization.
+    """
+
+    def list(self, request, *args, **kwargs):
+        compiled, rows = self.get_compiled_rows()
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled.convert_many(page))
+        return response.Response(compiled.convert_many(rows))
+
+    async def alist(self, request, *args, **kwargs):
+        compiled, rows = self.get_compiled_rows()
+        page = await self.apaginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled.convert_many(page))
+        return response.Response(compiled.convert_many([row async for row in rows]))
+
+    def get_compiled_rows(self):
+        compiled = compile_serializer(self.get_serializer_class())
+        queryset = self.filter_queryset(self.get_queryset())
+        # The pagination may need the ordering values of the rows
+        lookups = list(compiled.lookups)
+        for field in queryset.query.order_by:
+            if isinstance(field, str) and field.lstrip("-") not in lookups:
+                lookups.append(field.lstrip("-"))
+        return compiled, queryset.values(*lookups)
+
+
+class ReplicaReadMixin:
+    """
+    Reads the safe (GET, HEAD, OPTIONS) requests from a replica, unless the user
+    is pinned to the primary: every successful write request pins them for a
+    short while, so that they read their own writes (see utils.routers).
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in permissions.SAFE_METHODS:
+            replica = choose_replica()
+            if replica is not None and not is_pinned_to_primary(request.user):
+                set_read_database(replica)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        set_read_database(None)
+        if (
+            request.method not in permissions.SAFE_METHODS
+            and response is not None
+            and response.status_code < 400
+        ):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class NotModified(Exception):
+    """
+    Raised by ConditionalGetMixin.initial() when the client copy is current
+    """
+
+
+class ConditionalGetMixin:
+    """
+    Answers the GET requests whose If-None-Match holds the current ETag with a
+    304, right after the authentication and permission checks: before the view
+    reads its tables. The ETag digests the version stamps of the data the view
+    serves (`etag_stamps`, bumped by every write of it), the path, the query
+    string and the accepted media type, so it is computed without any query.
+
+    A response read from a replica less than settings.DATABASE_REPLICA_STICKINESS
+    seconds after a bump may predate it (replication lag): it gets no ETag.
+    Comes before ReplicaReadMixin in the bases of a view.
+    """
+
+    etag_stamps = ()
+
+    def initial(self, request, *args, **kwargs):
+        self.etag = None
+        self.tag_response = False
+        super().initial(request, *args, **kwargs)
+        if request.method not in ("GET", "HEAD") or not self.etag_stamps:
+            return
+        self.etag, bumped_at = self.get_etag(request)
+        self.tag_response = (
+            get_read_database() is None
+            or bumped_at is None
+            or time.time() - bumped_at > settings.DATABASE_REPLICA_STICKINESS
+        )
+        etags = parse_etags(request.headers.get("If-None-Match", ""))
+        if "*" in etags or self.etag in (etag.removeprefix("W/") for etag in etags):
+            raise NotModified()
+
+    def get_etag(self, request):
+        """
+        (ETag, time of the last bump of the stamps or None)
+        """
+        versions, bump_times = [], []
+        for stamp in self.etag_stamps:
+            version, bumped_at = stamp.get_version_and_bump_time()
+            versions.append(version)
+            if bumped_at is not None:
+                bump_times.append(bumped_at)
+        digest = hashlib.md5(
+            "|".join(
+                [
+                    request.get_full_path(),
+                    request.headers.get("Accept", ""),
+                    *map(str, versions),
+                ]
+            ).encode()
+        ).hexdigest()
+        return f'"{digest}"', max(bump_times, default=None)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return response.Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        etag = getattr(self, "etag", None)
+        if etag is not None and (
+            response.status_code == status.HTTP_304_NOT_MODIFIED
+            or (response.status_code == status.HTTP_200_OK and self.tag_response)
+        ):
+            response["ETag"] = etag
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class AsyncAPIViewMixin:
+    """
+    Serves a DRF view from an async `dispatch()`, so that under ASGI a request
+    waiting for the database does not hold a worker thread. The async handlers
+    run on the event loop and read with the async ORM; the sync ones (writes,
+    OPTIONS) and the authentication, permission and throttling checks, which
+    may query the database, run in a worker thread.
+
+    The pagination class of the view must implement `apaginate_queryset()`.
+    """
+
+    @classproperty
+    def view_is_async(cls):
+        return True
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Same as APIView.dispatch(), awaiting the handler
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(
+            queryset, self.request, view=self
+        )
+
+    async def aget_object(self):
+        # Same as GenericAPIView.get_object(), with the async ORM
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class AsyncListModelMixin:
+    """
+    Async counterpart of ListModelMixin. It comes after the sync view in the
+    bases of an async view, so that the `alist()` of the mixins of the sync
+    view (compiled, cached lists) take precedence and can call this one.
+    """
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer([obj async for obj in queryset], many=True)
+        return response.Response(serializer.data)
+
+
+class AsyncRetrieveModelMixin:
+    """
+    Async counterpart of RetrieveModelMixin.
+    """
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return response.Response(serializer.data)